@@ -1,345 +1,100 @@
-from queue import PriorityQueue
-import bidirectional
-import pygame
+"""
+The pygame front end of the search engine
+The searches run headless in the engine package while recording their events, the Animator replays them on the grid
+"""
+import threading
 
-CLOCK_DELAY = 15
+import engine
+from animator import Animator
 
+ANYTIME_DEADLINE = 1.0  # seconds ARA* may spend improving its first path in the visualizer
+# the recorded searches of the game by algorithm, wall layout and query, kept while the application runs
+PATH_CACHE = engine.PathCache()
+# the functions called with the SearchStats of every finished search, the counters are only collected if there is one
+STATS_HOOKS = []
 
-def h(p1, p2):
-    """
-    heuristic function h(x) that calculates the manhattan distance
-    :param p1: point 1 having (x,y) coordinates
-    :param p2: point 2 having (x,y) coordinates
-    :return: the manhattan distance between them
-    """
-    x1, y1 = p1
-    x2, y2 = p2
-    return abs(x1 - x2) + abs(y1 - y2)
-
-
-def a_star(draw, grid, start, end):
-    """
-    a function to evaluate the A* search algorithm
-    it is an informed search algorithm with f(x) = g(x) + h(x) where g(x) is the path cost
-    we will use a heap to sort the node with respect to the f(x) score
-    it guarantees the shortest path and is a very efficient algorithm
-    :param draw: a function that refreshes the pygame window every time a node's color is changed
-    :param grid: the list representation of the graph
-    :param start: starting node
-    :param end: goal node
-    :return: boolean True if a path exists and False if no path exists
-    """
-    count = 0
-    heap = PriorityQueue()
-    heap.put((0, count, start))
-    open_list = []
-    path_dict = {}
-
-    g_score = {node: float("inf") for row in grid for node in row}
-    g_score[start] = 0
-
-    f_score = {node: float("inf") for row in grid for node in row}
-    f_score[start] = h(start.get_pos(), end.get_pos())
-
-    while not heap.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit(0)
 
-        current = heap.get()[2]  # returns the Node object from the tuple
-
-        if current == end:  # goal node found
-            animate(path_dict, start, end, draw)
-            # remaking the start and end node as they will be removed by reconstruct_path()
-            end.make_end()
-            start.make_start()
-            return True
-
-        for neighbour in current.neighbours:
-            if neighbour in open_list:
-                continue
-            path_dict[neighbour] = current
-            if neighbour != start:
-                count += 1
-                temp_g_score = g_score[current] + 1
-                g_score[neighbour] = temp_g_score  # g(x)
-                f_score[neighbour] = temp_g_score + h(neighbour.get_pos(), end.get_pos())  # f(x) = g(x) + h(x)
-                heap.put((f_score[neighbour], count, neighbour))
-                open_list.append(neighbour)
-                neighbour.make_open()
-
-        pygame.time.delay(CLOCK_DELAY)
-        draw()
-
-        if current != start:
-            current.make_closed()
-
-    return False
-
-
-def dijkstra(draw, grid, start, end):
+def report(stats):
     """
-    a function to implement dijkstra's algorithm
-    it is a blind search technique and the father of all pathfinding algorithms
-    we have used a heap to implement it
-    it guarantees shortest path
-    :param draw: a function that refreshes the pygame window every time a node's color is changed
-    :param grid: the list representation of the graph
-    :param start: starting node
-    :param end: goal node
-    :return: boolean True if a path exists and False if no path exists
-    """
-    distance = {node: float("inf") for row in grid for node in row}
-    distance[start] = 0
-    path_dict = {}
-    heap = PriorityQueue()
-    heap.put((0, start))
-    while not heap.empty():
-        current = heap.get()[1]
-        if current == end:
-            animate(path_dict, start, end, draw)
-            start.make_start()
-            end.make_end()
-            return True
-
-        for neighbour in current.neighbours:
-
-            if distance[neighbour] > distance[current] + 1:
-                path_dict[neighbour] = current
-                distance[neighbour] = distance[current] + 1
-                heap.put((distance[neighbour], neighbour))
-                neighbour.make_open()
-
-        draw()
-        if current != start:
-            current.make_closed()
-
-    return False
-
-
-def breadth_first_search(draw, start, end):
-    """
-    a function to evaluate BFS algorithm
-    it is a blind search algorithm
-    we will use a queue to implement it
-    it guarantees shortest path
-    :param draw: a function that refreshes the pygame window every time a node's color is changed
-    :param start: starting node
-    :param end: goal node
-    :return: boolean True if a path exists and False if no path exists
-    """
-    queue = [start]
-    path_dict = {}
-    open_list = []
-    while len(queue) > 0:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit(0)
-
-        current = queue.pop(0)
-        if current == end:
-            animate(path_dict, start, end, draw)
-            end.make_end()
-            start.make_start()
-            return True
-
-        for neighbour in current.neighbours:  # iterating over neighbours
-            if current not in queue:
-                # opening a neighbour
-                if neighbour in open_list:
-                    # if neighbour is already opened, then no need to open it anymore
-                    continue
-                path_dict[neighbour] = current  # making current as parent of all neighbours
-                queue.append(neighbour)
-                if neighbour != start and neighbour != end:
-                    neighbour.make_open()
-                    open_list.append(neighbour)
-
-        pygame.time.delay(CLOCK_DELAY)
-        draw()
-        if current != start:
-            current.make_closed()
-
-    return False
-
-
-def depth_first_search(draw, start, end):
-    """
-    a function to evaluate DFS algorithm
-    it is a blind search algorithm
-    we will use stack to implement it
-    it does not guarantee shortest path
-    :param draw: a function that refreshes the pygame window every time a node's color is changed
-    :param start: starting node
-    :param end: goal node
-    :return: boolean True if a path exists and False if no path exists
-    """
-    stack = [start]
-    path_dict = {}
-    open_list = []
-
-    while len(stack) > 0:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit(0)
-
-        current = stack.pop()
-
-        if current == end:
-            animate(path_dict, start, end, draw)
-            end.make_end()
-            start.make_start()
-            return True
-
-        for neighbour in current.neighbours:  # iterating over neighbours
-            if current not in stack:
-                # opening a neighbour
-                if neighbour in open_list:
-                    # if neighbour is already opened, then no need to open it anymore
-                    continue
-                path_dict[neighbour] = current  # making current as parent of all neighbours
-                stack.append(neighbour)
-                if neighbour != start and neighbour != end:
-                    neighbour.make_open()
-                    open_list.append(neighbour)
-
-        pygame.time.delay(CLOCK_DELAY)
-        draw()
-        if current != start:
-            current.make_closed()
-
-    return False
-
-
-def greedy_best_first(draw, grid, start, end):
-    """
-    a function to implement greedy best first search algorithm
-    it is an informed search algorithm with f(x) = h(x)
-    we will implement it using a heap where the nodes will be sorted with respect to lowest heuristic score
-    it is called greedy because it always chooses the node with lowest heuristic score
-    it does not guarantee shortest path
-    :param draw: a function that refreshes the pygame window every time a node's color is changed
-    :param grid: the list representation of the graph
-    :param start: starting node
-    :param end: goal node
-    :return: boolean True if a path exists and False if no path exists
-    """
-    heap = PriorityQueue()
-    heap.put((0, start))
-    open_list = []
-    path_dict = dict()
-
-    f_score = {node: float("inf") for row in grid for node in row}
-    f_score[start] = h(start.get_pos(), end.get_pos())
-
-    while not heap.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit(0)
-
-        current = heap.get()[1]  # returns the Node object from the tuple
-
-        if current == end:  # goal node found
-            animate(path_dict, start, end, draw)
-            # remaking the start and end node as they will be removed by reconstruct_path()
-            end.make_end()
-            start.make_start()
-            return True
-
-        for neighbour in current.neighbours:
-            if neighbour in open_list:
-                continue
-            path_dict[neighbour] = current
-            if neighbour != start:
-                f_score[neighbour] = h(neighbour.get_pos(), end.get_pos())  # f(x) = g(x) + h(x)
-                heap.put((f_score[neighbour], neighbour))
-                open_list.append(neighbour)
-                neighbour.make_open()
-
-        pygame.time.delay(CLOCK_DELAY)
-        draw()
-
-        if current != start:
-            current.make_closed()
-
-    return False
-
-
-def bidirectional_search(draw, grid, start, end):
-    """
-    a function to implement Blind Bidirectional Search by BFS algorithm
-    it is uninformed and uses BFS from both the goal and start node simultaneously
-    it stops when the start search path and goal search path collides
-    it guarantees shortest path
-
-    It uses the bidirectional.py module's BidirectionalSearch class
-    The actual algorithm implementation is written in that module
-    :param draw: a function that refreshes the pygame window every time a node's color is changed
-    :param grid: the list representation of the graph
-    :param start: starting node
-    :param end: goal node
-    :return: boolean True if a path exists and False if no path exists
-    """
-    bs = bidirectional.BidirectionalSearch(draw, grid, start, end)
-    return bs.search()
-
-
-def bidirectional_a_star_search(draw, grid, start, end):
-    """
-    a function to implement bidirectional A* search algorithm
-    it uses heuristic function so it is informed and takes the best of A* search and bidirectional search
-    it guarantees shortest path
-
-    It uses the bidirectional.py module's InformedBidirectionalSearch class
-    The actual algorithm implementation is written in that module
-    :param draw: a function that refreshes the pygame window every time a node's color is changed
-    :param grid: the list representation of the graph
-    :param start: starting node
-    :param end: goal node
-    :return: boolean True if a path exists and False if no path exists
-    """
-    bs = bidirectional.InformedBidirectionalSearch(draw, grid, start, end)
-    return bs.a_star_search()
-
-
-def bidirectional_greedy_search(draw, grid, start, end):
-    """
-    a function to implement bidirectional greedy best first search
-    it uses heuristic function to perform best first search from start and goal node simultaneously
-    it does not guarantee shortest path
-
-    It uses the bidirectional.py module's InformedBidirectionalSearch class
-    The actual algorithm implementation is written in that module
-    :param draw: a function that refreshes the pygame window every time a node's color is changed
-    :param grid: the list representation of the graph
-    :param start: starting node
-    :param end: goal node
-    :return: boolean True if a path exists and False if no path exists
+    hands the counters of a finished search to every function of STATS_HOOKS
+    :param stats: the SearchStats of the search
+    :return: None
     """
-    bs = bidirectional.InformedBidirectionalSearch(draw, grid, start, end)
-    return bs.greedy_search()
+    for hook in STATS_HOOKS:
+        hook(stats)
 
 
-def animate(path_dict, start, end, draw):
+def start_search(search, grid, start, end, stats=None):
     """
-    a function that animates the path by backtracking the path_dict
-    :param path_dict: a dictionary that holds the node as key and its parent as value
+    starts a headless search in a background thread and returns its player right away
+    the caller replays the events with Animator.update() once per frame while the search is still running
+    :param search: an engine algorithm function
+    :param grid: the Grid being searched
     :param start: starting node
     :param end: goal node
-    :param draw: a function that refreshes the pygame window every time a node's color is changed
-    :return: None
-    """
-    path = [end]
-    while path[-1] != start:
-        node = path_dict[path[-1]]
-        path.append(node)
-
-    path = path[::-1]
-    for node in path:
-        node.make_path()
-        pygame.time.delay(CLOCK_DELAY)
-        draw()
+    :param stats: optional SearchStats filled by the search thread, its counters are complete once the trace finished
+    :return: Animator of the search's SearchTrace
+    """
+    trace = engine.SearchTrace()
+    thread = threading.Thread(target=engine.record, args=(search, grid, start.get_pos(), end.get_pos(), trace),
+                              kwargs={"stats": stats}, daemon=True)
+    thread.start()
+    return Animator(grid, trace)
+
+
+def replay(grid, trace):
+    """
+    paints a finished search at once
+    :param grid: the Grid the search ran on
+    :param trace: the SearchTrace of the search
+    :return: Animator of the trace, already done
+    """
+    player = Animator(grid, trace)
+    player.skip()
+    return player
+
+
+def anytime_search(grid_map, start, end, on_update=None):
+    """
+    the visual mode of ARA*: the path of every improving solution is painted as soon as it is found and the
+    previous one is painted back as closed cells, so the animation shows the path getting shorter
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node changes
+    :return: AnytimeResult object
+    """
+    shown = []  # indices of the path on display
+
+    def show(result):
+        for index in shown:
+            on_update(index, engine.CLOSED)
+        shown[:] = [grid_map.index(pos) for pos in result.path]
+        for index in shown:
+            on_update(index, engine.PATH)
+
+    return engine.ara_star(grid_map, start, end, on_update, deadline=ANYTIME_DEADLINE,
+                           on_solution=show if on_update else None)
+
+
+# the engine algorithm of every button in the main menu
+MENU_ALGORITHMS = {
+    "DFS": engine.depth_first_search,
+    "BFS": engine.breadth_first_search,
+    "A* Search": engine.a_star,
+    "Best First": engine.greedy_best_first,
+    "Bidirectional": engine.bidirectional_search,
+    "Bidirectional A*": engine.bidirectional_a_star_search,
+    "Bidirectional Greedy": engine.bidirectional_greedy_search,
+    "Dijkstra": engine.dijkstra,
+    "JPS": engine.jump_point_search,
+    "JPS+": engine.jump_point_search_plus,
+    "D* Lite": engine.d_star_lite,
+    "HPA*": engine.hpa_star,
+    "ARA*": anytime_search,
+}
+
+# the planner class of the menu algorithms that keep their search state to replan after the grid is edited
+INCREMENTAL_ALGORITHMS = {
+    "D* Lite": engine.DStarLite,
+}
@@ -0,0 +1,88 @@
+"""
+Playback of recorded searches
+The Animator copies the events of a SearchTrace into the grid cells a few at a time, once per frame,
+so the speed of the animation only depends on the frame rate and the number of events per frame
+"""
+from engine import WALL, START, GOAL
+
+EVENTS_PER_FRAME = 4  # default playback speed
+MAX_EVENTS_PER_FRAME = 1 << 20
+
+
+class Animator:
+    """
+    replays a SearchTrace on a grid
+    ------------------------------------
+    data fields
+    ------------------------------------
+    grid: the Grid whose cells are painted, every painted cell is marked dirty for the Renderer
+    trace: the SearchTrace being replayed, it may still be recording in another thread
+    position: number of events already painted
+    events_per_frame: number of events painted by each update()
+    paused: boolean True while the playback is paused
+    fast_forward: boolean True once the playback should catch up with the recording every frame
+    ------------------------------------
+    methods
+    ------------------------------------
+    update: paints the events of one frame, it is called once per frame
+    step: paints the next event, used while paused
+    toggle_pause: pauses or resumes the playback
+    skip: paints every recorded event and keeps up with the recording from now on
+    faster: doubles the playback speed
+    slower: halves the playback speed
+    done: True once the search finished and all its events are painted
+    """
+
+    def __init__(self, grid, trace, events_per_frame=EVENTS_PER_FRAME):
+        self.grid = grid
+        self.trace = trace
+        self.position = 0
+        self.events_per_frame = events_per_frame
+        self.paused = False
+        self.fast_forward = False
+
+    @property
+    def done(self):
+        return self.trace.finished and self.position >= len(self.trace)
+
+    def paint(self, count):
+        """
+        copies the next events into the grid cells, the wall, start and goal cells keep their state
+        the cells are written directly, not through Grid.set_state(), so they must never become or stop being walls
+        :param count: maximum number of events to paint
+        :return: None
+        """
+        cells = self.grid.cells
+        dirty = self.grid.dirty
+        indices = self.trace.indices
+        states = self.trace.states
+        stop = min(self.position + count, len(self.trace))
+        for i in range(self.position, stop):
+            index = indices[i]
+            state = cells[index]
+            if state != WALL and state != START and state != GOAL:
+                cells[index] = states[i]
+                dirty.append(index)
+        self.position = stop
+
+    def update(self):
+        if self.fast_forward:
+            self.paint(len(self.trace) - self.position)
+        elif not self.paused:
+            self.paint(self.events_per_frame)
+
+    def step(self):
+        self.paint(1)
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+
+    def skip(self):
+        self.fast_forward = True
+        self.update()
+
+    def faster(self):
+        self.events_per_frame = min(self.events_per_frame * 2, MAX_EVENTS_PER_FRAME)
+
+    def slower(self):
+        self.events_per_frame = max(self.events_per_frame // 2, 1)
@@ -0,0 +1,454 @@
+"""
+Benchmark runner of the headless engine
+It runs every algorithm of engine.ALGORITHMS on a corpus of generated and imported maps and reports for each query
+the wall time, the expanded nodes, the peak open list size, the path length and the gap to the optimal path cost
+The memory command traces the allocations of every search instead and fails when one needs more bytes per cell of
+the map than the budget
+
+    python benchmark.py run --sizes 25 256 1024 --output results.json
+    python benchmark.py run --kinds maze --map arena.map --output results.csv
+    python benchmark.py run --algorithms a_star dijkstra --open-lists binary indexed bucket --output lists.json
+    python benchmark.py compare baseline.json results.json
+    python benchmark.py memory --sizes 256 1024 --algorithms a_star jps --budget 64 --output memory.json
+"""
+import argparse
+import csv
+import gc
+import inspect
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import engine
+from engine import maps
+
+DEFAULT_SIZES = (25, 64, 256, 1024)
+MAP_KINDS = ("open", "random", "maze", "rooms")
+DENSITIES = (0.1, 0.2, 0.3, 0.4)  # wall probability of the random maps
+REGRESSION_THRESHOLD = 0.1  # compare flags a time ratio above 1.1
+# IDA* searches the grid again for every threshold and takes minutes on the large maps, it only runs when it is
+# named with --algorithms
+SLOW_ALGORITHMS = ("ida_star",)
+DEFAULT_ALGORITHMS = [name for name in engine.ALGORITHMS if name not in SLOW_ALGORITHMS]
+
+MEMORY_BUDGET = 512.0  # default peak bytes per cell of the map a search may allocate in the memory command
+
+# the columns of every result row
+FIELDS = ["map", "rows", "cols", "connectivity", "query", "start", "goal", "algorithm", "open_list", "found",
+          "time_ms", "expanded", "max_open", "path_length", "cost", "optimal_cost", "gap"]
+# the columns of every row of the memory command
+MEMORY_FIELDS = ["map", "rows", "cols", "connectivity", "query", "start", "goal", "algorithm", "found", "expanded",
+                 "max_open", "peak_kb", "retained_kb", "peak_per_cell", "retained_per_cell", "over_budget"]
+
+
+def make_corpus(sizes, kinds, map_files, seed=0, connectivity=4):
+    """
+    builds the maps of a benchmark run one at a time
+    :param sizes: grid sizes of the generated maps
+    :param kinds: names of the generated map kinds, a subset of MAP_KINDS
+    :param map_files: paths of map files or PNG images read with engine.maps.load()
+    :param seed: random seed of the generators
+    :param connectivity: 4 or 8
+    :return: generator of (name, GridMap) pairs
+    """
+    for size in sizes:
+        if "open" in kinds:
+            yield "open", maps.open_map(size, connectivity)
+        if "random" in kinds:
+            for density in DENSITIES:
+                yield "random-{:.0f}".format(density * 100), maps.random_map(size, density, seed, connectivity)
+        if "maze" in kinds:
+            yield "maze", maps.maze_map(size, seed, connectivity)
+        if "rooms" in kinds:
+            yield "rooms", maps.rooms_map(size, seed=seed, connectivity=connectivity)
+
+    for path in map_files:
+        yield os.path.basename(path), maps.load(path, connectivity)
+
+
+def open_list_variants(search, open_lists, connectivity):
+    """
+    the open list backends to run an algorithm with
+    :param search: an engine algorithm function
+    :param open_lists: names of the backends asked for, keys of engine.OPEN_LISTS, None for the default one
+    :param connectivity: 4 or 8, the bucket queue needs the integer costs of 4 connected grids
+    :return: list of backend names, [None] to run the algorithm once with its default backend
+    """
+    if not open_lists or "open_list" not in inspect.signature(search).parameters:
+        return [None]
+    # the weighted keys of ARA* are fractional on any grid
+    integer_priorities = connectivity == 4 and search is not engine.ara_star
+    return [name for name in open_lists if name != "bucket" or integer_priorities]
+
+
+def time_search(search, grid_map, start, end, repeat=1, **kwargs):
+    """
+    times a search with the garbage collector disabled, like timeit does
+    :param search: an engine algorithm function
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param repeat: number of runs, the fastest one is kept
+    :param kwargs: extra keyword arguments forwarded to the algorithm
+    :return: (seconds, SearchResult) of the fastest run
+    """
+    best = None
+    result = None
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            result = search(grid_map, start, end, **kwargs)
+            elapsed = time.perf_counter() - begin
+            if best is None or elapsed < best:
+                best = elapsed
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return best, result
+
+
+def copy_map(grid_map):
+    """
+    :param grid_map: a GridMap
+    :return: a new GridMap with the same cells, none of the tables cached per GridMap are shared with the original
+    """
+    copy = engine.GridMap(grid_map.rows, grid_map.cols, grid_map.connectivity)
+    copy.cells[:] = grid_map.cells
+    return copy
+
+
+def trace_search(search, grid_map, start, end):
+    """
+    runs a search while tracemalloc traces the allocations of the interpreter, with the garbage collector disabled
+    the tables an algorithm caches per GridMap are allocated by its first search and retained by the map, so they
+    count in both measures of that search
+    :param search: an engine algorithm function
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :return: (peak bytes allocated during the search, bytes still allocated after it returned, SearchResult)
+    """
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = search(grid_map, start, end)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        if gc_enabled:
+            gc.enable()
+
+    return peak - before, after - before, result
+
+
+def run_memory(corpus, algorithms, queries=3, seed=0, budget=MEMORY_BUDGET, log=None):
+    """
+    traces the memory of every algorithm on every query of every map
+    every algorithm searches its own copy of the map so it pays for the tables it caches per GridMap and does not
+    reuse the ones of the algorithms before it
+    :param corpus: iterable of (name, GridMap) pairs
+    :param algorithms: keys of engine.ALGORITHMS
+    :param queries: number of start and goal pairs per map
+    :param seed: random seed of the queries
+    :param budget: peak bytes per cell of the map a search may allocate, None for no budget
+    :param log: optional file receiving one progress line per map
+    :return: list of result rows, dictionaries with the MEMORY_FIELDS keys
+    """
+    rows = []
+    for name, grid_map in corpus:
+        if log is not None:
+            print("{} {}x{}".format(name, grid_map.rows, grid_map.cols), file=log, flush=True)
+
+        pairs = list(maps.random_queries(grid_map, queries, seed))
+        for algorithm in algorithms:
+            search = engine.ALGORITHMS[algorithm]
+            copy = copy_map(grid_map)
+            for number, (start, end) in enumerate(pairs):
+                peak, retained, result = trace_search(search, copy, start, end)
+                rows.append({
+                    "map": name,
+                    "rows": grid_map.rows,
+                    "cols": grid_map.cols,
+                    "connectivity": grid_map.connectivity,
+                    "query": number,
+                    "start": "{} {}".format(*start),
+                    "goal": "{} {}".format(*end),
+                    "algorithm": algorithm,
+                    "found": result.found,
+                    "expanded": result.expanded,
+                    "max_open": result.max_open,
+                    "peak_kb": round(peak / 1024, 1),
+                    "retained_kb": round(retained / 1024, 1),
+                    "peak_per_cell": round(peak / grid_map.size, 2),
+                    "retained_per_cell": round(retained / grid_map.size, 2),
+                    "over_budget": budget is not None and peak > budget * grid_map.size,
+                })
+
+    return rows
+
+
+def run_benchmark(corpus, algorithms, queries=3, seed=0, repeat=1, log=None, open_lists=None):
+    """
+    runs every algorithm on every query of every map
+    the optimal cost of each query is computed once with dijkstra's algorithm, outside of the timings
+    :param corpus: iterable of (name, GridMap) pairs
+    :param algorithms: keys of engine.ALGORITHMS
+    :param queries: number of start and goal pairs per map
+    :param seed: random seed of the queries
+    :param repeat: number of timed runs per search
+    :param log: optional file receiving one progress line per map
+    :param open_lists: optional keys of engine.OPEN_LISTS, every algorithm taking an open_list argument is run
+                       once with each of them
+    :return: list of result rows, dictionaries with the FIELDS keys
+    """
+    rows = []
+    for name, grid_map in corpus:
+        if log is not None:
+            print("{} {}x{}".format(name, grid_map.rows, grid_map.cols), file=log, flush=True)
+
+        for number, (start, end) in enumerate(maps.random_queries(grid_map, queries, seed)):
+            optimal_cost = engine.dijkstra(grid_map, start, end).cost
+            for algorithm in algorithms:
+                search = engine.ALGORITHMS[algorithm]
+                for open_list in open_list_variants(search, open_lists, grid_map.connectivity):
+                    kwargs = {"open_list": open_list} if open_list else {}
+                    seconds, result = time_search(search, grid_map, start, end, repeat, **kwargs)
+                    rows.append(result_row(name, grid_map, number, start, end, algorithm, open_list, seconds, result,
+                                           optimal_cost))
+
+    return rows
+
+
+def result_row(name, grid_map, number, start, end, algorithm, open_list, seconds, result, optimal_cost):
+    """
+    :return: the result row of one timed search, a dictionary with the FIELDS keys
+    """
+    gap = None
+    if result.found:
+        gap = (result.cost - optimal_cost) / optimal_cost if optimal_cost else 0.0
+    return {
+        "map": name,
+        "rows": grid_map.rows,
+        "cols": grid_map.cols,
+        "connectivity": grid_map.connectivity,
+        "query": number,
+        "start": "{} {}".format(*start),
+        "goal": "{} {}".format(*end),
+        "algorithm": algorithm,
+        "open_list": open_list,
+        "found": result.found,
+        "time_ms": round(seconds * 1000, 3),
+        "expanded": result.expanded,
+        "max_open": result.max_open,
+        "path_length": len(result.path) - 1 if result.found else None,
+        "cost": result.cost,
+        "optimal_cost": optimal_cost,
+        "gap": gap,
+    }
+
+
+def write_results(rows, path, meta=None, fields=FIELDS):
+    """
+    saves result rows as CSV if the path ends with .csv and as JSON otherwise
+    :param rows: list of result rows
+    :param path: output file path
+    :param meta: dictionary describing the run, only stored in JSON files
+    :param fields: the columns of the rows, FIELDS or MEMORY_FIELDS
+    :return: None
+    """
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+
+    with open(path, "w") as file:
+        json.dump({"meta": meta or {}, "results": rows}, file, indent=1)
+
+
+def read_results(path):
+    """
+    loads the result rows written by write_results()
+    :param path: a .csv or .json result file
+    :return: list of result rows with numeric values for the measured fields
+    """
+    if not path.endswith(".csv"):
+        with open(path) as file:
+            return json.load(file)["results"]
+
+    rows = []
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            for key in ("rows", "cols", "connectivity", "query", "expanded", "max_open"):
+                row[key] = int(row[key])
+            for key in ("time_ms", "cost", "optimal_cost", "gap", "path_length"):
+                row[key] = float(row[key]) if row[key] else None
+            row["found"] = row["found"] == "True"
+            row["open_list"] = row.get("open_list") or None
+            rows.append(row)
+
+    return rows
+
+
+def summarize(rows):
+    """
+    adds up the results of all the queries of every (map, size, connectivity, algorithm)
+    an algorithm run with a chosen open list is named 'algorithm/open list'
+    :param rows: list of result rows
+    :return: dictionary of (map, rows, cols, connectivity, algorithm) to a dictionary of totals
+    """
+    totals = {}
+    for row in rows:
+        algorithm = row["algorithm"]
+        if row.get("open_list"):
+            algorithm += "/" + row["open_list"]
+        key = (row["map"], row["rows"], row["cols"], row["connectivity"], algorithm)
+        total = totals.setdefault(key, {"queries": 0, "found": 0, "time_ms": 0.0, "expanded": 0, "max_open": 0,
+                                        "gap": 0.0})
+        total["queries"] += 1
+        total["found"] += bool(row["found"])
+        total["time_ms"] += row["time_ms"]
+        total["expanded"] += row["expanded"]
+        total["max_open"] = max(total["max_open"], row["max_open"])
+        total["gap"] = max(total["gap"], row["gap"] or 0.0)
+
+    return totals
+
+
+def compare(base_rows, rows, threshold=REGRESSION_THRESHOLD):
+    """
+    compares two runs on the queries they have in common
+    a row is a regression if it got slower by more than the threshold, expands more nodes, finds fewer paths
+    or has a larger optimality gap
+    :param base_rows: result rows of the reference run
+    :param rows: result rows of the new run
+    :param threshold: tolerated relative increase of the time
+    :return: list of (key, base totals, new totals, time ratio, regression flag) tuples
+    """
+    base = summarize(base_rows)
+    new = summarize(rows)
+    report = []
+    for key in sorted(base.keys() & new.keys()):
+        old, current = base[key], new[key]
+        ratio = current["time_ms"] / old["time_ms"] if old["time_ms"] else float("inf")
+        regression = (ratio > 1 + threshold or current["expanded"] > old["expanded"]
+                      or current["found"] < old["found"] or current["gap"] > old["gap"] + 1e-9)
+        report.append((key, old, current, ratio, regression))
+
+    return report
+
+
+def print_summary(rows, file=sys.stdout):
+    print("{:<12} {:>11} {:<22} {:>7} {:>11} {:>10} {:>9} {:>7}".format(
+        "map", "size", "algorithm", "found", "time_ms", "expanded", "max_open", "gap"), file=file)
+    for (name, n_rows, n_cols, _, algorithm), total in summarize(rows).items():
+        print("{:<12} {:>11} {:<22} {:>7} {:>11.2f} {:>10} {:>9} {:>7.3f}".format(
+            name, "{}x{}".format(n_rows, n_cols), algorithm, "{}/{}".format(total["found"], total["queries"]),
+            total["time_ms"], total["expanded"], total["max_open"], total["gap"]), file=file)
+
+
+def print_memory(rows, file=sys.stdout):
+    print("{:<12} {:>11} {:<22} {:>7} {:>11} {:>11} {:>9} {:>9}".format(
+        "map", "size", "algorithm", "found", "peak_kb", "retained_kb", "peak/cell", "kept/cell"), file=file)
+    worst = {}
+    for row in rows:
+        key = (row["map"], row["rows"], row["cols"], row["algorithm"])
+        total = worst.setdefault(key, {"queries": 0, "found": 0, "peak_kb": 0.0, "retained_kb": 0.0,
+                                       "peak_per_cell": 0.0, "retained_per_cell": 0.0, "over_budget": False})
+        total["queries"] += 1
+        total["found"] += bool(row["found"])
+        for field in ("peak_kb", "retained_kb", "peak_per_cell", "retained_per_cell"):
+            total[field] = max(total[field], row[field])
+        total["over_budget"] |= row["over_budget"]
+
+    for (name, n_rows, n_cols, algorithm), total in worst.items():
+        print("{:<12} {:>11} {:<22} {:>7} {:>11.1f} {:>11.1f} {:>9.2f} {:>9.2f}{}".format(
+            name, "{}x{}".format(n_rows, n_cols), algorithm, "{}/{}".format(total["found"], total["queries"]),
+            total["peak_kb"], total["retained_kb"], total["peak_per_cell"], total["retained_per_cell"],
+            "  OVER BUDGET" if total["over_budget"] else ""), file=file)
+
+
+def print_comparison(report, file=sys.stdout):
+    print("{:<12} {:>11} {:<22} {:>11} {:>11} {:>7} {:>10} {:>10}".format(
+        "map", "size", "algorithm", "base_ms", "new_ms", "ratio", "base_exp", "new_exp"), file=file)
+    for (name, n_rows, n_cols, _, algorithm), old, current, ratio, regression in report:
+        print("{:<12} {:>11} {:<22} {:>11.2f} {:>11.2f} {:>7.2f} {:>10} {:>10}{}".format(
+            name, "{}x{}".format(n_rows, n_cols), algorithm, old["time_ms"], current["time_ms"], ratio,
+            old["expanded"], current["expanded"], "  REGRESSION" if regression else ""), file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmark the path finding algorithms of the engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark")
+    run.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="sizes of the generated maps")
+    run.add_argument("--kinds", nargs="*", choices=MAP_KINDS, default=MAP_KINDS, help="generated map kinds")
+    run.add_argument("--map", dest="map_files", action="append", default=[],
+                     help="map file or PNG image to import, repeatable")
+    run.add_argument("--algorithms", nargs="+", choices=list(engine.ALGORITHMS), default=DEFAULT_ALGORITHMS)
+    run.add_argument("--queries", type=int, default=3, help="start and goal pairs per map")
+    run.add_argument("--open-lists", nargs="+", choices=list(engine.OPEN_LISTS),
+                     help="run the algorithms taking an open list once with each of these backends")
+    run.add_argument("--repeat", type=int, default=1, help="timed runs per search, the fastest is kept")
+    run.add_argument("--connectivity", type=int, choices=(4, 8), default=4)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="write the results to this .json or .csv file")
+
+    diff = commands.add_parser("compare", help="compare two result files")
+    diff.add_argument("base", help="results of the reference run")
+    diff.add_argument("new", help="results of the new run")
+    diff.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="tolerated slowdown ratio")
+
+    memory = commands.add_parser("memory", help="trace the peak and retained memory of every search")
+    memory.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="sizes of the generated maps")
+    memory.add_argument("--kinds", nargs="*", choices=MAP_KINDS, default=MAP_KINDS, help="generated map kinds")
+    memory.add_argument("--map", dest="map_files", action="append", default=[],
+                        help="map file or PNG image to import, repeatable")
+    memory.add_argument("--algorithms", nargs="+", choices=list(engine.ALGORITHMS), default=DEFAULT_ALGORITHMS)
+    memory.add_argument("--queries", type=int, default=3, help="start and goal pairs per map")
+    memory.add_argument("--connectivity", type=int, choices=(4, 8), default=4)
+    memory.add_argument("--seed", type=int, default=0)
+    memory.add_argument("--budget", type=float, default=MEMORY_BUDGET,
+                        help="peak bytes per cell a search may allocate, 0 for no budget")
+    memory.add_argument("--output", help="write the results to this .json or .csv file")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        report = compare(read_results(args.base), read_results(args.new), args.threshold)
+        print_comparison(report)
+        return 1 if any(regression for *_, regression in report) else 0
+
+    corpus = make_corpus(args.sizes, args.kinds, args.map_files, args.seed, args.connectivity)
+    if args.command == "memory":
+        rows = run_memory(corpus, args.algorithms, args.queries, args.seed, args.budget or None, log=sys.stderr)
+        print_memory(rows)
+        if args.output:
+            meta = {"python": platform.python_version(), "platform": platform.platform(),
+                    "date": time.strftime("%Y-%m-%d %H:%M:%S"), "args": vars(args)}
+            write_results(rows, args.output, meta, MEMORY_FIELDS)
+        return 1 if any(row["over_budget"] for row in rows) else 0
+
+    rows = run_benchmark(corpus, args.algorithms, args.queries, args.seed, args.repeat, log=sys.stderr,
+                         open_lists=args.open_lists)
+    print_summary(rows)
+    if args.output:
+        meta = {"python": platform.python_version(), "platform": platform.platform(),
+                "date": time.strftime("%Y-%m-%d %H:%M:%S"), "args": vars(args)}
+        write_results(rows, args.output, meta)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
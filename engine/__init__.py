@@ -0,0 +1,119 @@
+"""
+A headless path finding engine that runs every algorithm of the visualizer without importing pygame
+Each algorithm takes a GridMap, a start and a goal (row, col) position and returns a SearchResult
+The pygame visualizer in algorithms.py is a thin consumer of this package that paints the on_update callbacks
+
+    >>> grid_map = GridMap.from_strings(["....", ".##.", "...."])
+    >>> search("a_star", grid_map, (0, 0), (2, 3)).cost
+    5
+"""
+from .grid import GridMap, FREE, WALL, OPEN, CLOSED, PATH, START, GOAL
+from .search import SearchResult, a_star, dijkstra, breadth_first_search, depth_first_search, greedy_best_first
+from .bidirectional import BidirectionalSearch, InformedBidirectionalSearch, NBAStarSearch
+from .openlist import OPEN_LISTS, BinaryHeap, IndexedHeap, BucketQueue, make_open_list
+from .trace import SearchTrace, SearchCancelled, record
+from .jps import jump_point_search, jump_point_search_plus, JumpTable, jump_table
+from .incremental import DStarLite, d_star_lite
+from .landmarks import Landmarks, landmarks, landmark_heuristic, alt_a_star, alt_bidirectional_a_star
+from .hierarchical import HierarchicalMap, hierarchy, hpa_star
+from .bounded import MemoryLimitError, ida_star, fringe_search
+from .anytime import AnytimeResult, ara_star
+from .components import Components, components, reachable
+from .batch import batch_search
+from .fields import FlowField, flow_field, flow_field_search
+from .cache import PathCache, layout_hash, zobrist_key
+from .stats import SearchStats, CountingOpenList, write_json
+
+
+def bidirectional_search(grid_map, start, end, on_update=None):
+    """
+    blind bidirectional search that runs BFS from the start and goal node simultaneously
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :return: SearchResult object
+    """
+    return BidirectionalSearch(grid_map, start, end, on_update).search()
+
+
+def bidirectional_a_star_search(grid_map, start, end, on_update=None, open_list="binary", heuristic=None):
+    """
+    bidirectional A* search from the start and goal node simultaneously
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :param heuristic: optional symmetric function h(index, target index) replacing grid_map.heuristic
+    :return: SearchResult object
+    """
+    return InformedBidirectionalSearch(grid_map, start, end, on_update, open_list, heuristic).a_star_search()
+
+
+def bidirectional_greedy_search(grid_map, start, end, on_update=None, open_list="binary"):
+    """
+    bidirectional greedy best first search from the start and goal node simultaneously
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :return: SearchResult object
+    """
+    return InformedBidirectionalSearch(grid_map, start, end, on_update, open_list).greedy_search()
+
+
+def nba_star_search(grid_map, start, end, on_update=None, open_list="binary", heuristic=None):
+    """
+    NBA*, bidirectional A* search that keeps both sides running until no cheaper meeting node can be found
+    it guarantees the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :param heuristic: optional consistent and symmetric function h(index, target index) replacing grid_map.heuristic
+    :return: SearchResult object
+    """
+    return NBAStarSearch(grid_map, start, end, on_update, open_list, heuristic).search()
+
+
+# every algorithm of the engine by its short name
+ALGORITHMS = {
+    "dfs": depth_first_search,
+    "bfs": breadth_first_search,
+    "a_star": a_star,
+    "greedy": greedy_best_first,
+    "bidirectional": bidirectional_search,
+    "bidirectional_a_star": bidirectional_a_star_search,
+    "bidirectional_greedy": bidirectional_greedy_search,
+    "nba_star": nba_star_search,
+    "dijkstra": dijkstra,
+    "jps": jump_point_search,
+    "jps_plus": jump_point_search_plus,
+    "d_star_lite": d_star_lite,
+    "alt": alt_a_star,
+    "bidirectional_alt": alt_bidirectional_a_star,
+    "hpa_star": hpa_star,
+    "ida_star": ida_star,
+    "fringe": fringe_search,
+    "ara_star": ara_star,
+    "flow_field": flow_field_search,
+}
+
+
+def search(algorithm, grid_map, start, end, **kwargs):
+    """
+    runs an algorithm by its short name
+    :param algorithm: a key of ALGORITHMS
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param kwargs: extra keyword arguments forwarded to the algorithm
+    :return: SearchResult object
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError("unknown algorithm '{}', expected one of {}".format(algorithm, ", ".join(ALGORITHMS)))
+
+    return ALGORITHMS[algorithm](grid_map, start, end, **kwargs)
@@ -0,0 +1,150 @@
+"""
+Anytime search with ARA* (Anytime Repairing A*)
+A weighted A* with f(x) = g(x) + w * h(x) finds a first path quickly, its cost is at most w times the optimal one
+The weight is then lowered step by step while time remains; every new search reuses the g scores of the previous one
+and only expands the cells whose g score went down, so each improvement costs far less than a search from scratch
+"""
+import time
+
+from .grid import OPEN, CLOSED
+from .openlist import make_open_list
+from .search import SearchResult, reconstruct_path
+
+INITIAL_WEIGHT = 3.0  # default weight of the heuristic in the first search
+WEIGHT_STEP = 0.5  # default decrease of the weight after every path
+
+
+class AnytimeResult(SearchResult):
+    """
+    the outcome of an anytime search, the best path found before the deadline
+    ------------------------------------
+    data fields
+    ------------------------------------
+    all the SearchResult fields
+    bound: suboptimality bound of the path, its cost is at most bound times the optimal cost, 1 if it is optimal
+    solutions: list of (seconds since the start, cost, bound) of every improving path
+    """
+
+    def __init__(self, found=False, path=None, cost=None, expanded=0, max_open=0, bound=None, solutions=None):
+        super().__init__(found, path, cost, expanded, max_open)
+        self.bound = bound
+        self.solutions = solutions if solutions is not None else []
+
+    def __repr__(self):
+        return "AnytimeResult(found={}, cost={}, bound={}, expanded={})".format(self.found, self.cost, self.bound,
+                                                                                self.expanded)
+
+
+def ara_star(grid_map, start, end, on_update=None, open_list="binary", deadline=None, weight=INITIAL_WEIGHT,
+             step=WEIGHT_STEP, on_solution=None):
+    """
+    ARA*, weighted A* searches with a decreasing weight until the path is optimal or the deadline passes
+    the first path is always completed, the deadline only cuts the improvements
+    a search that improves the path is a plain A* once the weight reaches 1, so it guarantees the shortest path
+    when there is no deadline
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS except the bucket queue
+                      as the weighted priorities are fractional
+    :param deadline: time budget in seconds, None to keep improving the path until it is optimal
+    :param weight: weight of the heuristic in the first search, at least 1
+    :param step: decrease of the weight after every path
+    :param on_solution: optional function called as on_solution(result) with an AnytimeResult for every improving
+                        path, as soon as it is found
+    :return: AnytimeResult object
+    """
+    if weight < 1 or step <= 0:
+        raise ValueError("the weight must be at least 1 and the step positive, got {} and {}".format(weight, step))
+    if open_list == "bucket":
+        raise ValueError("ARA* needs real-valued inflated keys, the bucket open list only takes integer priorities")
+
+    begin = time.perf_counter()
+    stop_time = begin + deadline if deadline is not None else float("inf")
+    start = grid_map.index(start)
+    end = grid_map.index(end)
+    heuristic = grid_map.heuristic
+    edges = grid_map.edges
+    inf = float("inf")
+    g_score = [inf] * grid_map.size
+    g_score[start] = 0
+    path_dict = [-1] * grid_map.size
+    closed = bytearray(grid_map.size)
+    open_set = {start}
+    incons = set()  # cells whose g score went down after they were closed, they are opened again by the next search
+    expanded = 0
+    max_open = 0
+    solutions = []
+    result = None
+
+    heap = make_open_list(open_list, False)
+    heap.push(start, weight * heuristic(start, end))
+    while True:
+        # improve the path: expand until no open cell can lead to a path cheaper than the goal's g score
+        timed_out = False
+        while heap:
+            if result is not None and time.perf_counter() > stop_time:
+                timed_out = True
+                break
+            if len(heap) > max_open:
+                max_open = len(heap)
+            priority, current = heap.pop()
+            if current not in open_set:
+                continue  # stale entry of a cell that was already expanded
+            if g_score[end] <= priority:
+                heap.push(current, priority)
+                break
+
+            open_set.discard(current)
+            closed[current] = 1
+            expanded += 1
+            current_g_score = g_score[current]
+            for neighbour, cost in edges(current):
+                temp_g_score = current_g_score + cost
+                if temp_g_score >= g_score[neighbour]:
+                    continue
+                g_score[neighbour] = temp_g_score
+                path_dict[neighbour] = current
+                if closed[neighbour]:
+                    incons.add(neighbour)
+                else:
+                    open_set.add(neighbour)
+                    heap.push(neighbour, temp_g_score + weight * heuristic(neighbour, end))
+                    if on_update:
+                        on_update(neighbour, OPEN)
+
+            if on_update:
+                on_update(current, CLOSED)
+
+        if g_score[end] == inf:
+            return AnytimeResult(False, expanded=expanded, max_open=max_open)
+
+        path = reconstruct_path(path_dict, start, end)
+        if timed_out:
+            # the interrupted search may have shortened the path already but only the last bound is proven
+            bound = result.bound
+        else:
+            # every path to the goal crosses a cell that is open or inconsistent
+            lower = min((g_score[i] + heuristic(i, end) for i in open_set | incons), default=inf)
+            bound = max(min(weight, g_score[end] / lower), 1.0) if 0 < lower < inf else 1.0
+        cost = grid_map.path_cost(path)
+        if result is None or cost < result.cost or bound < result.bound:
+            solutions.append((time.perf_counter() - begin, cost, bound))
+            result = AnytimeResult(True, [grid_map.pos(i) for i in path], cost, expanded, max_open, bound, solutions)
+            if on_solution:
+                on_solution(result)
+        result.expanded = expanded
+        result.max_open = max_open
+
+        if timed_out or bound <= 1 or time.perf_counter() > stop_time:
+            return result
+
+        # the next search with a lower weight starts from the open and inconsistent cells
+        weight = max(weight - step, 1.0)
+        open_set |= incons
+        incons.clear()
+        closed = bytearray(grid_map.size)
+        heap = make_open_list(open_list, False)
+        for i in open_set:
+            heap.push(i, g_score[i] + weight * heuristic(i, end))
@@ -0,0 +1,97 @@
+"""
+Batch queries, many (start, goal) pairs searched on one map
+The cells of the map are copied once into a shared memory block and every worker process of the pool reads them in
+place through a GridMap of its own, so the map is neither pickled per query nor copied per worker; the tables an
+algorithm caches per GridMap (jump tables, landmarks, cluster entrances) are built once per worker and reused by all
+of its queries
+"""
+import os
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+from .grid import GridMap
+
+CHUNKS_PER_PROCESS = 4  # the queries are cut into this many chunks per process to balance the load
+
+# the shared memory block and the GridMap reading it in a worker process, set by attach()
+_shared = None
+_grid_map = None
+
+
+def shared_grid_map(buffer, rows, cols, connectivity):
+    """
+    :param buffer: a writable buffer of rows * cols state bytes
+    :param rows: number of rows
+    :param cols: number of columns
+    :param connectivity: 4 or 8
+    :return: a GridMap whose cells are a view of the buffer, without a copy
+    """
+    grid_map = GridMap(rows, cols, connectivity)
+    grid_map.cells = memoryview(buffer)[:grid_map.size]
+    return grid_map
+
+
+def attach(name, rows, cols, connectivity):
+    """
+    the initializer of a worker process, it opens the shared cells of the map
+    :param name: name of the SharedMemory block
+    :param rows: number of rows
+    :param cols: number of columns
+    :param connectivity: 4 or 8
+    :return: None
+    """
+    global _shared, _grid_map
+    _shared = SharedMemory(name)
+    _grid_map = shared_grid_map(_shared.buf, rows, cols, connectivity)
+
+
+def run_queries(task):
+    """
+    runs a chunk of queries in a worker process
+    :param task: (algorithm name, list of (start, goal) pairs, keyword arguments of the algorithm)
+    :return: list of SearchResult objects in the order of the queries
+    """
+    from . import ALGORITHMS
+
+    algorithm, queries, kwargs = task
+    search = ALGORITHMS[algorithm]
+    return [search(_grid_map, start, end, **kwargs) for start, end in queries]
+
+
+def batch_search(algorithm, grid_map, queries, processes=None, **kwargs):
+    """
+    runs one algorithm on many queries of the same map
+    with more than one process the queries are cut into chunks and fanned out to a process pool sharing the cells
+    of the map; with one process they run in order in the current process on the map itself
+    :param algorithm: a key of engine.ALGORITHMS, the name is sent to the workers instead of the function
+    :param grid_map: the GridMap to search, it must not change until the batch returns
+    :param queries: list of ((row, col) start, (row, col) goal) pairs
+    :param processes: number of worker processes, None for one per CPU
+    :param kwargs: extra keyword arguments forwarded to the algorithm, they must be picklable
+    :return: list of SearchResult objects in the order of the queries
+    """
+    from . import ALGORITHMS
+
+    if algorithm not in ALGORITHMS:
+        raise ValueError("unknown algorithm '{}', expected one of {}".format(algorithm, ", ".join(ALGORITHMS)))
+
+    queries = list(queries)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(min(processes, len(queries)), 1)
+    if processes == 1:
+        search = ALGORITHMS[algorithm]
+        return [search(grid_map, start, end, **kwargs) for start, end in queries]
+
+    chunk = -(-len(queries) // (processes * CHUNKS_PER_PROCESS))
+    tasks = [(algorithm, queries[first:first + chunk], kwargs) for first in range(0, len(queries), chunk)]
+    shared = SharedMemory(create=True, size=grid_map.size)
+    try:
+        shared.buf[:grid_map.size] = grid_map.cells
+        with Pool(processes, attach, (shared.name, grid_map.rows, grid_map.cols, grid_map.connectivity)) as pool:
+            chunks = pool.map(run_queries, tasks, chunksize=1)
+    finally:
+        shared.close()
+        shared.unlink()
+
+    return [result for results in chunks for result in results]
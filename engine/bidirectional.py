@@ -0,0 +1,463 @@
+"""
+Headless implementations of the informed and uninformed bidirectional searches
+It acts as an auxiliary module for the following functions in engine/__init__.py:
+    bidirectional_search()
+    bidirectional_a_star_search()
+    bidirectional_greedy_search()
+    nba_star_search()
+"""
+from collections import deque
+
+from .grid import OPEN, CLOSED
+from .openlist import make_open_list
+from .search import make_result
+
+# path costs closer than this are equal, the float sums of diagonal moves in a different order differ in the last bits
+COST_TOLERANCE = 1e-9
+
+
+class BidirectionalSearch:
+    """
+    a class to implement Blind Bidirectional Search By BFS algorithm
+    ------------------------------------
+    data fields
+    ------------------------------------
+    grid_map: the GridMap to search
+    start: the starting node index
+    end: the ending node index
+    f_queue: queue for the forward search that is searching from start
+    b_queue: queue for the backward search that is searching from the goal
+    f_opened: bytearray flagging every node opened by the forward search
+    b_opened: bytearray flagging every node opened by the backward search
+    f_path_dict: forward parent of every opened node
+    b_path_dict: backward parent of every opened node
+    on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    expanded: number of expanded nodes in both directions
+    max_open: peak size of both queues together
+    intersection: the first node opened by both searches, None until the two searches meet
+    -----------------------------------
+    methods
+    -----------------------------------
+    is_intersecting: check if the two search path intersected or not
+    helper_algo: a helper that does parts of the BFS algorithm
+    build_path: joins the forward and backward paths at the collision node
+    search: the actual BFS algorithm
+    """
+
+    def __init__(self, grid_map, start, end, on_update=None):
+        self.grid_map = grid_map
+        self.start = grid_map.index(start)
+        self.end = grid_map.index(end)
+        self.f_queue = deque([self.start])
+        self.b_queue = deque([self.end])
+        self.f_opened = bytearray(grid_map.size)
+        self.f_opened[self.start] = 1
+        self.b_opened = bytearray(grid_map.size)
+        self.b_opened[self.end] = 1
+        self.f_path_dict = [-1] * grid_map.size
+        self.b_path_dict = [-1] * grid_map.size
+        self.on_update = on_update
+        self.expanded = 0
+        self.max_open = 0
+        self.intersection = None
+
+    def is_intersecting(self):
+        """
+        checks if the forward and backward path collided or not
+        the collision is recorded by helper_algo() the moment a node is opened by the second search
+        :return: the collision node if collision occurs else None
+        """
+        return self.intersection
+
+    def helper_algo(self, direction='forward'):
+        """
+        performs dequeue and neighbour search operation of BFS for both the backward and forward search
+        :param direction: String used to the forward or backward BFS
+        :return: None
+        """
+        if direction == 'forward':
+            queue, opened, path_dict, other_opened = self.f_queue, self.f_opened, self.f_path_dict, self.b_opened
+        else:
+            queue, opened, path_dict, other_opened = self.b_queue, self.b_opened, self.b_path_dict, self.f_opened
+
+        current = queue.popleft()
+        self.expanded += 1
+        for neighbour in self.grid_map.neighbours(current):
+            if opened[neighbour]:
+                continue
+            path_dict[neighbour] = current
+            queue.append(neighbour)
+            opened[neighbour] = 1
+            if self.on_update:
+                self.on_update(neighbour, OPEN)
+            if other_opened[neighbour]:  # the two frontiers touched
+                self.intersection = neighbour
+                break
+
+        if self.on_update:
+            self.on_update(current, CLOSED)
+
+    def build_path(self, intersection):
+        """
+        joins the forward and backward search trees at the collision node
+        :param intersection: the collision node of backward and forward search
+        :return: list of indices from start to end
+        """
+        return join_paths(self.f_path_dict, self.b_path_dict, self.start, self.end, intersection)
+
+    def search(self):
+        """
+        The actual BFS algorithm will be called from object to perform bidirectional search
+        :return: SearchResult object
+        """
+        if self.start == self.end:
+            return make_result(self.grid_map, [self.start], 0)
+
+        while self.f_queue and self.b_queue:
+            if len(self.f_queue) + len(self.b_queue) > self.max_open:
+                self.max_open = len(self.f_queue) + len(self.b_queue)
+            self.helper_algo('forward')
+            if self.intersection is None and self.b_queue:
+                self.helper_algo('backward')
+
+            intersect = self.is_intersecting()
+            if intersect is not None:
+                return make_result(self.grid_map, self.build_path(intersect), self.expanded, self.max_open)
+
+        return make_result(self.grid_map, None, self.expanded, self.max_open)
+
+
+class InformedBidirectionalSearch:
+    """
+    A class that implements bidirectional greedy and bidirectional A* search
+    ----------------
+    data fields
+    ----------------
+    all the fwd preceded data members are for forward direction search that begins from start node
+    all the bkwd preceded data members are for backward direction search that begins from the goal node
+    heuristic: function h(index, target index), grid_map.heuristic unless another one is given
+    expanded: number of expanded nodes in both directions
+    max_open: peak size of both queues together
+    intersection: the first node opened by both searches, None until the two searches meet
+    ----------------
+    methods
+    ----------------
+    is_intersecting: check if the two search path intersected or not
+    build_path: joins the forward and backward paths at the collision node
+    a_star_helper_algo: it performs each iteration operations for A*. It performs for both forward and backward search
+    a_star_search: the actual A* search method that is meant to be called through objects
+    greedy_helper_algo: it performs each iteration tasks for greedy, Applicable for both backward and forward search
+    greedy_search: the actual greedy search method that is meant to be called through objects
+    """
+
+    def __init__(self, grid_map, start, end, on_update=None, open_list="binary", heuristic=None):
+        self.grid_map = grid_map
+        self.start = grid_map.index(start)
+        self.end = grid_map.index(end)
+        self.on_update = on_update
+        self.heuristic = grid_map.heuristic if heuristic is None else heuristic
+        self.expanded = 0
+        self.max_open = 0
+        self.intersection = None
+
+        self.fwd_heap = make_open_list(open_list, grid_map.connectivity == 4)
+        self.fwd_heap.push(self.start, 0)
+        self.bkwd_heap = make_open_list(open_list, grid_map.connectivity == 4)
+        self.bkwd_heap.push(self.end, 0)
+
+        self.fwd_opened = bytearray(grid_map.size)
+        self.fwd_opened[self.start] = 1
+        self.bkwd_opened = bytearray(grid_map.size)
+        self.bkwd_opened[self.end] = 1
+        self.fwd_path_dict = [-1] * grid_map.size
+        self.bkwd_path_dict = [-1] * grid_map.size
+
+        # the g scores are only read for opened nodes so they need no infinity initialisation
+        self.fwd_g_score = [0] * grid_map.size
+        self.bkwd_g_score = [0] * grid_map.size
+
+    def is_intersecting(self):
+        """
+        checks if the forward and backward path collided or not
+        the collision is recorded by the helper methods the moment a node is opened by the second search
+        :return: the collision node if collision occurs else None
+        """
+        return self.intersection
+
+    def build_path(self, intersection):
+        """
+        joins the forward and backward search trees at the collision node
+        :param intersection: the collision node of backward and forward search
+        :return: list of indices from start to end
+        """
+        return join_paths(self.fwd_path_dict, self.bkwd_path_dict, self.start, self.end, intersection)
+
+    def a_star_helper_algo(self, direction="forward"):
+        """
+        helper method for A* search
+        :param direction: String determining the direction of search
+        :return: None
+        """
+        if direction == "forward":
+            heap, opened, path_dict, target = self.fwd_heap, self.fwd_opened, self.fwd_path_dict, self.end
+            g_score, other_opened = self.fwd_g_score, self.bkwd_opened
+        else:
+            heap, opened, path_dict, target = self.bkwd_heap, self.bkwd_opened, self.bkwd_path_dict, self.start
+            g_score, other_opened = self.bkwd_g_score, self.fwd_opened
+
+        current = heap.pop()[1]
+        self.expanded += 1
+        for neighbour, cost in self.grid_map.edges(current):
+            if opened[neighbour]:
+                continue
+            path_dict[neighbour] = current
+            temp_g_score = g_score[current] + cost
+            g_score[neighbour] = temp_g_score
+            heap.push(neighbour, temp_g_score + self.heuristic(neighbour, target))
+            opened[neighbour] = 1
+            if self.on_update:
+                self.on_update(neighbour, OPEN)
+            if other_opened[neighbour]:  # the two frontiers touched
+                self.intersection = neighbour
+                break
+
+        if self.on_update:
+            self.on_update(current, CLOSED)
+
+    def greedy_helper_algo(self, direction="forward"):
+        """
+        helper function for greedy best first search
+        :param direction: String determines the direction of search
+        :return: None
+        """
+        if direction == "forward":
+            heap, opened, path_dict, target = self.fwd_heap, self.fwd_opened, self.fwd_path_dict, self.end
+            other_opened = self.bkwd_opened
+        else:
+            heap, opened, path_dict, target = self.bkwd_heap, self.bkwd_opened, self.bkwd_path_dict, self.start
+            other_opened = self.fwd_opened
+
+        current = heap.pop()[1]
+        self.expanded += 1
+        for neighbour in self.grid_map.neighbours(current):
+            if opened[neighbour]:
+                continue
+            path_dict[neighbour] = current
+            heap.push(neighbour, self.heuristic(neighbour, target))
+            opened[neighbour] = 1
+            if self.on_update:
+                self.on_update(neighbour, OPEN)
+            if other_opened[neighbour]:  # the two frontiers touched
+                self.intersection = neighbour
+                break
+
+        if self.on_update:
+            self.on_update(current, CLOSED)
+
+    def run(self, helper):
+        """
+        alternates the helper between both directions until the two searches collide
+        :param helper: a_star_helper_algo or greedy_helper_algo
+        :return: SearchResult object
+        """
+        if self.start == self.end:
+            return make_result(self.grid_map, [self.start], 0)
+
+        while self.bkwd_heap and self.fwd_heap:
+            if len(self.fwd_heap) + len(self.bkwd_heap) > self.max_open:
+                self.max_open = len(self.fwd_heap) + len(self.bkwd_heap)
+            helper("forward")
+            if self.intersection is None and self.bkwd_heap:
+                helper("backward")
+
+            intersect = self.is_intersecting()
+            if intersect is not None:
+                return make_result(self.grid_map, self.build_path(intersect), self.expanded, self.max_open)
+
+        return make_result(self.grid_map, None, self.expanded, self.max_open)
+
+    def a_star_search(self):
+        """
+        method to perform bidirectional A* search
+        :return: SearchResult object
+        """
+        return self.run(self.a_star_helper_algo)
+
+    def greedy_search(self):
+        """
+        method to perform bidirectional greedy best first search
+        :return: SearchResult object
+        """
+        return self.run(self.greedy_helper_algo)
+
+
+class NBAStarSearch:
+    """
+    A class that implements NBA*, the New Bidirectional A* of Pijls and Post
+    both searches keep going after the frontiers meet and record the cheapest meeting node seen so far
+    a popped node is rejected without being expanded when no path through it can be cheaper than that meeting:
+    g(x) + h(x, target) >= best or g(x) + f_other - h(x, source) >= best, f_other being the lowest f score of the
+    other search; the search stops when either open list runs out and the best meeting is the shortest path
+    the side with the smaller open list is expanded at every step
+    ----------------
+    data fields
+    ----------------
+    all the fwd preceded data members are for forward direction search that begins from start node
+    all the bkwd preceded data members are for backward direction search that begins from the goal node
+    fwd_f, bkwd_f: f score of the last node popped by each side, a lower bound of its open list
+    tie_break: False for the bucket queue, which cannot order equal f scores by g score
+    closed: bytearray flagging every node expanded or rejected by either side, they are never opened again
+    heuristic: consistent function h(index, target index), grid_map.heuristic unless another one is given
+    best: cost of the cheapest path found so far through a node opened by both sides
+    meeting: the node of that path, None until the two searches meet
+    expanded: number of expanded nodes in both directions, rejected nodes excluded
+    max_open: peak size of both open lists together
+    ----------------
+    methods
+    ----------------
+    priority: the open list priority of a node
+    helper_algo: pops one node of one side and rejects or expands it
+    build_path: joins the forward and backward paths at the meeting node
+    search: the actual NBA* search method that is meant to be called through objects
+    """
+
+    def __init__(self, grid_map, start, end, on_update=None, open_list="binary", heuristic=None):
+        self.grid_map = grid_map
+        self.start = grid_map.index(start)
+        self.end = grid_map.index(end)
+        self.on_update = on_update
+        self.heuristic = grid_map.heuristic if heuristic is None else heuristic
+        self.expanded = 0
+        self.max_open = 0
+        self.best = float("inf")
+        self.meeting = None
+
+        self.tie_break = open_list != "bucket"
+        self.fwd_heap = make_open_list(open_list, grid_map.connectivity == 4)
+        self.bkwd_heap = make_open_list(open_list, grid_map.connectivity == 4)
+        self.fwd_f = self.bkwd_f = self.heuristic(self.start, self.end)
+        self.fwd_heap.push(self.start, self.priority(self.fwd_f, 0))
+        self.bkwd_heap.push(self.end, self.priority(self.bkwd_f, 0))
+
+        inf = float("inf")
+        self.fwd_g_score = [inf] * grid_map.size
+        self.fwd_g_score[self.start] = 0
+        self.bkwd_g_score = [inf] * grid_map.size
+        self.bkwd_g_score[self.end] = 0
+        self.fwd_path_dict = [-1] * grid_map.size
+        self.bkwd_path_dict = [-1] * grid_map.size
+        self.closed = bytearray(grid_map.size)
+
+    def priority(self, f_score, g_score):
+        """
+        the open list priority of a node
+        among equal f scores the node with the highest g score goes first, so each side heads for its target instead
+        of filling the whole plateau of equal f scores; the f scores are rounded for the float sums of diagonal moves
+        to tie; the bucket queue only takes integers and keeps its FIFO order
+        :param f_score: g score + heuristic
+        :param g_score: path cost from the source of the side
+        :return: f_score for the bucket queue, (f_score, -g_score) for the heaps
+        """
+        if not self.tie_break:
+            return f_score
+        return round(f_score / COST_TOLERANCE) * COST_TOLERANCE, -g_score
+
+    def build_path(self, meeting):
+        """
+        joins the forward and backward search trees at the meeting node
+        :param meeting: the node of the best path
+        :return: list of indices from start to end
+        """
+        return join_paths(self.fwd_path_dict, self.bkwd_path_dict, self.start, self.end, meeting)
+
+    def helper_algo(self, direction="forward"):
+        """
+        pops the next node of one side, rejects it if it cannot be on a cheaper path and expands it otherwise
+        :param direction: String determining the direction of search
+        :return: None
+        """
+        if direction == "forward":
+            heap, path_dict, target, source = self.fwd_heap, self.fwd_path_dict, self.end, self.start
+            g_score, other_g_score, other_f = self.fwd_g_score, self.bkwd_g_score, self.bkwd_f
+        else:
+            heap, path_dict, target, source = self.bkwd_heap, self.bkwd_path_dict, self.start, self.end
+            g_score, other_g_score, other_f = self.bkwd_g_score, self.fwd_g_score, self.fwd_f
+
+        priority, current = heap.pop()
+        if self.closed[current]:
+            return  # stale entry of a node that was already expanded or rejected
+        self.closed[current] = 1
+        f_score = priority[0] if self.tie_break else priority
+        if direction == "forward":
+            self.fwd_f = f_score
+        else:
+            self.bkwd_f = f_score
+
+        heuristic = self.heuristic
+        current_g_score = g_score[current]
+        bound = self.best - COST_TOLERANCE  # the paths that are not cheaper than the best meeting are pruned
+        if f_score < bound and current_g_score + other_f - heuristic(current, source) < bound:
+            self.expanded += 1
+            for neighbour, cost in self.grid_map.edges(current):
+                if self.closed[neighbour]:
+                    continue
+                temp_g_score = current_g_score + cost
+                if temp_g_score >= g_score[neighbour]:
+                    continue
+                path_dict[neighbour] = current
+                g_score[neighbour] = temp_g_score
+                heap.push(neighbour, self.priority(temp_g_score + heuristic(neighbour, target), temp_g_score))
+                if self.on_update:
+                    self.on_update(neighbour, OPEN)
+                if temp_g_score + other_g_score[neighbour] < self.best:  # a cheaper meeting of the two searches
+                    self.best = temp_g_score + other_g_score[neighbour]
+                    self.meeting = neighbour
+
+        if self.on_update:
+            self.on_update(current, CLOSED)
+
+    def search(self):
+        """
+        method to perform NBA* search
+        :return: SearchResult object
+        """
+        if self.start == self.end:
+            return make_result(self.grid_map, [self.start], 0)
+
+        while True:
+            fwd_size = len(self.fwd_heap)
+            bkwd_size = len(self.bkwd_heap)
+            if not fwd_size or not bkwd_size:
+                break
+            if fwd_size + bkwd_size > self.max_open:
+                self.max_open = fwd_size + bkwd_size
+            self.helper_algo("forward" if fwd_size <= bkwd_size else "backward")
+
+        if self.meeting is None:
+            return make_result(self.grid_map, None, self.expanded, self.max_open)
+
+        return make_result(self.grid_map, self.build_path(self.meeting), self.expanded, self.max_open)
+
+
+def join_paths(f_path_dict, b_path_dict, start, end, intersection):
+    """
+    builds the full path through the collision node of a bidirectional search
+    :param f_path_dict: parent index of every node opened by the forward search
+    :param b_path_dict: parent index of every node opened by the backward search
+    :param start: start index
+    :param end: goal index
+    :param intersection: the collision node index
+    :return: list of indices from start to end
+    """
+    path = [intersection]
+    i = intersection
+    while i != start:
+        i = f_path_dict[i]
+        path.append(i)
+    path = path[::-1]
+    i = intersection
+    while i != end:
+        i = b_path_dict[i]
+        path.append(i)
+
+    return path
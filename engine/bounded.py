@@ -0,0 +1,169 @@
+"""
+Memory bounded searches for grids too large for the per cell arrays of A*
+IDA* only keeps the current path and a best-effort transposition table: the table stops taking new cells once the
+path and the table hold table_limit entries, which keeps the search correct but slower, and MemoryLimitError is
+raised when the path alone would go past table_limit cells. Fringe Search keeps the visited cells in a table as well
+but no per cell array; it raises MemoryLimitError instead of growing past table_limit entries
+"""
+from collections import deque
+
+from .grid import OPEN, CLOSED
+from .search import make_result
+from .bidirectional import COST_TOLERANCE
+
+TABLE_LIMIT = 1 << 20  # default number of entries a search may store
+
+
+class MemoryLimitError(MemoryError):
+    """
+    raised by a search that would need more than its table_limit entries to go on
+    """
+
+
+def ida_star(grid_map, start, end, on_update=None, table_limit=TABLE_LIMIT):
+    """
+    Iterative Deepening A*
+    depth first searches bounded by an f score threshold, every new iteration raises the threshold to the lowest
+    f score that went past it; the transposition table holds the lowest g score every cell was reached with during
+    the iteration so the other paths to a cell are cut; the table is best-effort, it stops taking new cells once the
+    path and the table fill table_limit entries, but the path itself cannot be cut short
+    the threshold grows by tiny steps with diagonal moves so it is much slower on 8 connected grids
+    it guarantees the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param table_limit: maximum number of cells stored by the path and the transposition table together
+    :raises MemoryLimitError: if the path needs more than table_limit cells
+    :return: SearchResult object, max_open is the deepest path
+    """
+    start = grid_map.index(start)
+    end = grid_map.index(end)
+    heuristic = grid_map.heuristic
+    edges = grid_map.edges
+    inf = float("inf")
+    expanded = 0
+    max_open = 0
+    if start == end:
+        return make_result(grid_map, [start], expanded)
+
+    threshold = heuristic(start, end)
+    while True:
+        table = {start: 0}
+        path = [start]
+        costs = [0]
+        on_path = {start}
+        iterators = [iter(edges(start))]
+        minimum = inf  # the lowest f score past the threshold, the threshold of the next iteration
+        while iterators:
+            step = next(iterators[-1], None)
+            if step is None:  # every neighbour of the last cell of the path was tried
+                iterators.pop()
+                costs.pop()
+                on_path.discard(path[-1])
+                if on_update:
+                    on_update(path[-1], CLOSED)
+                path.pop()
+                continue
+
+            neighbour, cost = step
+            g_score = costs[-1] + cost
+            f_score = g_score + heuristic(neighbour, end)
+            if f_score > threshold + COST_TOLERANCE:
+                if f_score < minimum:
+                    minimum = f_score
+                continue
+            if neighbour in on_path or g_score >= table.get(neighbour, inf):
+                continue
+            if neighbour == end:
+                return make_result(grid_map, path + [end], expanded, max_open)
+
+            if len(path) >= table_limit:
+                raise MemoryLimitError("IDA* needs a path longer than {} cells".format(table_limit))
+            if neighbour in table or len(table) + len(path) < table_limit:
+                table[neighbour] = g_score
+            path.append(neighbour)
+            costs.append(g_score)
+            on_path.add(neighbour)
+            iterators.append(iter(edges(neighbour)))
+            expanded += 1
+            if len(path) > max_open:
+                max_open = len(path)
+            if on_update:
+                on_update(neighbour, OPEN)
+
+        if minimum == inf:  # nothing went past the threshold, every reachable cell was searched
+            return make_result(grid_map, None, expanded, max_open)
+        threshold = minimum
+
+
+def fringe_search(grid_map, start, end, on_update=None, table_limit=TABLE_LIMIT):
+    """
+    Fringe Search
+    like IDA* it visits the cells under an f score threshold depth first and raises the threshold, but the cells past
+    the threshold are kept in the later list and the next iteration starts from them instead of from the start,
+    so no cell is searched twice; the g score and parent of every visited cell are kept in a table
+    the table and the two lists may hold at most table_limit entries together
+    it guarantees the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param table_limit: maximum number of entries of the table and both lists together
+    :raises MemoryLimitError: if the search needs more than table_limit entries
+    :return: SearchResult object
+    """
+    start = grid_map.index(start)
+    end = grid_map.index(end)
+    heuristic = grid_map.heuristic
+    edges = grid_map.edges
+    inf = float("inf")
+    expanded = 0
+    max_open = 0
+
+    cache = {start: (0, -1)}  # (g score, parent) of every visited cell
+    # (cell, g score) entries of the current iteration and of the next one, the cells past the threshold;
+    # an entry is stale if its g score is not the one in the cache
+    now = deque([(start, 0)])
+    later = deque()
+    threshold = heuristic(start, end)
+    while now:
+        minimum = inf
+        while now:
+            if len(now) + len(later) > max_open:
+                max_open = len(now) + len(later)
+            current, g_score = now.popleft()
+            if cache[current][0] != g_score:
+                continue  # stale entry of a cell that was reached again with a lower g score
+
+            f_score = g_score + heuristic(current, end)
+            if f_score > threshold + COST_TOLERANCE:
+                later.append((current, g_score))
+                if f_score < minimum:
+                    minimum = f_score
+                continue
+            if current == end:
+                path = [end]
+                while path[-1] != start:
+                    path.append(cache[path[-1]][1])
+                return make_result(grid_map, path[::-1], expanded, max_open)
+
+            expanded += 1
+            for neighbour, cost in reversed(edges(current)):
+                temp_g_score = g_score + cost
+                if temp_g_score >= cache.get(neighbour, (inf,))[0]:
+                    continue
+                if len(cache) + len(now) + len(later) >= table_limit:
+                    raise MemoryLimitError("fringe search needs more than {} entries".format(table_limit))
+                cache[neighbour] = (temp_g_score, current)
+                now.appendleft((neighbour, temp_g_score))  # searched right after the current cell, depth first
+                if on_update:
+                    on_update(neighbour, OPEN)
+
+            if on_update:
+                on_update(current, CLOSED)
+
+        now, later = later, now
+        threshold = minimum
+
+    return make_result(grid_map, None, expanded, max_open)
@@ -0,0 +1,128 @@
+"""
+Caching of finished searches by the wall layout they ran on
+The layout is identified by a Zobrist hash: every cell has a fixed random 64 bit key and the hash of a layout is the
+xor of the keys of its walls, so painting or erasing one wall updates the hash with a single xor
+The recorded SearchTrace of a query is kept in a PathCache under the algorithm, the layout hash and the query, the
+least recently used traces are dropped once the cache holds too many traces or events
+"""
+from collections import OrderedDict
+
+from .grid import WALL, numpy
+
+ZOBRIST_SEED = 0x9E3779B97F4A7C15  # any 64 bit odd number, it only has to stay the same between runs
+MASK = (1 << 64) - 1
+CACHE_ENTRIES = 64  # default maximum number of cached traces
+CACHE_EVENTS = 1 << 22  # default maximum number of events of all the cached traces together, about 20 MB
+
+
+def zobrist_key(index):
+    """
+    the random key of a cell, computed with the splitmix64 mixer so no table of keys is stored
+    :param index: flat index of the cell
+    :return: 64 bit integer
+    """
+    key = (index * ZOBRIST_SEED + ZOBRIST_SEED) & MASK
+    key = ((key ^ (key >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    key = ((key ^ (key >> 27)) * 0x94D049BB133111EB) & MASK
+    return key ^ (key >> 31)
+
+
+def layout_hash(grid_map):
+    """
+    computes the Zobrist hash of the walls of a grid from scratch, vectorized with numpy when it is installed
+    :param grid_map: the GridMap
+    :return: 64 bit integer, 0 for a grid without walls
+    """
+    if numpy is None:
+        result = 0
+        for index, state in enumerate(grid_map.cells):
+            if state == WALL:
+                result ^= zobrist_key(index)
+        return result
+
+    seed = numpy.uint64(ZOBRIST_SEED)
+    with numpy.errstate(over="ignore"):
+        key = numpy.flatnonzero(grid_map.as_array() == WALL).astype(numpy.uint64) * seed + seed
+        key = (key ^ (key >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+        key = (key ^ (key >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+        key ^= key >> numpy.uint64(31)
+    return int(numpy.bitwise_xor.reduce(key)) if len(key) else 0
+
+
+class PathCache:
+    """
+    a least recently used cache of recorded searches
+    ------------------------------------
+    data fields
+    ------------------------------------
+    max_entries: maximum number of cached traces
+    max_events: maximum number of events of all the cached traces together, a longer trace is never cached
+    traces: OrderedDict of every cached SearchTrace by its key, the least recently used first
+    events: number of events of all the cached traces
+    hits: number of get() calls that found their trace
+    misses: number of get() calls that did not
+    ------------------------------------
+    methods
+    ------------------------------------
+    key: the key of a query on a wall layout
+    get: returns the trace of a key and marks it as the most recently used
+    put: caches a finished trace and drops the least recently used ones that don't fit anymore
+    clear: drops every trace
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES, max_events=CACHE_EVENTS):
+        self.max_entries = max_entries
+        self.max_events = max_events
+        self.traces = OrderedDict()
+        self.events = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.traces)
+
+    @staticmethod
+    def key(algorithm, grid_map, layout, start, end):
+        """
+        :param algorithm: name of the algorithm
+        :param grid_map: the GridMap searched
+        :param layout: Zobrist hash of its walls, see layout_hash()
+        :param start: (row, col) of the starting node
+        :param end: (row, col) of the goal node
+        :return: hashable key of the query
+        """
+        return algorithm, grid_map.rows, grid_map.cols, grid_map.connectivity, layout, tuple(start), tuple(end)
+
+    def get(self, key):
+        """
+        :param key: key of the query
+        :return: the cached SearchTrace, None if there is none
+        """
+        trace = self.traces.get(key)
+        if trace is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.traces.move_to_end(key)
+        return trace
+
+    def put(self, key, trace):
+        """
+        caches a trace, unfinished and cancelled traces are ignored
+        :param key: key of the query
+        :param trace: SearchTrace of the search
+        :return: None
+        """
+        if not trace.finished or len(trace) > self.max_events:
+            return
+        if key in self.traces:
+            self.events -= len(self.traces.pop(key))
+        self.traces[key] = trace
+        self.events += len(trace)
+        while len(self.traces) > self.max_entries or self.events > self.max_events:
+            _, dropped = self.traces.popitem(last=False)
+            self.events -= len(dropped)
+
+    def clear(self):
+        self.traces.clear()
+        self.events = 0
@@ -0,0 +1,252 @@
+"""
+Connected components of the free cells, to reject the queries without a path before any search starts
+A diagonal move is only allowed when both orthogonal cells beside it are free, so two cells are connected with 8
+connected moves exactly when they are connected with 4 connected moves and the components do not depend on the
+connectivity of the grid
+Every free cell holds a label and the labels are merged in a union-find, so erasing a wall joins the components
+around it in almost O(1); painting a wall can split a component, only the cells cut off from the rest are relabelled
+"""
+import re
+import weakref
+from collections import deque
+
+from .grid import WALL
+
+COMPONENTS = weakref.WeakKeyDictionary()  # the Components of every GridMap, kept up to date by components()
+FREE_RUN = re.compile(b"\x00+")  # a run of free cells in the wall flags
+
+
+class Components:
+    """
+    the connected components of the free cells of a GridMap, updated cell by cell as walls are painted or erased
+    ------------------------------------
+    data fields
+    ------------------------------------
+    rows: number of rows of the grid
+    cols: number of columns of the grid
+    walls: bytearray holding 1 for every wall cell as of the last update
+    labels: list of the label of every cell, -1 for the walls
+    parent: union-find parent of every label, a label is the root of its component when it is its own parent
+    sizes: number of cells of the component of every root label
+    ------------------------------------
+    methods
+    ------------------------------------
+    find: the root label of a label
+    component: the root label of the component of a cell, None for a wall
+    connected: checks if a path exists between two positions
+    set_wall: paints or erases a wall and updates the components
+    update: picks up the new state of a cell of the grid
+    sync: picks up every wall change of the grid since the last update
+    """
+
+    def __init__(self, grid_map):
+        self.rows = grid_map.rows
+        self.cols = grid_map.cols
+        self.walls = bytearray(grid_map.wall_flags())
+        self.labels = [-1] * grid_map.size
+        self.parent = []
+        self.sizes = []
+        # every run of free cells of a row gets a label, joined with the labels of the runs it touches in the row above
+        cols = self.cols
+        above = []  # (first col, end col, label) of the runs of the previous row
+        for row in range(self.rows):
+            offset = row * cols
+            runs = []
+            touching = 0  # the first run above that may touch the current run, the runs are sorted by column
+            for run in FREE_RUN.finditer(self.walls, offset, offset + cols):
+                first, end = run.start() - offset, run.end() - offset
+                label = self.new_label(end - first)
+                self.labels[offset + first:offset + end] = [label] * (end - first)
+                while touching < len(above) and above[touching][1] <= first:
+                    touching += 1
+                other = touching
+                while other < len(above) and above[other][0] < end:
+                    label = self.union(label, above[other][2])
+                    other += 1
+                runs.append((first, end, label))
+            above = runs
+
+    def find(self, label):
+        parent = self.parent
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]  # path halving
+            label = parent[label]
+        return label
+
+    def union(self, first, second):
+        first = self.find(first)
+        second = self.find(second)
+        if first == second:
+            return first
+        if self.sizes[first] < self.sizes[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.sizes[first] += self.sizes[second]
+        return first
+
+    def new_label(self, size):
+        label = len(self.parent)
+        self.parent.append(label)
+        self.sizes.append(size)
+        return label
+
+    def relabel(self, cells):
+        """
+        gives a new label to cells that form a component of their own
+        :param cells: list of the indices of the cells
+        :return: the new label
+        """
+        label = self.new_label(len(cells))
+        labels = self.labels
+        for index in cells:
+            labels[index] = label
+        return label
+
+    def neighbours(self, index):
+        """
+        :param index: flat index of a cell
+        :return: the free orthogonal neighbours of the cell
+        """
+        cols = self.cols
+        row, col = divmod(index, cols)
+        walls = self.walls
+        result = []
+        if row > 0 and not walls[index - cols]:
+            result.append(index - cols)
+        if row < self.rows - 1 and not walls[index + cols]:
+            result.append(index + cols)
+        if col > 0 and not walls[index - 1]:
+            result.append(index - 1)
+        if col < cols - 1 and not walls[index + 1]:
+            result.append(index + 1)
+        return result
+
+    def component(self, pos):
+        """
+        :param pos: (row, col) of a cell
+        :return: the root label of the component of the cell, None if it is a wall
+        """
+        label = self.labels[pos[0] * self.cols + pos[1]]
+        return None if label == -1 else self.find(label)
+
+    def connected(self, start, end):
+        """
+        :param start: (row, col) of the starting node
+        :param end: (row, col) of the goal node
+        :return: boolean True if a path exists between the two cells
+        """
+        first = self.component(start)
+        return first is not None and first == self.component(end)
+
+    def set_wall(self, index, wall=True):
+        """
+        paints or erases a wall, does nothing if the cell already is in that state
+        erasing merges the labels of the neighbours; painting searches from the neighbours of the new wall in lockstep
+        until all of them but one ran out of cells or met another one, so only the cut off pieces are visited in full
+        and the largest piece keeps its label
+        :param index: flat index of the cell
+        :param wall: True to paint a wall, False to erase it
+        :return: None
+        """
+        if bool(self.walls[index]) == wall:
+            return
+
+        neighbours = self.neighbours(index)
+        if not wall:
+            self.walls[index] = 0
+            label = self.relabel([index])
+            for neighbour in neighbours:
+                label = self.union(label, self.labels[neighbour])
+            return
+
+        root = self.find(self.labels[index])
+        self.walls[index] = 1
+        self.labels[index] = -1
+        self.sizes[root] -= 1
+        if len(neighbours) < 2:
+            return
+
+        # a small union-find over the searches, two searches join once one of them reaches a cell of the other
+        group = list(range(len(neighbours)))
+
+        def find_group(search):
+            while group[search] != search:
+                search = group[search]
+            return search
+
+        owner = {neighbour: search for search, neighbour in enumerate(neighbours)}
+        queues = [deque([neighbour]) for neighbour in neighbours]
+        pieces = len(neighbours)  # groups that did not run out of cells
+        finished = set()
+        while pieces > 1:
+            for search, queue in enumerate(queues):
+                if not queue or find_group(search) in finished:
+                    continue
+                current = queue.popleft()
+                for neighbour in self.neighbours(current):
+                    other = owner.get(neighbour)
+                    if other is None:
+                        owner[neighbour] = search
+                        queue.append(neighbour)
+                    elif find_group(other) != find_group(search):
+                        group[find_group(other)] = find_group(search)
+                        pieces -= 1
+
+            # a group whose searches all ran out of cells is a component of its own
+            for search in range(len(neighbours)):
+                current = find_group(search)
+                if pieces > 1 and current not in finished and all(
+                        not queues[other] for other in range(len(neighbours)) if find_group(other) == current):
+                    cells = [cell for cell, other in owner.items() if find_group(other) == current]
+                    self.relabel(cells)
+                    self.sizes[root] -= len(cells)
+                    finished.add(current)
+                    pieces -= 1
+
+    def update(self, grid_map, index):
+        """
+        picks up the state of a cell after the grid changed it
+        :param grid_map: the GridMap the components were built from
+        :param index: flat index of the cell
+        :return: None
+        """
+        self.set_wall(index, grid_map.cells[index] == WALL)
+
+    def sync(self, grid_map):
+        """
+        picks up every wall painted or erased since the last update
+        :param grid_map: the GridMap the components were built from
+        :return: None
+        """
+        walls = grid_map.wall_flags()
+        if walls == self.walls:
+            return
+        for index, (old, new) in enumerate(zip(self.walls, walls)):
+            if old != new:
+                self.set_wall(index, bool(new))
+
+
+def components(grid_map):
+    """
+    returns the Components of a GridMap, picking up the walls changed since the last call
+    :param grid_map: the GridMap
+    :return: Components
+    """
+    cached = COMPONENTS.get(grid_map)
+    if cached is None or cached.rows != grid_map.rows or cached.cols != grid_map.cols:
+        cached = Components(grid_map)
+        COMPONENTS[grid_map] = cached
+    else:
+        cached.sync(grid_map)
+
+    return cached
+
+
+def reachable(grid_map, start, end):
+    """
+    :param grid_map: the GridMap
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :return: boolean True if a path exists between the two cells
+    """
+    return components(grid_map).connected(start, end)
@@ -0,0 +1,269 @@
+"""
+Distance fields and flow fields, one search from the goal answers the queries of every start
+A single wavefront from the goal gives the distance of every cell to it and the neighbour each cell should step to,
+so the path of any agent sharing the goal is read off by following the steps, in O(path length)
+The moves are symmetric so the same field read backward also gives the paths from one source to every cell
+On 4 connected grids the wavefront is a breadth first search, its wide layers are expanded with a few numpy
+operations when numpy is installed; 8 connected grids have two move costs and use dijkstra's algorithm
+"""
+from heapq import heappush, heappop
+
+from .grid import WALL, CLOSED, numpy
+from .search import make_result
+
+VECTOR_MIN_LAYER = 256  # a breadth first layer with at least this many cells is expanded with numpy
+
+
+class FlowField:
+    """
+    the distance to one goal and the next step toward it of every cell of a GridMap
+    ------------------------------------
+    data fields
+    ------------------------------------
+    rows: number of rows of the grid
+    cols: number of columns of the grid
+    goal: index of the goal cell
+    distances: list of the path cost from every cell to the goal, inf for the walls and the unreachable cells
+    steps: list of the index of the neighbour every cell steps to, -1 for the goal, the walls and the unreachable cells
+    expanded: number of cells reached by the wavefront
+    max_open: peak size of the wavefront
+    ------------------------------------
+    methods
+    ------------------------------------
+    distance: path cost from a position to the goal
+    direction: (row, col) move from a position toward the goal
+    path_indices: the indices of the path from a cell to the goal
+    path: the positions of the path from a position to the goal
+    result: the SearchResult of one start, like the one of any engine algorithm
+    as_array: the distances as a (rows, cols) numpy array, for heatmaps
+    """
+
+    def __init__(self, rows, cols, goal, distances, steps, expanded=0, max_open=0):
+        self.rows = rows
+        self.cols = cols
+        self.goal = goal
+        self.distances = distances
+        self.steps = steps
+        self.expanded = expanded
+        self.max_open = max_open
+
+    def distance(self, pos):
+        return self.distances[pos[0] * self.cols + pos[1]]
+
+    def direction(self, pos):
+        """
+        :param pos: (row, col) of a cell
+        :return: (row, col) offset of the next step toward the goal, None at the goal or if the goal can't be reached
+        """
+        index = pos[0] * self.cols + pos[1]
+        step = self.steps[index]
+        if step == -1:
+            return None
+        row, col = divmod(step, self.cols)
+        return row - pos[0], col - pos[1]
+
+    def path_indices(self, index):
+        """
+        :param index: flat index of the starting cell
+        :return: list of indices from the cell to the goal, None if the goal can't be reached from it
+        """
+        if self.distances[index] == float("inf"):
+            return None
+        steps = self.steps
+        path = [index]
+        while index != self.goal:
+            index = steps[index]
+            path.append(index)
+        return path
+
+    def path(self, pos):
+        """
+        :param pos: (row, col) of the starting cell
+        :return: list of (row, col) positions from the cell to the goal, None if the goal can't be reached from it
+        """
+        path = self.path_indices(pos[0] * self.cols + pos[1])
+        return None if path is None else [divmod(index, self.cols) for index in path]
+
+    def result(self, grid_map, start):
+        """
+        :param grid_map: the GridMap the field was computed on
+        :param start: (row, col) of the starting node
+        :return: SearchResult object of the path from the start to the goal
+        """
+        return make_result(grid_map, self.path_indices(grid_map.index(start)), self.expanded, self.max_open)
+
+    def as_array(self):
+        """
+        :return: numpy float array of shape (rows, cols) holding the distances, inf for the unreachable cells
+        """
+        if numpy is None:
+            raise ImportError("FlowField.as_array() requires numpy, install it with 'pip install numpy'")
+
+        return numpy.array(self.distances, dtype=float).reshape(self.rows, self.cols)
+
+
+def breadth_first_layers(grid_map, goal, on_update=None):
+    """
+    the distances of a 4 connected grid, one breadth first layer at a time
+    :param grid_map: the GridMap
+    :param goal: index of the goal cell
+    :param on_update: optional function called as on_update(index, state) every time a cell is reached
+    :return: (list of the distance of every cell, -1 for the unreachable ones, cells reached, largest layer)
+    """
+    cells = grid_map.cells
+    neighbours = grid_map.neighbours
+    distances = [-1] * grid_map.size
+    distances[goal] = 0
+    layer = [goal]
+    reached = 1
+    max_open = 1
+    depth = 0
+    while layer:
+        depth += 1
+        following = []
+        for current in layer:
+            for neighbour in neighbours(current):
+                if distances[neighbour] == -1 and cells[neighbour] != WALL:
+                    distances[neighbour] = depth
+                    following.append(neighbour)
+                    if on_update:
+                        on_update(neighbour, CLOSED)
+        layer = following
+        reached += len(layer)
+        if len(layer) > max_open:
+            max_open = len(layer)
+    return distances, reached, max_open
+
+
+def vector_layers(grid_map, goal):
+    """
+    the distances of a 4 connected grid, the wide breadth first layers are expanded with numpy and the narrow ones,
+    like the corridors of a maze, cell by cell
+    :param grid_map: the GridMap
+    :param goal: index of the goal cell
+    :return: (numpy int32 array of the distance of every cell, -1 for the unreachable ones, cells reached,
+              largest layer)
+    """
+    rows, cols = grid_map.rows, grid_map.cols
+    free = (grid_map.as_array() != WALL).ravel()
+    distances = numpy.full(grid_map.size, -1, dtype=numpy.int32)
+    distances[goal] = 0
+    reached = memoryview(distances)  # fast scalar reads and writes for the narrow layers
+    cells = grid_map.cells
+    neighbours = grid_map.neighbours
+    layer = [goal]
+    total = 1
+    max_open = 1
+    depth = 0
+    while len(layer):
+        depth += 1
+        if len(layer) >= VECTOR_MIN_LAYER:
+            layer = numpy.asarray(layer)
+            row, col = numpy.divmod(layer, cols)
+            candidates = numpy.concatenate((layer[row > 0] - cols, layer[row < rows - 1] + cols,
+                                            layer[col > 0] - 1, layer[col < cols - 1] + 1))
+            candidates = candidates[free[candidates] & (distances[candidates] == -1)]
+            layer = numpy.unique(candidates)
+            distances[layer] = depth
+        else:
+            following = []
+            for current in (layer.tolist() if isinstance(layer, numpy.ndarray) else layer):
+                for neighbour in neighbours(current):
+                    if reached[neighbour] == -1 and cells[neighbour] != WALL:
+                        reached[neighbour] = depth
+                        following.append(neighbour)
+            layer = following
+        total += len(layer)
+        if len(layer) > max_open:
+            max_open = len(layer)
+    return distances, total, max_open
+
+
+def vector_steps(distances, rows, cols):
+    """
+    the next step of every cell of a 4 connected grid, the first neighbour one move closer to the goal
+    :param distances: numpy int32 array of the distance of every cell, -1 for the unreachable ones
+    :param rows: number of rows
+    :param cols: number of columns
+    :return: numpy array of the index of the next step of every cell, -1 where there is none
+    """
+    grid = distances.reshape(rows, cols)
+    index = numpy.arange(rows * cols).reshape(rows, cols)
+    steps = numpy.full((rows, cols), -1, dtype=numpy.int64)
+    wanted = numpy.where(grid > 0, grid - 1, -2)  # the distance of the next step, -2 matches no cell
+    # bottom, top, right, left like ORTHOGONAL_MOVES, filled in reverse so the first move found wins
+    moves = ((numpy.s_[:-1, :], numpy.s_[1:, :]), (numpy.s_[1:, :], numpy.s_[:-1, :]),
+             (numpy.s_[:, :-1], numpy.s_[:, 1:]), (numpy.s_[:, 1:], numpy.s_[:, :-1]))
+    for here, there in reversed(moves):
+        match = grid[there] == wanted[here]
+        steps[here][match] = index[there][match]
+    return steps.ravel()
+
+
+def flow_field(grid_map, goal, on_update=None):
+    """
+    computes the distance to the goal and the next step of every cell with one wavefront from the goal
+    on 4 connected grids it is a breadth first search, vectorized with numpy when it is installed and on_update is
+    None; on 8 connected grids it is dijkstra's algorithm
+    :param grid_map: the GridMap
+    :param goal: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a cell is reached
+    :return: FlowField
+    """
+    goal = grid_map.index(goal)
+    rows, cols = grid_map.rows, grid_map.cols
+    inf = float("inf")
+    if grid_map.connectivity == 4:
+        if numpy is not None and on_update is None:
+            distances, expanded, max_open = vector_layers(grid_map, goal)
+            steps = vector_steps(distances, rows, cols).tolist()
+            distances = numpy.where(distances >= 0, distances, inf).tolist()
+            return FlowField(rows, cols, goal, distances, steps, expanded, max_open)
+
+        distances, expanded, max_open = breadth_first_layers(grid_map, goal, on_update)
+        steps = [-1] * grid_map.size
+        neighbours = grid_map.neighbours
+        for index, distance in enumerate(distances):
+            if distance > 0:
+                steps[index] = next(n for n in neighbours(index) if distances[n] == distance - 1)
+            elif distance == -1:
+                distances[index] = inf
+        return FlowField(rows, cols, goal, distances, steps, expanded, max_open)
+
+    # dijkstra's algorithm from the goal, the parent of a cell is its next step
+    edges = grid_map.edges
+    distances = [inf] * grid_map.size
+    distances[goal] = 0
+    steps = [-1] * grid_map.size
+    heap = [(0, goal)]
+    expanded = 0
+    max_open = 1
+    while heap:
+        if len(heap) > max_open:
+            max_open = len(heap)
+        distance, current = heappop(heap)
+        if distance > distances[current]:
+            continue
+        expanded += 1
+        if on_update:
+            on_update(current, CLOSED)
+        for neighbour, cost in edges(current):
+            if distance + cost < distances[neighbour]:
+                distances[neighbour] = distance + cost
+                steps[neighbour] = current
+                heappush(heap, (distance + cost, neighbour))
+    return FlowField(rows, cols, goal, distances, steps, expanded, max_open)
+
+
+def flow_field_search(grid_map, start, end, on_update=None):
+    """
+    computes the flow field of the goal and reads off the path of the start
+    the field answers every other start with the same goal, keep it with flow_field() to reuse it
+    it guarantees the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a cell is reached
+    :return: SearchResult object
+    """
+    return flow_field(grid_map, end, on_update).result(grid_map, start)
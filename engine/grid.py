@@ -0,0 +1,277 @@
+"""
+The headless grid model used by the search engine
+Every cell is addressed either by its (row, col) position or by its flat index row * cols + col
+and its state is stored in one byte, only WALL cells block the searches
+"""
+try:
+    import numpy
+except ImportError:  # numpy is optional, only GridMap.as_array() needs it
+    numpy = None
+
+# cell states stored in the grid
+FREE = 0
+WALL = 1
+
+# search states reported to the on_update callback of the algorithms
+OPEN = 2
+CLOSED = 3
+PATH = 4
+
+# end point states used by the visualizer
+START = 5
+GOAL = 6
+
+
+# (row step, col step) of every move, the orthogonal ones follow the order of the old Node.update_neighbour()
+ORTHOGONAL_MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))  # bottom, top, right, left
+DIAGONAL_MOVES = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+SQRT2 = 2 ** 0.5  # cost of a diagonal move
+
+# maps a cell byte to 1 for a wall and to 0 for any other state, see GridMap.wall_flags()
+WALL_FLAGS = bytes(1 if state == WALL else 0 for state in range(256))
+
+# border flags of a cell, used as the key of the offset tables
+TOP_BORDER = 1
+BOTTOM_BORDER = 2
+LEFT_BORDER = 4
+RIGHT_BORDER = 8
+
+
+class GridMap:
+    """
+    a rectangular grid of free and wall cells that does not depend on pygame
+    ------------------------------------
+    data fields
+    ------------------------------------
+    rows: number of rows in the grid
+    cols: number of columns in the grid
+    size: total number of cells
+    cells: a bytearray holding the state of each cell at index row * cols + col
+    connectivity: 4 for up, down, left and right moves only, 8 to also allow diagonal moves
+    orthogonal_offsets: for each border flag combination, the index offsets of the orthogonal moves inside the grid
+    diagonal_offsets: for each border flag combination, (offset, side 1, side 2) of the diagonal moves inside the grid
+    ------------------------------------
+    methods
+    ------------------------------------
+    index: converts a (row, col) position to a flat index
+    pos: converts a flat index to a (row, col) position
+    is_wall: checks if the cell at a position is a wall
+    set_wall: makes the cell at a position a wall or clears it
+    wall_flags: snapshot of the wall layout, the key of the tables cached per layout
+    set_connectivity: switches between 4 and 8 connected moves
+    neighbours: returns the traversable neighbour indices of a cell
+    edges: returns the traversable neighbour indices of a cell along with the move costs
+    heuristic: admissible distance estimate between two cells
+    path_cost: total move cost of a path
+    as_array: returns a (rows, cols) numpy view of the cells
+    from_nodes: builds a GridMap from the pygame list of Node objects
+    from_strings: builds a GridMap from rows of '.' and '#' characters
+    """
+
+    def __init__(self, rows, cols=None, connectivity=4):
+        self.rows = rows
+        self.cols = rows if cols is None else cols
+        self.size = self.rows * self.cols
+        self.cells = bytearray(self.size)
+        self.connectivity = 4
+        self.orthogonal_offsets = []
+        self.diagonal_offsets = []
+        self.set_connectivity(connectivity)
+
+    def index(self, pos):
+        row, col = pos
+        return row * self.cols + col
+
+    def pos(self, index):
+        return divmod(index, self.cols)
+
+    def is_wall(self, pos):
+        return self.cells[self.index(pos)] == WALL
+
+    def set_wall(self, pos, wall=True):
+        self.cells[self.index(pos)] = WALL if wall else FREE
+
+    def wall_flags(self):
+        """
+        the search states painted by the visualizer are not part of the layout, only the walls are
+        :return: bytes holding 1 for every wall cell and 0 for every other cell
+        """
+        return bytes(self.cells).translate(WALL_FLAGS)
+
+    def set_connectivity(self, connectivity):
+        """
+        builds the offset tables of the moves, they depend only on the grid width so this is O(1) in the grid size
+        a diagonal move is allowed only when both orthogonal cells beside it are free, so paths never cut corners
+        :param connectivity: 4 or 8
+        :return: None
+        """
+        if connectivity not in (4, 8):
+            raise ValueError("connectivity must be 4 or 8, got {}".format(connectivity))
+
+        self.connectivity = connectivity
+        cols = self.cols
+        self.orthogonal_offsets = []
+        self.diagonal_offsets = []
+        for border in range(16):
+            blocked_rows = set()
+            blocked_cols = set()
+            if border & TOP_BORDER:
+                blocked_rows.add(-1)
+            if border & BOTTOM_BORDER:
+                blocked_rows.add(1)
+            if border & LEFT_BORDER:
+                blocked_cols.add(-1)
+            if border & RIGHT_BORDER:
+                blocked_cols.add(1)
+
+            self.orthogonal_offsets.append(tuple(
+                d_row * cols + d_col for d_row, d_col in ORTHOGONAL_MOVES
+                if d_row not in blocked_rows and d_col not in blocked_cols))
+            self.diagonal_offsets.append(tuple(
+                (d_row * cols + d_col, d_row * cols, d_col) for d_row, d_col in DIAGONAL_MOVES
+                if connectivity == 8 and d_row not in blocked_rows and d_col not in blocked_cols))
+
+    def border(self, row, col):
+        """
+        :param row: row of the cell
+        :param col: column of the cell
+        :return: the border flags of the cell, 0 for a cell away from the grid edges
+        """
+        return ((row == 0) | (row == self.rows - 1) << 1 |
+                (col == 0) << 2 | (col == self.cols - 1) << 3)
+
+    def neighbours(self, index):
+        """
+        finds the traversable neighbours of a cell, the orthogonal ones first in bottom, top, right, left order
+        cells away from the edges, which are nearly all of them, skip the table lookup of the orthogonal moves
+        :param index: flat index of the cell
+        :return: list of flat indices of the non wall neighbours
+        """
+        cells = self.cells
+        cols = self.cols
+        row, col = divmod(index, cols)
+        result = []
+        if 0 < row < self.rows - 1 and 0 < col < cols - 1:
+            border = 0
+            if cells[index + cols] != WALL:  # bottom
+                result.append(index + cols)
+            if cells[index - cols] != WALL:  # top
+                result.append(index - cols)
+            if cells[index + 1] != WALL:  # right
+                result.append(index + 1)
+            if cells[index - 1] != WALL:  # left
+                result.append(index - 1)
+        else:
+            border = self.border(row, col)
+            for offset in self.orthogonal_offsets[border]:
+                if cells[index + offset] != WALL:
+                    result.append(index + offset)
+
+        if self.connectivity == 8:
+            for offset, side_1, side_2 in self.diagonal_offsets[border]:
+                if cells[index + offset] != WALL and cells[index + side_1] != WALL and cells[index + side_2] != WALL:
+                    result.append(index + offset)
+
+        return result
+
+    def edges(self, index):
+        """
+        finds the traversable neighbours of a cell along with the cost of moving to them
+        :param index: flat index of the cell
+        :return: list of (neighbour index, cost) pairs, orthogonal moves cost 1 and diagonal ones SQRT2
+        """
+        cells = self.cells
+        cols = self.cols
+        row, col = divmod(index, cols)
+        result = []
+        if 0 < row < self.rows - 1 and 0 < col < cols - 1:
+            border = 0
+            if cells[index + cols] != WALL:  # bottom
+                result.append((index + cols, 1))
+            if cells[index - cols] != WALL:  # top
+                result.append((index - cols, 1))
+            if cells[index + 1] != WALL:  # right
+                result.append((index + 1, 1))
+            if cells[index - 1] != WALL:  # left
+                result.append((index - 1, 1))
+        else:
+            border = self.border(row, col)
+            for offset in self.orthogonal_offsets[border]:
+                if cells[index + offset] != WALL:
+                    result.append((index + offset, 1))
+
+        if self.connectivity == 8:
+            for offset, side_1, side_2 in self.diagonal_offsets[border]:
+                if cells[index + offset] != WALL and cells[index + side_1] != WALL and cells[index + side_2] != WALL:
+                    result.append((index + offset, SQRT2))
+
+        return result
+
+    def heuristic(self, a, b):
+        """
+        manhattan distance on a 4 connected grid and octile distance on an 8 connected grid
+        :param a: flat index of a cell
+        :param b: flat index of another cell
+        :return: a lower bound of the path cost between the two cells
+        """
+        row_a, col_a = divmod(a, self.cols)
+        row_b, col_b = divmod(b, self.cols)
+        d_row = abs(row_a - row_b)
+        d_col = abs(col_a - col_b)
+        if self.connectivity == 4:
+            return d_row + d_col
+
+        return max(d_row, d_col) + (SQRT2 - 1) * min(d_row, d_col)
+
+    def path_cost(self, path):
+        """
+        :param path: list of flat indices where consecutive cells are neighbours
+        :return: sum of the move costs along the path
+        """
+        if self.connectivity == 4:
+            return len(path) - 1
+
+        cols = self.cols
+        diagonal = sum(1 for a, b in zip(path, path[1:]) if a // cols != b // cols and a % cols != b % cols)
+        return len(path) - 1 - diagonal + diagonal * SQRT2
+
+    def as_array(self):
+        """
+        wraps the cells in a numpy array without copying them, writes to the array change the grid
+        :return: numpy uint8 array of shape (rows, cols)
+        """
+        if numpy is None:
+            raise ImportError("GridMap.as_array() requires numpy, install it with 'pip install numpy'")
+
+        return numpy.frombuffer(self.cells, dtype=numpy.uint8).reshape(self.rows, self.cols)
+
+    @classmethod
+    def from_nodes(cls, grid):
+        """
+        copies the walls of the pygame grid into a GridMap
+        :param grid: 2d list of Node objects
+        :return: GridMap of the same dimension
+        """
+        grid_map = cls(len(grid), len(grid[0]))
+        for row in grid:
+            for node in row:
+                if node.is_wall():
+                    grid_map.set_wall(node.get_pos())
+
+        return grid_map
+
+    @classmethod
+    def from_strings(cls, lines):
+        """
+        builds a GridMap from text where '#' is a wall and any other character is free
+        :param lines: list of equal length strings, one per row
+        :return: GridMap of len(lines) rows
+        """
+        grid_map = cls(len(lines), len(lines[0]))
+        for row, line in enumerate(lines):
+            for col, char in enumerate(line):
+                if char == '#':
+                    grid_map.set_wall((row, col))
+
+        return grid_map
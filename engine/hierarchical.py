@@ -0,0 +1,430 @@
+"""
+Hierarchical path finding (HPA*) for large maps
+The grid is cut into square clusters, the free cells facing each other across a cluster border are linked as
+entrances and the entrances of a cluster are linked by their shortest path inside it
+A query searches this small abstract graph first and then only refines the edges of the abstract path with searches
+bounded to one cluster, so it touches a few thousand cells on a map of millions
+The paths are near optimal: they can only cross borders at the entrances and stay inside a cluster between them
+"""
+import weakref
+from heapq import heappush, heappop
+
+from .grid import WALL, OPEN, CLOSED
+from .search import SearchResult, reconstruct_path
+
+CLUSTER_SIZE = 16  # default number of rows and cols of a cluster
+MAX_ENTRANCE = 6  # an entrance at least this wide gets a transition at both ends instead of one in the middle
+
+# the HierarchicalMap of every GridMap searched with HPA*, kept up to date with its walls
+HIERARCHIES = weakref.WeakKeyDictionary()
+
+
+def cluster_graph(grid_map, bounds):
+    """
+    the free cells of a cluster and the moves between them that stay inside it
+    :param grid_map: the GridMap
+    :param bounds: (top, bottom, left, right) of the cluster, bottom and right excluded
+    :return: (list of the free cell indices, dictionary of every free cell index to its position in the list,
+              list of the (position, cost) moves of every free cell)
+    """
+    top, bottom, left, right = bounds
+    cols = grid_map.cols
+    cells = grid_map.cells
+    free = [row * cols + col for row in range(top, bottom) for col in range(left, right)
+            if cells[row * cols + col] != WALL]
+    position = {index: i for i, index in enumerate(free)}
+    moves = [[(position[neighbour], cost) for neighbour, cost in grid_map.edges(index) if neighbour in position]
+             for index in free]
+    return free, position, moves
+
+
+def graph_distances(moves, source):
+    """
+    dijkstra's algorithm over the moves of cluster_graph()
+    :param moves: list of the (position, cost) moves of every cell
+    :param source: position of the source cell
+    :return: (list of the path cost from the source to every cell, inf for the unreachable ones, expanded cells)
+    """
+    distance = [float("inf")] * len(moves)
+    distance[source] = 0
+    heap = [(0, source)]
+    expanded = 0
+    while heap:
+        dist, current = heappop(heap)
+        if dist > distance[current]:
+            continue
+        expanded += 1
+        for neighbour, cost in moves[current]:
+            if dist + cost < distance[neighbour]:
+                distance[neighbour] = dist + cost
+                heappush(heap, (dist + cost, neighbour))
+
+    return distance, expanded
+
+
+def cluster_path(grid_map, start, end, bounds):
+    """
+    A* search between two cells that never leaves the bounds
+    :param grid_map: the GridMap
+    :param start: index of the start cell
+    :param end: index of the goal cell
+    :param bounds: (top, bottom, left, right) of the cluster, bottom and right excluded
+    :return: (list of indices from start to goal or None if there is no path inside the bounds, expanded cells)
+    """
+    top, bottom, left, right = bounds
+    cols = grid_map.cols
+    edges = grid_map.edges
+    heuristic = grid_map.heuristic
+    inf = float("inf")
+    g_score = {start: 0}
+    path_dict = {}
+    closed = set()
+    heap = [(heuristic(start, end), start)]
+    while heap:
+        current = heappop(heap)[1]
+        if current == end:
+            return reconstruct_path(path_dict, start, end), len(closed)
+        if current in closed:
+            continue
+        closed.add(current)
+        current_g_score = g_score[current]
+        for neighbour, cost in edges(current):
+            temp_g_score = current_g_score + cost
+            if temp_g_score < g_score.get(neighbour, inf):
+                row, col = divmod(neighbour, cols)
+                if top <= row < bottom and left <= col < right:
+                    g_score[neighbour] = temp_g_score
+                    path_dict[neighbour] = current
+                    heappush(heap, (temp_g_score + heuristic(neighbour, end), neighbour))
+
+    return None, len(closed)
+
+
+class HierarchicalMap:
+    """
+    the abstract graph of a GridMap cut into clusters
+    the transitions are found for every border up front, which is a single pass over the border cells, while the
+    costs between the entrances of a cluster are only computed the first time a query reaches the cluster
+    ------------------------------------
+    data fields
+    ------------------------------------
+    cluster_size: number of rows and cols of a cluster, the clusters of the last row and col may be smaller
+    connectivity: 4 or 8
+    walls: wall flags of the GridMap as of the last update
+    cluster_rows: number of rows of clusters
+    cluster_cols: number of cols of clusters
+    transitions: dictionary of every border (cluster, next cluster on the right or below) to its list of
+                 (cell, cell across) pairs, the cells on both sides of the border an abstract path may cross at
+    inter: dictionary of every entrance cell to a dictionary of the cells across a border it is linked to
+    intra: dictionary of every cluster built so far to a dictionary of its entrances to a dictionary of the other
+           entrances they reach inside the cluster and the path cost
+    ------------------------------------
+    methods
+    ------------------------------------
+    cluster: the cluster of a cell
+    bounds: the (top, bottom, left, right) rows and cols of a cluster
+    borders: the borders of a cluster
+    find_transitions: scans a border for the entrances between its two clusters
+    set_transitions: replaces the transitions of a border and tells if they changed
+    entrances: the entrance cells of a cluster
+    cluster_edges: the costs between the entrances of a cluster, computed on first use
+    link: the costs from a cell to the entrances of its cluster
+    update: rebuilds the borders and clusters around the cells whose walls changed
+    search: answers a query on the abstract graph and refines the abstract path
+    """
+
+    def __init__(self, grid_map, cluster_size=CLUSTER_SIZE):
+        self.cluster_size = cluster_size
+        self.connectivity = grid_map.connectivity
+        self.walls = grid_map.wall_flags()
+        self.cluster_rows = -(-grid_map.rows // cluster_size)
+        self.cluster_cols = -(-grid_map.cols // cluster_size)
+        self.transitions = {}
+        self.inter = {}
+        self.intra = {}
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            for border in self.borders(cluster):
+                if border[0] == cluster:  # every border is shared by two clusters, scan it once
+                    self.set_transitions(border, self.find_transitions(grid_map, border))
+
+    def cluster(self, grid_map, index):
+        row, col = divmod(index, grid_map.cols)
+        return row // self.cluster_size * self.cluster_cols + col // self.cluster_size
+
+    def bounds(self, grid_map, cluster):
+        row, col = divmod(cluster, self.cluster_cols)
+        top = row * self.cluster_size
+        left = col * self.cluster_size
+        return top, min(top + self.cluster_size, grid_map.rows), left, min(left + self.cluster_size, grid_map.cols)
+
+    def borders(self, cluster):
+        """
+        :param cluster: a cluster number
+        :return: list of the (cluster, next cluster) borders of the cluster with its neighbours
+        """
+        row, col = divmod(cluster, self.cluster_cols)
+        borders = []
+        if col > 0:
+            borders.append((cluster - 1, cluster))
+        if col < self.cluster_cols - 1:
+            borders.append((cluster, cluster + 1))
+        if row > 0:
+            borders.append((cluster - self.cluster_cols, cluster))
+        if row < self.cluster_rows - 1:
+            borders.append((cluster, cluster + self.cluster_cols))
+        return borders
+
+    def find_transitions(self, grid_map, border):
+        """
+        splits a border into entrances, the runs of cells that are free on both sides of it
+        an entrance narrower than MAX_ENTRANCE gets one transition in its middle, a wider one a transition at each end
+        :param grid_map: the GridMap
+        :param border: (cluster, next cluster on the right or below)
+        :return: list of (cell, cell across) index pairs, the first cell lies in the first cluster
+        """
+        first, second = border
+        top, bottom, left, right = self.bounds(grid_map, first)
+        cols = grid_map.cols
+        if first // self.cluster_cols == second // self.cluster_cols:  # vertical border, the pairs are side by side
+            cells = range(top * cols + right - 1, bottom * cols, cols)
+            across = 1
+        else:  # horizontal border, the pairs are one above the other
+            cells = range((bottom - 1) * cols + left, (bottom - 1) * cols + right)
+            across = cols
+
+        walls = self.walls
+        transitions = []
+        run = []
+        for cell in list(cells) + [None]:
+            if cell is not None and not walls[cell] and not walls[cell + across]:
+                run.append(cell)
+                continue
+            if run:
+                ends = (run[0], run[-1]) if len(run) >= MAX_ENTRANCE else (run[len(run) // 2],)
+                transitions += [(cell, cell + across) for cell in ends]
+                run = []
+
+        return transitions
+
+    def set_transitions(self, border, transitions):
+        """
+        replaces the transitions of a border and their links
+        :param border: (cluster, next cluster)
+        :param transitions: list of (cell, cell across) pairs
+        :return: boolean True if the transitions changed
+        """
+        old = self.transitions.get(border, [])
+        if old == transitions:
+            return False
+
+        inter = self.inter
+        for a, b in old:
+            for cell, other in ((a, b), (b, a)):
+                del inter[cell][other]
+                if not inter[cell]:
+                    del inter[cell]
+        for a, b in transitions:
+            inter.setdefault(a, {})[b] = 1
+            inter.setdefault(b, {})[a] = 1
+        self.transitions[border] = transitions
+        return True
+
+    def entrances(self, cluster):
+        """
+        :param cluster: a cluster number
+        :return: set of the transition cells of the cluster's borders that lie inside it
+        """
+        entrances = set()
+        for border in self.borders(cluster):
+            side = 0 if border[0] == cluster else 1
+            entrances.update(pair[side] for pair in self.transitions.get(border, ()))
+        return entrances
+
+    def cluster_edges(self, grid_map, cluster):
+        """
+        computes the path costs between the entrances of a cluster, once per wall layout of the cluster
+        :param grid_map: the GridMap
+        :param cluster: a cluster number
+        :return: dictionary of every entrance to a dictionary of the entrances it reaches and the path cost
+        """
+        edges = self.intra.get(cluster)
+        if edges is None:
+            entrances = self.entrances(cluster)
+            free, position, moves = cluster_graph(grid_map, self.bounds(grid_map, cluster))
+            edges = {}
+            for entrance in entrances:
+                distance = graph_distances(moves, position[entrance])[0]
+                edges[entrance] = {other: distance[position[other]] for other in entrances
+                                   if other != entrance and distance[position[other]] != float("inf")}
+            self.intra[cluster] = edges
+        return edges
+
+    def link(self, grid_map, index, cluster):
+        """
+        :param grid_map: the GridMap
+        :param index: a free cell
+        :param cluster: the cluster of the cell
+        :return: (dictionary of the entrances of the cluster the cell reaches inside it to the path cost,
+                  expanded cells)
+        """
+        free, position, moves = cluster_graph(grid_map, self.bounds(grid_map, cluster))
+        distance, expanded = graph_distances(moves, position[index])
+        edges = {entrance: distance[position[entrance]] for entrance in self.entrances(cluster)}
+        return {entrance: cost for entrance, cost in edges.items() if cost != float("inf")}, expanded
+
+    def update(self, grid_map):
+        """
+        finds the cells whose wall state changed since the last update, rescans the borders of their clusters and
+        forgets the entrance costs of the clusters whose walls or transitions changed
+        :param grid_map: the GridMap
+        :return: number of clusters that will be rebuilt
+        """
+        walls = grid_map.wall_flags()
+        if walls == self.walls:
+            return 0
+
+        cols = grid_map.cols
+        changed = set()
+        for row in range(grid_map.rows):  # compare whole rows first, most of them did not change
+            first = row * cols
+            if walls[first:first + cols] != self.walls[first:first + cols]:
+                changed.update(self.cluster(grid_map, i) for i in range(first, first + cols)
+                               if walls[i] != self.walls[i])
+        self.walls = walls
+
+        stale = set(changed)
+        for cluster in changed:
+            for border in self.borders(cluster):
+                if self.set_transitions(border, self.find_transitions(grid_map, border)):
+                    stale.update(border)
+        for cluster in stale:
+            self.intra.pop(cluster, None)
+
+        return len(stale)
+
+    def search(self, grid_map, start, end, on_update=None):
+        """
+        HPA* query
+        the start and goal are linked to the entrances of their clusters, the abstract graph is searched with A*
+        and every edge of the abstract path inside a cluster is refined with a search bounded to the cluster
+        a start and goal in the same cluster are also joined by a search inside it, used as one more abstract edge
+        :param grid_map: the GridMap to search, it must be the one the HierarchicalMap was built for
+        :param start: (row, col) of the starting node
+        :param end: (row, col) of the goal node
+        :param on_update: optional function called as on_update(index, state) every time an abstract node is
+                          opened or closed
+        :return: SearchResult object, expanded counts the abstract nodes and the cells of the bounded searches
+        """
+        start = grid_map.index(start)
+        end = grid_map.index(end)
+        if grid_map.cells[start] == WALL or grid_map.cells[end] == WALL:
+            return SearchResult(False)
+        self.update(grid_map)
+
+        start_cluster = self.cluster(grid_map, start)
+        end_cluster = self.cluster(grid_map, end)
+        expanded = 0
+        local_path = None  # the path inside the cluster when the start and goal share one
+        if start_cluster == end_cluster:
+            local_path, expanded = cluster_path(grid_map, start, end, self.bounds(grid_map, start_cluster))
+
+        # the start and goal are linked to the entrances of their clusters they can reach
+        start_edges, count = self.link(grid_map, start, start_cluster)
+        expanded += count
+        end_edges, count = self.link(grid_map, end, end_cluster)
+        expanded += count
+        start_edges.pop(start, None)
+        if local_path is not None:  # the abstract search picks it unless leaving the cluster is shorter
+            start_edges[end] = grid_map.path_cost(local_path)
+
+        # A* on the abstract graph
+        heuristic = grid_map.heuristic
+        g_score = {start: 0}
+        path_dict = {}
+        closed = set()
+        heap = [(heuristic(start, end), start)]
+        max_open = 0
+        abstract_path = None
+        while heap:
+            if len(heap) > max_open:
+                max_open = len(heap)
+            current = heappop(heap)[1]
+            if current == end:
+                abstract_path = reconstruct_path(path_dict, start, end)
+                break
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+
+            if current == start:
+                edges = list(start_edges.items())
+            else:
+                edges = list(self.cluster_edges(grid_map, self.cluster(grid_map, current))[current].items())
+            edges += self.inter.get(current, {}).items()
+            if current in end_edges:
+                edges.append((end, end_edges[current]))
+
+            for neighbour, cost in edges:
+                temp_g_score = g_score[current] + cost
+                if temp_g_score < g_score.get(neighbour, float("inf")):
+                    g_score[neighbour] = temp_g_score
+                    path_dict[neighbour] = current
+                    heappush(heap, (temp_g_score + heuristic(neighbour, end), neighbour))
+                    if on_update:
+                        on_update(neighbour, OPEN)
+
+            if on_update:
+                on_update(current, CLOSED)
+
+        if abstract_path is None:
+            return SearchResult(False, expanded=expanded, max_open=max_open)
+
+        # refinement, the abstract edges that cross a border are single moves already
+        path = [start]
+        for a, b in zip(abstract_path, abstract_path[1:]):
+            cluster = self.cluster(grid_map, a)
+            if cluster != self.cluster(grid_map, b):
+                path.append(b)
+                continue
+            if (a, b) == (start, end):
+                path = local_path
+                continue
+            segment, count = cluster_path(grid_map, a, b, self.bounds(grid_map, cluster))
+            expanded += count
+            path += segment[1:]
+
+        return SearchResult(True, [grid_map.pos(i) for i in path], grid_map.path_cost(path), expanded, max_open)
+
+
+def hierarchy(grid_map, cluster_size=CLUSTER_SIZE):
+    """
+    returns the cached HierarchicalMap of a GridMap, it is built again only if the connectivity or the cluster size
+    changed, wall edits are repaired cluster by cluster by the next search
+    :param grid_map: the GridMap
+    :param cluster_size: number of rows and cols of a cluster
+    :return: HierarchicalMap
+    """
+    cached = HIERARCHIES.get(grid_map)
+    if cached is None or cached.cluster_size != cluster_size or cached.connectivity != grid_map.connectivity:
+        cached = HierarchicalMap(grid_map, cluster_size)
+        HIERARCHIES[grid_map] = cached
+
+    return cached
+
+
+def hpa_star(grid_map, start, end, on_update=None, cluster_size=CLUSTER_SIZE):
+    """
+    hierarchical path finding A*
+    the first search of a grid finds the cluster entrances, the next ones reuse them and only rebuild the clusters
+    whose walls changed
+    it does not guarantee the shortest path but stays close to it
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time an abstract node is opened or
+                      closed
+    :param cluster_size: number of rows and cols of a cluster
+    :return: SearchResult object
+    """
+    return hierarchy(grid_map, cluster_size).search(grid_map, start, end, on_update)
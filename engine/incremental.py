@@ -0,0 +1,264 @@
+"""
+Incremental replanning with D* Lite
+D* Lite is Lifelong Planning A* run backward from the goal, so the start can move between searches
+The planner keeps its g and rhs scores between searches and only repairs the cells whose distance to the goal
+changed after walls were painted or erased, instead of searching the whole grid again
+"""
+from heapq import heappush, heappop
+
+from .grid import WALL, OPEN, CLOSED
+from .search import SearchResult
+
+
+class DStarLite:
+    """
+    a D* Lite planner bound to one GridMap and one goal
+    ------------------------------------
+    data fields
+    ------------------------------------
+    grid_map: the GridMap being planned on, edits of its walls are picked up by the next search
+    start: index of the current start node
+    goal: index of the goal node
+    km: sum of the heuristic distances the start moved, added to every new key
+    g: list of the distance to the goal of every cell, as of its last expansion
+    rhs: list of the one step lookahead distance of every cell, a cell is consistent when g equals rhs
+    heap: heap of (key, index) entries, an entry is stale unless queued holds the same key for its index
+    queued: dictionary of the key of every inconsistent cell in the heap
+    walls: wall flags of the cells as of the last search
+    connectivity: connectivity of the grid as of the last search, the scores are rebuilt when it changes
+    on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    expanded: number of cells expanded by the last search
+    max_open: peak number of heap entries during the last search
+    interrupted: boolean True while a search runs, it stays True if on_update raised (a cancelled SearchTrace) and
+                 left the scores and the heap half updated, so the next search starts over
+    ------------------------------------
+    methods
+    ------------------------------------
+    reset: drops every score and queues the goal again, like a new planner
+    key: the priority of a cell
+    update_vertex: recomputes the rhs of a cell and queues it if it is inconsistent
+    update_queue: queues a cell if it is inconsistent and drops it from the heap otherwise
+    compute_shortest_path: expands the inconsistent cells until the start is consistent
+    move_start: moves the start node
+    sync: finds the cells whose wall state changed since the last search and repairs their neighbourhood
+    extract_path: follows the lowest g scores from the start to the goal
+    search: replans and returns a SearchResult, it can be used like any engine algorithm
+    """
+
+    def __init__(self, grid_map, start, end, on_update=None):
+        self.grid_map = grid_map
+        self.start = grid_map.index(start)
+        self.goal = grid_map.index(end)
+        self.on_update = on_update
+        self.expanded = 0
+        self.max_open = 0
+        self.interrupted = False
+        self.reset()
+
+    def reset(self):
+        """
+        forgets the scores of the past searches, needed when the move costs change and not only walls
+        :return: None
+        """
+        grid_map = self.grid_map
+        self.km = 0
+        inf = float("inf")
+        self.g = [inf] * grid_map.size
+        self.rhs = [inf] * grid_map.size
+        self.rhs[self.goal] = 0
+        self.heap = []
+        self.queued = {}
+        self.walls = grid_map.wall_flags()
+        self.connectivity = grid_map.connectivity
+        self.queue(self.goal)
+
+    def key(self, index):
+        best = min(self.g[index], self.rhs[index])
+        return best + self.grid_map.heuristic(self.start, index) + self.km, best
+
+    def queue(self, index):
+        key = self.key(index)
+        self.queued[index] = key
+        heappush(self.heap, (key, index))
+        if self.on_update:
+            self.on_update(index, OPEN)
+
+    def update_vertex(self, index):
+        """
+        recomputes the rhs of a cell from its neighbours and keeps it in the heap only while it is inconsistent
+        :param index: flat index of the cell
+        :return: None
+        """
+        if index != self.goal:
+            if self.grid_map.cells[index] == WALL:
+                self.rhs[index] = float("inf")
+            else:
+                g = self.g
+                self.rhs[index] = min([cost + g[neighbour] for neighbour, cost in self.grid_map.edges(index)],
+                                      default=float("inf"))
+        self.update_queue(index)
+
+    def update_queue(self, index):
+        if self.g[index] != self.rhs[index]:
+            self.queue(index)
+        else:
+            self.queued.pop(index, None)
+
+    def compute_shortest_path(self):
+        """
+        expands the inconsistent cells in key order until the start is consistent and no queued key is lower
+        :return: None
+        """
+        heap = self.heap
+        queued = self.queued
+        g = self.g
+        rhs = self.rhs
+        start = self.start
+        edges = self.grid_map.edges
+        inf = float("inf")
+
+        while heap:
+            if len(heap) > self.max_open:
+                self.max_open = len(heap)
+            key, current = heap[0]
+            if queued.get(current) != key:
+                heappop(heap)  # stale entry of a cell that was queued again or became consistent
+                continue
+            if key >= self.key(start) and rhs[start] == g[start]:
+                break
+
+            new_key = self.key(current)
+            if key < new_key:  # the start moved since the cell was queued
+                queued[current] = new_key
+                heappush(heap, (new_key, current))
+                continue
+
+            heappop(heap)
+            del queued[current]
+            self.expanded += 1
+            goal = self.goal
+            if g[current] > rhs[current]:  # the cell got closer to the goal, it can only lower its neighbours' rhs
+                g[current] = rhs[current]
+                for neighbour, cost in edges(current):
+                    if neighbour != goal and cost + g[current] < rhs[neighbour]:
+                        rhs[neighbour] = cost + g[current]
+                    self.update_queue(neighbour)
+            else:  # the cell got farther, only the neighbours whose rhs went through it are recomputed
+                old_g = g[current]
+                g[current] = inf
+                self.update_vertex(current)
+                for neighbour, cost in edges(current):
+                    if rhs[neighbour] == cost + old_g:
+                        self.update_vertex(neighbour)
+
+            if self.on_update:
+                self.on_update(current, CLOSED)
+
+    def move_start(self, start):
+        """
+        moves the start node, the keys already queued stay valid lower bounds because km grows by the distance moved
+        :param start: (row, col) of the new start node
+        :return: None
+        """
+        start = self.grid_map.index(start)
+        self.km += self.grid_map.heuristic(self.start, start)
+        self.start = start
+
+    def sync(self):
+        """
+        compares the walls of the grid with the ones of the last search and updates the cells around every change
+        a wall also blocks the diagonal moves around its corners so the whole 3x3 block of a changed cell is updated
+        :return: number of cells whose wall state changed
+        """
+        grid_map = self.grid_map
+        walls = grid_map.wall_flags()
+        if walls == self.walls:
+            return 0
+
+        cols = grid_map.cols
+        changed = []
+        for row in range(grid_map.rows):  # compare whole rows first, most of them did not change
+            first = row * cols
+            if walls[first:first + cols] != self.walls[first:first + cols]:
+                changed += [i for i in range(first, first + cols) if walls[i] != self.walls[i]]
+        self.walls = walls
+
+        block = set()
+        for index in changed:
+            row, col = divmod(index, cols)
+            for r in range(max(row - 1, 0), min(row + 2, grid_map.rows)):
+                for c in range(max(col - 1, 0), min(col + 2, cols)):
+                    block.add(r * cols + c)
+        for index in block:
+            self.update_vertex(index)
+
+        return len(changed)
+
+    def extract_path(self):
+        """
+        :return: list of indices from the start to the goal following the lowest cost + g, None if there is no path
+        """
+        g = self.g
+        edges = self.grid_map.edges
+        current = self.start
+        path = [current]
+        while current != self.goal:
+            best = min(edges(current), key=lambda edge: edge[1] + g[edge[0]], default=None)
+            if best is None or g[best[0]] == float("inf") or len(path) > self.grid_map.size:
+                return None
+            current = best[0]
+            path.append(current)
+
+        return path
+
+    def search(self, grid_map, start, end, on_update=None):
+        """
+        replans after the start moved or the walls changed
+        the signature matches the engine algorithms so the planner can be replayed with engine.record()
+        :param grid_map: the GridMap of the planner
+        :param start: (row, col) of the starting node, it may differ from the last search
+        :param end: (row, col) of the goal node, it must be the goal of the planner
+        :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+        :return: SearchResult object
+        """
+        if grid_map is not self.grid_map or grid_map.index(end) != self.goal:
+            raise ValueError("a DStarLite planner can only replan on its own grid and goal")
+
+        self.on_update = on_update
+        self.expanded = 0
+        self.max_open = 0
+        # every move cost may have changed after a connectivity change, not only the ones around a few cells
+        if self.interrupted or grid_map.connectivity != self.connectivity:
+            self.interrupted = True
+            self.start = grid_map.index(start)
+            self.reset()
+        else:
+            self.interrupted = True
+            self.move_start(start)
+            self.sync()
+
+        if grid_map.cells[self.start] == WALL:
+            self.interrupted = False
+            return SearchResult(False)
+
+        self.compute_shortest_path()
+        self.interrupted = False
+        path = self.extract_path() if self.g[self.start] != float("inf") else None
+        if path is None:
+            return SearchResult(False, expanded=self.expanded, max_open=self.max_open)
+
+        return SearchResult(True, [grid_map.pos(i) for i in path], grid_map.path_cost(path), self.expanded,
+                            self.max_open)
+
+
+def d_star_lite(grid_map, start, end, on_update=None):
+    """
+    a single D* Lite search from scratch, keep a DStarLite object to replan incrementally instead
+    it guarantees the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :return: SearchResult object
+    """
+    return DStarLite(grid_map, start, end).search(grid_map, start, end, on_update)
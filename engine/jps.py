@@ -0,0 +1,404 @@
+"""
+Jump Point Search and JPS+ for the uniform cost grid
+Both searches are A* over jump points: instead of opening every neighbour they jump in straight lines (and diagonal
+ones on an 8 connected grid) until a cell where an optimal path may turn, so the symmetric paths are never expanded
+
+The jumps run on a copy of the cells padded with a wall border, which removes every bounds check
+    8 connectivity follows JPS without corner cutting: a diagonal jump stops where one of its straight parts
+    finds a jump point, a straight jump stops next to a wall corner (a forced neighbour)
+    4 connectivity is the same idea with the vertical moves playing the part of the diagonal ones: a vertical
+    jump stops where one of the horizontal jumps finds a jump point
+JPS+ precomputes the distance to the next jump point (or to the wall) of every cell in every direction,
+so a jump becomes a table lookup plus a check for the goal
+"""
+import weakref
+
+from .grid import WALL, OPEN, CLOSED, SQRT2, ORTHOGONAL_MOVES, DIAGONAL_MOVES
+from .openlist import make_open_list
+from .search import SearchResult
+
+# maps a cell byte to 1 if it can be walked on and to 0 for a wall
+PASSABLE = bytes(0 if state == WALL else 1 for state in range(256))
+
+# the jump distance tables of every GridMap searched by JPS+, rebuilt when its walls or connectivity change
+JUMP_TABLES = weakref.WeakKeyDictionary()
+
+
+def padded_cells(grid_map):
+    """
+    copies the cells inside a one cell wall border
+    :param grid_map: the GridMap to search
+    :return: (free, width) where free is a bytearray holding 1 for the walkable cells and width is cols + 2
+    """
+    width = grid_map.cols + 2
+    cols = grid_map.cols
+    free = bytearray(width * (grid_map.rows + 2))
+    passable = bytes(grid_map.cells).translate(PASSABLE)
+    for row in range(grid_map.rows):
+        first = (row + 1) * width + 1
+        free[first:first + cols] = passable[row * cols:(row + 1) * cols]
+
+    return free, width
+
+
+def sign(x):
+    return (x > 0) - (x < 0)
+
+
+def forced(free, p, d_row, d_col, width):
+    """
+    checks if a straight move into cell p has a forced neighbour, a free cell beside p whose way back is blocked
+    :return: boolean
+    """
+    if d_row == 0:
+        return bool(free[p - width] and not free[p - width - d_col] or free[p + width] and not free[p + width - d_col])
+
+    back = d_row * width
+    return bool(free[p - 1] and not free[p - 1 - back] or free[p + 1] and not free[p + 1 - back])
+
+
+def directions(free, p, direction, width, connectivity):
+    """
+    prunes the directions worth jumping in from a cell
+    :param free: padded walkable flags
+    :param p: padded index of the cell
+    :param direction: (d_row, d_col) of the jump that reached the cell, None for the start
+    :param width: padded row width
+    :param connectivity: 4 or 8
+    :return: list of (d_row, d_col) directions
+    """
+    if direction is None:
+        result = list(ORTHOGONAL_MOVES)
+        if connectivity == 8:
+            result += [(d_row, d_col) for d_row, d_col in DIAGONAL_MOVES
+                       if free[p + d_row * width] and free[p + d_col]]
+        return result
+
+    d_row, d_col = direction
+    if connectivity == 4:
+        if d_row == 0:
+            return [direction, (1, 0), (-1, 0)]
+        return [direction, (0, 1), (0, -1)]
+
+    if d_row and d_col:
+        result = []
+        if free[p + d_row * width]:
+            result.append((d_row, 0))
+        if free[p + d_col]:
+            result.append((0, d_col))
+        if free[p + d_row * width] and free[p + d_col]:
+            result.append(direction)
+        return result
+
+    if d_row == 0:  # horizontal, the sides are above and below
+        ahead = free[p + d_col]
+        sides = [(side, 0) for side in (1, -1) if free[p + side * width]]
+        result = [direction] if ahead else []
+        if ahead:
+            result += [(side, d_col) for side, _ in sides]
+        return result + sides
+
+    ahead = free[p + d_row * width]  # vertical, the sides are left and right
+    sides = [(0, side) for side in (1, -1) if free[p + side]]
+    result = [direction] if ahead else []
+    if ahead:
+        result += [(d_row, side) for _, side in sides]
+    return result + sides
+
+
+def jump(free, p, d_row, d_col, goal, width, connectivity):
+    """
+    walks from a cell in one direction until a jump point, the goal or a wall
+    :param free: padded walkable flags
+    :param p: padded index of the cell the jump starts from
+    :param d_row: row step, -1, 0 or 1
+    :param d_col: column step, -1, 0 or 1
+    :param goal: padded index of the goal
+    :param width: padded row width
+    :param connectivity: 4 or 8
+    :return: (padded index of the jump point, number of steps) or None if the jump hits a wall
+    """
+    step = d_row * width + d_col
+    steps = 0
+    while True:
+        if not free[p + step]:
+            return None
+        if d_row and d_col and not (free[p + d_row * width] and free[p + d_col]):
+            return None  # a diagonal move may not cut a wall corner
+        p += step
+        steps += 1
+        if p == goal:
+            return p, steps
+
+        if d_row and d_col:
+            if jump(free, p, d_row, 0, goal, width, 8) or jump(free, p, 0, d_col, goal, width, 8):
+                return p, steps
+        elif forced(free, p, d_row, d_col, width):
+            return p, steps
+        elif d_row and connectivity == 4:
+            if jump(free, p, 0, 1, goal, width, 4) or jump(free, p, 0, -1, goal, width, 4):
+                return p, steps
+
+
+def jump_successors(free, p, direction, goal, width, connectivity):
+    """
+    :return: list of (padded index, direction, number of steps) of the jump points reached from a cell
+    """
+    result = []
+    for d_row, d_col in directions(free, p, direction, width, connectivity):
+        point = jump(free, p, d_row, d_col, goal, width, connectivity)
+        if point is not None:
+            result.append((point[0], (d_row, d_col), point[1]))
+
+    return result
+
+
+class JumpTable:
+    """
+    the JPS+ jump distances of every cell of a GridMap
+    distances[(d_row, d_col)][p] is the number of steps from the padded cell p to the next jump point in that
+    direction, or minus the number of free steps before a wall when the direction has no jump point
+    ------------------------------------
+    data fields
+    ------------------------------------
+    walls: wall flags of the GridMap the table was built from
+    connectivity: 4 or 8
+    free: padded walkable flags
+    width: padded row width
+    distances: dictionary of direction to a list of jump distances
+    """
+
+    def __init__(self, grid_map):
+        self.walls = grid_map.wall_flags()
+        self.connectivity = grid_map.connectivity
+        self.free, self.width = padded_cells(grid_map)
+        self.distances = {}
+        rows, cols = grid_map.rows, grid_map.cols
+
+        # the straight moves first, the vertical and diagonal jumps stop where a straight jump finds a jump point
+        moves = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        if self.connectivity == 8:
+            moves += list(DIAGONAL_MOVES)
+        for d_row, d_col in moves:
+            self.distances[(d_row, d_col)] = self.sweep(d_row, d_col, rows, cols)
+
+    def is_stale(self, grid_map):
+        return grid_map.connectivity != self.connectivity or grid_map.wall_flags() != self.walls
+
+    def sweep(self, d_row, d_col, rows, cols):
+        """
+        fills the distances of one direction, walking against it so the next cell is always done first
+        :return: list of jump distances indexed by padded cell
+        """
+        free = self.free
+        width = self.width
+        distances = self.distances
+        diagonal = d_row and d_col
+        vertical_4 = d_row and not d_col and self.connectivity == 4
+        if diagonal:
+            straight_row, straight_col = distances[(d_row, 0)], distances[(0, d_col)]
+        if vertical_4:
+            right, left = distances[(0, 1)], distances[(0, -1)]
+
+        step = d_row * width + d_col
+        table = [0] * len(free)
+        row_order = range(rows, 0, -1) if d_row > 0 else range(1, rows + 1)
+        col_order = range(cols, 0, -1) if d_col > 0 else range(1, cols + 1)
+        for row in row_order:
+            for col in col_order:
+                p = row * width + col
+                q = p + step
+                if not free[q] or diagonal and not (free[p + d_row * width] and free[p + d_col]):
+                    continue  # no move, the distance stays 0
+                if diagonal:
+                    stop = straight_row[q] > 0 or straight_col[q] > 0
+                else:
+                    stop = forced(free, q, d_row, d_col, width) or vertical_4 and (right[q] > 0 or left[q] > 0)
+                if stop:
+                    table[p] = 1
+                else:
+                    next_distance = table[q]
+                    table[p] = next_distance + 1 if next_distance > 0 else next_distance - 1
+
+        return table
+
+    def successors(self, p, direction, goal, goal_row, goal_col):
+        """
+        reads the jump points reached from a cell, adding the goal or a cell in line with it when it is in reach
+        :return: list of (padded index, direction, number of steps)
+        """
+        free = self.free
+        width = self.width
+        connectivity = self.connectivity
+        row, col = divmod(p, width)
+        result = []
+        for d_row, d_col in directions(free, p, direction, width, connectivity):
+            distance = self.distances[(d_row, d_col)][p]
+            reach = abs(distance)
+            step = d_row * width + d_col
+            if d_row and (d_col or connectivity == 4):
+                # a diagonal jump (or a vertical one on a 4 connected grid) also stops in line with the goal
+                if sign(goal_row - row) == d_row and (d_col == 0 or sign(goal_col - col) == d_col):
+                    steps = abs(goal_row - row) if d_col == 0 else min(abs(goal_row - row), abs(goal_col - col))
+                    if steps <= reach:
+                        result.append((p + steps * step, (d_row, d_col), steps))
+                        continue
+            elif (goal_row - row) * d_col + (goal_col - col) * d_row == 0 and goal != p:
+                # the goal lies on the line of a straight jump
+                steps = (goal - p) // step
+                if 0 < steps <= reach:
+                    result.append((goal, (d_row, d_col), steps))
+                    continue
+
+            if distance > 0:
+                result.append((p + distance * step, (d_row, d_col), distance))
+
+        return result
+
+
+def jump_table(grid_map):
+    """
+    returns the cached JumpTable of a GridMap, building it again if the walls changed since the last search
+    :param grid_map: the GridMap
+    :return: JumpTable
+    """
+    table = JUMP_TABLES.get(grid_map)
+    if table is None or table.is_stale(grid_map):
+        table = JumpTable(grid_map)
+        JUMP_TABLES[grid_map] = table
+
+    return table
+
+
+def search_jump_points(grid_map, start, end, successors, free, width, on_update, open_list):
+    """
+    A* over the jump points, shared by JPS and JPS+
+    :param successors: function(p, direction) returning the (padded index, direction, steps) of the next jump points
+    :return: SearchResult object
+    """
+    cols = grid_map.cols
+    start = (start[0] + 1) * width + start[1] + 1
+    goal = (end[0] + 1) * width + end[1] + 1
+    if not free[start] or not free[goal]:
+        return SearchResult(False)
+
+    goal_row, goal_col = divmod(goal, width)
+    if grid_map.connectivity == 4:
+        def heuristic(p):
+            row, col = divmod(p, width)
+            return abs(row - goal_row) + abs(col - goal_col)
+    else:
+        def heuristic(p):
+            row, col = divmod(p, width)
+            d_row, d_col = abs(row - goal_row), abs(col - goal_col)
+            return max(d_row, d_col) + (SQRT2 - 1) * min(d_row, d_col)
+
+    def grid_index(p):
+        row, col = divmod(p, width)
+        return (row - 1) * cols + col - 1
+
+    inf = float("inf")
+    g_score = {start: 0}
+    parent = {start: start}
+    arrival = {start: None}
+    closed = set()
+    heap = make_open_list(open_list, grid_map.connectivity == 4)
+    heap.push(start, heuristic(start))
+    expanded = 0
+    max_open = 0
+
+    while heap:
+        if len(heap) > max_open:
+            max_open = len(heap)
+        current = heap.pop()[1]
+        if current in closed:
+            continue
+        if current == goal:
+            points = [current]
+            while points[-1] != start:
+                points.append(parent[points[-1]])
+            path = expand_jumps(points[::-1], width)
+            return SearchResult(True, path, grid_map.path_cost([row * cols + col for row, col in path]),
+                                expanded, max_open)
+
+        closed.add(current)
+        expanded += 1
+        current_g_score = g_score[current]
+        for point, direction, steps in successors(current, arrival[current]):
+            temp_g_score = current_g_score + (steps * SQRT2 if direction[0] and direction[1] else steps)
+            if temp_g_score >= g_score.get(point, inf):
+                continue
+            g_score[point] = temp_g_score
+            parent[point] = current
+            arrival[point] = direction
+            heap.push(point, temp_g_score + heuristic(point))
+            if on_update:
+                on_update(grid_index(point), OPEN)
+
+        if on_update:
+            on_update(grid_index(current), CLOSED)
+
+    return SearchResult(False, expanded=expanded, max_open=max_open)
+
+
+def expand_jumps(points, width):
+    """
+    fills in the cells between consecutive jump points, every jump is a straight or diagonal line
+    :param points: padded indices of the jump points from start to goal
+    :param width: padded row width
+    :return: list of (row, col) positions of the GridMap
+    """
+    row, col = divmod(points[0], width)
+    path = [(row - 1, col - 1)]
+    for point in points[1:]:
+        next_row, next_col = divmod(point, width)
+        d_row, d_col = sign(next_row - row), sign(next_col - col)
+        while (row, col) != (next_row, next_col):
+            row += d_row
+            col += d_col
+            path.append((row - 1, col - 1))
+
+    return path
+
+
+def jump_point_search(grid_map, start, end, on_update=None, open_list="binary"):
+    """
+    Jump Point Search, A* that only opens the jump points of the uniform cost grid
+    it guarantees the shortest path, with the same cost as a_star
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a jump point is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :return: SearchResult object
+    """
+    free, width = padded_cells(grid_map)
+    goal = (end[0] + 1) * width + end[1] + 1
+    connectivity = grid_map.connectivity
+
+    def successors(p, direction):
+        return jump_successors(free, p, direction, goal, width, connectivity)
+
+    return search_jump_points(grid_map, start, end, successors, free, width, on_update, open_list)
+
+
+def jump_point_search_plus(grid_map, start, end, on_update=None, open_list="binary"):
+    """
+    JPS+, Jump Point Search reading its jumps from the precomputed JumpTable of the grid
+    the table is built by the first search of a grid and reused until the walls or the connectivity change
+    it guarantees the shortest path, with the same cost as a_star
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a jump point is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :return: SearchResult object
+    """
+    table = jump_table(grid_map)
+    goal = (end[0] + 1) * table.width + end[1] + 1
+    goal_row, goal_col = end[0] + 1, end[1] + 1
+
+    def successors(p, direction):
+        return table.successors(p, direction, goal, goal_row, goal_col)
+
+    return search_jump_points(grid_map, start, end, successors, table.free, table.width, on_update, open_list)
@@ -0,0 +1,213 @@
+"""
+The ALT heuristic: A*, Landmarks and the Triangle inequality
+A few landmark cells get an exact distance table to every cell, computed once per wall layout with a full Dijkstra
+For any landmark L the triangle inequality gives |d(L, a) - d(L, b)| <= d(a, b), so the largest of these differences
+is a consistent lower bound that sees the walls, unlike the Manhattan or octile distance on a maze
+"""
+import weakref
+
+from .openlist import make_open_list
+from .search import a_star
+from .bidirectional import InformedBidirectionalSearch
+from .components import Components
+
+LANDMARKS = 8  # default number of landmarks
+
+# the Landmarks of every GridMap searched with the ALT heuristic, rebuilt when its walls or connectivity change
+LANDMARK_TABLES = weakref.WeakKeyDictionary()
+
+
+def distance_table(grid_map, source):
+    """
+    dijkstra's algorithm from one cell to the whole grid
+    :param grid_map: the GridMap
+    :param source: index of the source cell
+    :return: list of the path cost from the source to every cell, inf for the unreachable ones
+    """
+    inf = float("inf")
+    distance = [inf] * grid_map.size
+    distance[source] = 0
+    # the move costs are integers on a 4 connected grid so the bucket queue can be used
+    heap = make_open_list("bucket" if grid_map.connectivity == 4 else "binary")
+    heap.push(source, 0)
+    edges = grid_map.edges
+
+    while heap:
+        dist, current = heap.pop()
+        if dist > distance[current]:
+            continue
+        for neighbour, cost in edges(current):
+            if dist + cost < distance[neighbour]:
+                distance[neighbour] = dist + cost
+                heap.push(neighbour, dist + cost)
+
+    return distance
+
+
+class Landmarks:
+    """
+    the landmarks of a wall layout and their distance tables
+    a landmark only helps the queries of its own connected component, so the landmarks are shared out between the
+    components in proportion to their size, the largest one always gets at least one
+    inside a component they are chosen by farthest point selection: the first one is the cell farthest from a cell of
+    the component, every next one is the cell farthest from all the landmarks of the component already chosen
+    ------------------------------------
+    data fields
+    ------------------------------------
+    walls: wall flags of the GridMap the tables were built from
+    connectivity: 4 or 8
+    count: number of landmarks asked for, fewer are chosen when the reachable cells run out
+    landmarks: list of the landmark indices
+    tables: list of the distance tables, tables[i][index] is the path cost from landmarks[i] to the cell
+    ------------------------------------
+    methods
+    ------------------------------------
+    is_stale: checks if the walls or the connectivity of the GridMap changed since the tables were built
+    heuristic: returns the ALT heuristic function of the tables
+    """
+
+    def __init__(self, grid_map, count=LANDMARKS):
+        self.walls = grid_map.wall_flags()
+        self.connectivity = grid_map.connectivity
+        self.count = count
+        self.landmarks = []
+        self.tables = []
+
+        for first, share in component_shares(grid_map, count):
+            self.select(grid_map, first, share)
+
+    def select(self, grid_map, first, count):
+        """
+        adds the landmarks of one connected component by farthest point selection
+        :param grid_map: the GridMap
+        :param first: index of any cell of the component
+        :param count: number of landmarks of the component
+        :return: None
+        """
+        inf = float("inf")
+        nearest = distance_table(grid_map, first)  # distance from each cell to its nearest landmark so far
+        for number in range(count):
+            farthest = max((d for d in nearest if d != inf), default=0)
+            if farthest == 0:
+                break  # every reachable cell is already a landmark
+            landmark = nearest.index(farthest)
+            table = distance_table(grid_map, landmark)
+            self.landmarks.append(landmark)
+            self.tables.append(table)
+            if number == 0:
+                nearest = table  # the first cell only served to find the first landmark
+            else:
+                nearest = [d if d < t else t for d, t in zip(nearest, table)]
+
+    def is_stale(self, grid_map):
+        return grid_map.connectivity != self.connectivity or grid_map.wall_flags() != self.walls
+
+    def heuristic(self, grid_map):
+        """
+        builds h(a, b) = max(grid_map.heuristic(a, b), max over the landmarks L of |d(L, a) - d(L, b)|)
+        landmarks that cannot reach both cells are skipped
+        :param grid_map: the GridMap the tables were built from
+        :return: function h(index, target index)
+        """
+        base = grid_map.heuristic
+        tables = self.tables
+        inf = float("inf")
+        targets = {}  # the landmark distances of the targets, a search only asks for one or two of them
+
+        def heuristic(a, b):
+            to_b = targets.get(b)
+            if to_b is None:
+                to_b = targets[b] = [table[b] for table in tables]
+            best = base(a, b)
+            for table, to_target in zip(tables, to_b):
+                to_a = table[a]
+                if to_a != inf and to_target != inf:
+                    difference = to_a - to_target if to_a > to_target else to_target - to_a
+                    if difference > best:
+                        best = difference
+            return best
+
+        return heuristic
+
+
+def component_shares(grid_map, count):
+    """
+    shares out the landmarks between the connected components of the free cells by the largest remainder method
+    the diagonal moves never cut a corner so the components are the same with 4 and 8 connectivity
+    :param grid_map: the GridMap
+    :param count: number of landmarks
+    :return: list of (index of a cell of the component, number of landmarks), the largest component first,
+             the components without a landmark are left out
+    """
+    found = Components(grid_map)
+    firsts = {}  # a cell of every component by its root label
+    for index, label in enumerate(found.labels):
+        if label != -1:
+            firsts.setdefault(found.find(label), index)
+    sizes = sorted(((found.sizes[root], first) for root, first in firsts.items() if found.sizes[root] > 1),
+                   reverse=True)
+    if not sizes or count <= 0:
+        return []
+
+    total = sum(size for size, _ in sizes)
+    shares = [count * size // total for size, _ in sizes]
+    shares[0] = max(shares[0], 1)
+    remainders = sorted(range(len(sizes)), key=lambda i: count * sizes[i][0] % total, reverse=True)
+    for i in remainders[:count - sum(shares)]:
+        shares[i] += 1
+    return [(first, share) for (_, first), share in zip(sizes, shares) if share]
+
+
+def landmarks(grid_map, count=LANDMARKS):
+    """
+    returns the cached Landmarks of a GridMap, building them again if the walls changed since the last search
+    :param grid_map: the GridMap
+    :param count: number of landmarks
+    :return: Landmarks
+    """
+    cached = LANDMARK_TABLES.get(grid_map)
+    if cached is None or cached.count != count or cached.is_stale(grid_map):
+        cached = Landmarks(grid_map, count)
+        LANDMARK_TABLES[grid_map] = cached
+
+    return cached
+
+
+def landmark_heuristic(grid_map, count=LANDMARKS):
+    """
+    :param grid_map: the GridMap
+    :param count: number of landmarks
+    :return: the ALT heuristic function h(index, target index) of the current walls of the grid
+    """
+    return landmarks(grid_map, count).heuristic(grid_map)
+
+
+def alt_a_star(grid_map, start, end, on_update=None, open_list="binary", count=LANDMARKS):
+    """
+    A* search guided by the ALT heuristic
+    the first search of a wall layout builds the landmark tables, the next ones reuse them
+    it guarantees the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :param count: number of landmarks
+    :return: SearchResult object
+    """
+    return a_star(grid_map, start, end, on_update, open_list, landmark_heuristic(grid_map, count))
+
+
+def alt_bidirectional_a_star(grid_map, start, end, on_update=None, open_list="binary", count=LANDMARKS):
+    """
+    bidirectional A* search guided by the ALT heuristic
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :param count: number of landmarks
+    :return: SearchResult object
+    """
+    heuristic = landmark_heuristic(grid_map, count)
+    return InformedBidirectionalSearch(grid_map, start, end, on_update, open_list, heuristic).a_star_search()
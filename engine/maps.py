@@ -0,0 +1,483 @@
+"""
+Map generators and loaders for batch runs of the engine
+Every generator is seeded so the same arguments always build the same GridMap
+The map files and images are converted a whole row at a time with translation tables, never character by character
+"""
+import mmap
+import os
+import random
+import struct
+import zlib
+
+from .grid import GridMap, FREE, WALL, numpy
+
+# characters of the MovingAI .map format that can be walked on, any other character is an obstacle
+MOVINGAI_PASSABLE = ".GS"
+WALL_THRESHOLD = 128  # image pixels darker than this are walls
+
+# translation tables between the characters of the map files and the cell states, applied to whole rows at once
+MOVINGAI_CELLS = bytes(FREE if chr(char) in MOVINGAI_PASSABLE else WALL for char in range(256))
+TEXT_CELLS = bytes(WALL if chr(char) == "#" else FREE for char in range(256))
+MOVINGAI_CHARS = bytes(ord("@") if state == WALL else ord(".") for state in range(256))
+IMAGE_PIXELS = bytes(0 if state == WALL else 255 for state in range(256))  # black walls on a white background
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}  # the samples per pixel of every PNG color type
+
+
+def open_map(size, connectivity=4):
+    """
+    builds a grid without walls
+    :param size: number of rows and cols of the square grid
+    :param connectivity: 4 or 8
+    :return: GridMap
+    """
+    return GridMap(size, connectivity=connectivity)
+
+
+def random_map(size, density, seed=0, connectivity=4):
+    """
+    builds a grid where every cell is a wall with the given probability
+    :param size: number of rows and cols of the square grid
+    :param density: probability of a cell being a wall, between 0 and 1
+    :param seed: random seed
+    :param connectivity: 4 or 8
+    :return: GridMap
+    """
+    rnd = random.Random(seed)
+    grid_map = GridMap(size, connectivity=connectivity)
+    grid_map.cells[:] = bytes(WALL if rnd.random() < density else FREE for _ in range(grid_map.size))
+    return grid_map
+
+
+def maze_map(size, seed=0, connectivity=4):
+    """
+    builds a perfect maze with the recursive backtracker, carved iteratively
+    the maze cells are at odd (row, col) positions and the corridors between them are one cell wide
+    :param size: number of rows and cols of the square grid
+    :param seed: random seed
+    :param connectivity: 4 or 8
+    :return: GridMap
+    """
+    rnd = random.Random(seed)
+    grid_map = GridMap(size, connectivity=connectivity)
+    cells = grid_map.cells
+    cells[:] = bytes([WALL]) * grid_map.size
+    cols = grid_map.cols
+
+    last = size - 2 if size % 2 else size - 3  # the last odd row and col inside the border
+    if last < 1:
+        return grid_map
+
+    cells[cols + 1] = FREE
+    stack = [(1, 1)]
+    while stack:
+        row, col = stack[-1]
+        unvisited = [(row + dr, col + dc) for dr, dc in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                     if 1 <= row + dr <= last and 1 <= col + dc <= last and cells[(row + dr) * cols + col + dc] == WALL]
+        if not unvisited:
+            stack.pop()
+            continue
+        next_row, next_col = rnd.choice(unvisited)
+        cells[(row + next_row) // 2 * cols + (col + next_col) // 2] = FREE  # the wall between the two maze cells
+        cells[next_row * cols + next_col] = FREE
+        stack.append((next_row, next_col))
+
+    return grid_map
+
+
+def rooms_map(size, room=16, seed=0, connectivity=4):
+    """
+    builds square rooms separated by one cell thick walls, every wall between two rooms has one door
+    :param size: number of rows and cols of the square grid
+    :param room: side of a room including its wall
+    :param seed: random seed
+    :param connectivity: 4 or 8
+    :return: GridMap
+    """
+    rnd = random.Random(seed)
+    grid_map = GridMap(size, connectivity=connectivity)
+    cells = grid_map.cells
+    cols = grid_map.cols
+    lines = range(room - 1, size - 1, room)  # the rows and cols holding the walls
+
+    for line in lines:
+        cells[line * cols:(line + 1) * cols] = bytes([WALL]) * cols
+        for row in range(size):
+            cells[row * cols + line] = WALL
+
+    starts = [0] + [line + 1 for line in lines]
+    stops = list(lines) + [size]
+    for line in lines:
+        for first, stop in zip(starts, stops):
+            door = rnd.randrange(first, stop)
+            cells[line * cols + door] = FREE  # a door in the horizontal wall
+            door = rnd.randrange(first, stop)
+            cells[door * cols + line] = FREE  # a door in the vertical wall
+
+    return grid_map
+
+
+def read_bytes(path):
+    """
+    maps a file into memory instead of reading it, the slices taken from it are the only copies
+    :param path: path of the file
+    :return: mmap object, or bytes for an empty file that can't be mapped
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def load_map(path, connectivity=4):
+    """
+    reads a map file, the rows are converted with one bytes.translate() each
+    MovingAI benchmark maps start with a 'type', 'height', 'width' and 'map' header, their '.', 'G' and 'S' cells
+    are free; any other file is read as rows of '.' and '#' characters like GridMap.from_strings()
+    :param path: path of the map file
+    :param connectivity: 4 or 8
+    :return: GridMap
+    """
+    data = read_bytes(path)
+    try:
+        if data[:4] == b"type":
+            header = {}
+            position = 0
+            while True:
+                end = data.find(b"\n", position)
+                if end == -1:
+                    raise ValueError("{} has no 'map' line".format(path))
+                line = data[position:end].strip()
+                position = end + 1
+                if line == b"map":
+                    break
+                key, value = line.split()
+                header[key.decode()] = value.decode()
+
+            height = int(header["height"])
+            width = int(header["width"])
+            lines = data[position:].split(b"\n")[:height]
+            table = MOVINGAI_CELLS
+        else:
+            lines = [line for line in data[:].split(b"\n") if line.strip(b"\r")]
+            height = len(lines)
+            width = len(lines[0].rstrip(b"\r")) if lines else 0
+            table = TEXT_CELLS
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+    grid_map = GridMap(height, width, connectivity)
+    rows = [line.rstrip(b"\r")[:width].translate(table) for line in lines]
+    if len(rows) < height or any(len(row) < width for row in rows):
+        raise ValueError("{} has fewer than {} rows of {} cells".format(path, height, width))
+    grid_map.cells[:] = b"".join(rows)
+    return grid_map
+
+
+def save_map(grid_map, path):
+    """
+    writes the walls of a grid as a MovingAI .map file, '@' for the walls and '.' for every other cell
+    :param grid_map: the GridMap
+    :param path: path of the map file
+    :return: None
+    """
+    cols = grid_map.cols
+    chars = bytes(grid_map.cells).translate(MOVINGAI_CHARS)
+    with open(path, "wb") as file:
+        file.write("type octile\nheight {}\nwidth {}\nmap\n".format(grid_map.rows, cols).encode())
+        file.write(b"".join(chars[first:first + cols] + b"\n" for first in range(0, grid_map.size, cols)))
+
+
+def load_scenario(path):
+    """
+    reads a MovingAI .scen file, after the 'version' line every line holds a bucket, the map name, the map width and
+    height, the start x and y, the goal x and y and the optimal path length
+    :param path: path of the scenario file
+    :return: list of ((row, col) start, (row, col) goal, optimal length) tuples
+    """
+    scenarios = []
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) < 9 or fields[0] == "version":
+                continue
+            start_x, start_y, goal_x, goal_y = (int(field) for field in fields[-5:-1])
+            scenarios.append(((start_y, start_x), (goal_y, goal_x), float(fields[-1])))
+
+    return scenarios
+
+
+def save_scenario(path, map_name, grid_map, scenarios):
+    """
+    writes a MovingAI .scen file, the bucket of a query is its optimal length divided by 4
+    :param path: path of the scenario file
+    :param map_name: name of the map file the scenarios refer to
+    :param grid_map: the GridMap of the map file
+    :param scenarios: list of ((row, col) start, (row, col) goal, optimal length) tuples
+    :return: None
+    """
+    with open(path, "w") as file:
+        file.write("version 1\n")
+        for (start_row, start_col), (goal_row, goal_col), length in scenarios:
+            file.write("{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}\t{:.8f}\n".format(
+                int(length // 4), map_name, grid_map.cols, grid_map.rows, start_col, start_row, goal_col, goal_row,
+                length))
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def save_image(grid_map, path):
+    """
+    writes the walls of a grid as an 8 bit grayscale PNG image, one black pixel per wall and white everywhere else
+    :param grid_map: the GridMap
+    :param path: path of the image file
+    :return: None
+    """
+    cols = grid_map.cols
+    pixels = bytes(grid_map.cells).translate(IMAGE_PIXELS)
+    # every scanline starts with filter type 0, the pixels are stored as they are
+    scanlines = b"".join(b"\x00" + pixels[first:first + cols] for first in range(0, grid_map.size, cols))
+    with open(path, "wb") as file:
+        file.write(PNG_SIGNATURE)
+        file.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", cols, grid_map.rows, 8, 0, 0, 0, 0)))
+        file.write(png_chunk(b"IDAT", zlib.compress(scanlines)))
+        file.write(png_chunk(b"IEND", b""))
+
+
+def unfilter(data, height, stride, bpp):
+    """
+    undoes the PNG scanline filters, a whole scanline at a time when the image only uses the none, sub and up
+    filters, along the diagonals of the image (see unfilter_diagonals()) when it uses the average or Paeth filters
+    that depend on the previous pixel of the scanline
+    :param data: decompressed image data, a filter type byte before every scanline
+    :param height: number of scanlines
+    :param stride: number of bytes of a scanline
+    :param bpp: number of bytes of a pixel, at least 1
+    :return: numpy uint8 array of shape (height, stride)
+    """
+    lines = numpy.frombuffer(data, dtype=numpy.uint8)[:height * (stride + 1)].reshape(height, stride + 1)
+    kinds = lines[:, 0]
+    if kinds.size and kinds.max() > 4:
+        raise ValueError("unknown PNG filter type {}".format(kinds[kinds > 4][0]))
+    if ((kinds == 3) | (kinds == 4)).any():
+        return unfilter_diagonals(lines, bpp)
+
+    image = numpy.zeros((height, stride), dtype=numpy.uint8)
+    previous = numpy.zeros(stride, dtype=numpy.uint8)
+    for row in range(height):
+        kind = kinds[row]
+        line = lines[row, 1:]
+        if kind == 0:
+            current = line
+        elif kind == 1:  # sub: a running sum of every channel along the scanline
+            padded = numpy.zeros(-(-stride // bpp) * bpp, dtype=numpy.uint8)
+            padded[:stride] = line
+            current = padded.reshape(-1, bpp).cumsum(axis=0, dtype=numpy.uint8).ravel()[:stride]
+        else:  # up
+            current = line + previous
+        image[row] = current
+        previous = image[row]
+    return image
+
+
+def unfilter_diagonals(lines, bpp):
+    """
+    undoes the PNG scanline filters one diagonal of pixels at a time
+    a pixel only depends on the pixels left, above and above left of it, so all the pixels (row, t - row) of the
+    t-th diagonal are undone together from the two diagonals before it; height + width steps instead of one step
+    per byte of the image
+    :param lines: numpy uint8 array of shape (height, stride + 1), the filter type byte and the scanline of every row
+    :param bpp: number of bytes of a pixel, at least 1
+    :return: numpy uint8 array of shape (height, stride)
+    """
+    height, stride = lines.shape[0], lines.shape[1] - 1
+    width = -(-stride // bpp)  # pixels of a scanline, the last one padded with zeros
+    filtered = numpy.zeros((height, width * bpp), dtype=numpy.int16)
+    filtered[:, :stride] = lines[:, 1:]
+    filtered = filtered.reshape(height * width, bpp)
+    image = numpy.zeros((height * width, bpp), dtype=numpy.uint8)
+    kinds = lines[:, :1]
+    masks = {kind: kinds == kind for kind in range(5) if (kinds == kind).any()}
+    # the pixels of the last two diagonals by row, shifted by one so that index 0 is the row of zeros above the
+    # image; the rows a diagonal has not reached yet stay 0, the left padding of the image
+    last_diagonal = numpy.zeros((height + 1, bpp), dtype=numpy.int16)
+    diagonal_before = numpy.zeros((height + 1, bpp), dtype=numpy.int16)
+    step = max(width - 1, 1)  # one row down and one column left in the flattened image
+    for diagonal in range(height + width - 1):
+        first = max(0, diagonal - width + 1)
+        last = min(height - 1, diagonal)
+        left = last_diagonal[first + 1:last + 2]
+        above = last_diagonal[first:last + 1]
+        corner = diagonal_before[first:last + 1]
+        predictors = {0: 0, 1: left, 2: above}
+        if 3 in masks:
+            predictors[3] = (left + above) >> 1
+        if 4 in masks:  # the distances of left + above - corner to left, above and corner
+            distance_left = numpy.abs(above - corner)
+            distance_above = numpy.abs(left - corner)
+            distance_corner = numpy.abs(left + above - 2 * corner)
+            predictors[4] = numpy.where((distance_left <= distance_above) & (distance_left <= distance_corner), left,
+                                        numpy.where(distance_above <= distance_corner, above, corner))
+        kind, *others = masks
+        predictor = predictors[kind]
+        for kind in others:
+            predictor = numpy.where(masks[kind][first:last + 1], predictors[kind], predictor)
+
+        begin = first * width + diagonal - first
+        pixels = slice(begin, begin + (last - first) * step + 1, step)
+        current = diagonal_before  # the diagonal before the last one is not needed anymore
+        current[first + 1:last + 2] = (filtered[pixels] + predictor) & 255
+        image[pixels] = current[first + 1:last + 2]
+        last_diagonal, diagonal_before = current, last_diagonal
+    return image.reshape(height, width * bpp)[:, :stride]
+
+
+def load_image(path, connectivity=4, threshold=WALL_THRESHOLD):
+    """
+    reads a PNG image, every pixel darker than the threshold is a wall and the transparent pixels are free
+    the image may be grayscale, RGB or palette based with or without alpha, with 8 bits per sample or 1, 2 or 4 bits
+    per grayscale or palette pixel, and not interlaced; it is decoded with numpy
+    :param path: path of the image file
+    :param connectivity: 4 or 8
+    :param threshold: brightness between 0 and 255 under which a pixel is a wall
+    :return: GridMap of one cell per pixel
+    """
+    if numpy is None:
+        raise ImportError("load_image() requires numpy, install it with 'pip install numpy'")
+
+    data = read_bytes(path)
+    try:
+        if data[:8] != PNG_SIGNATURE:
+            raise ValueError("{} is not a PNG image".format(path))
+        position = 8
+        header = None
+        palette = None
+        compressed = []
+        while position < len(data):
+            length, kind = struct.unpack(">I4s", data[position:position + 8])
+            chunk = data[position + 8:position + 8 + length]
+            position += 12 + length
+            if kind == b"IHDR":
+                header = struct.unpack(">IIBBBBB", chunk)
+            elif kind == b"PLTE":
+                palette = numpy.frombuffer(chunk, dtype=numpy.uint8).reshape(-1, 3)
+            elif kind == b"tRNS" and palette is not None:
+                alpha = numpy.full(len(palette), 255, dtype=numpy.uint8)
+                alpha[:length] = numpy.frombuffer(chunk, dtype=numpy.uint8)
+                palette = numpy.column_stack((palette, alpha))
+            elif kind == b"IDAT":
+                compressed.append(chunk)
+            elif kind == b"IEND":
+                break
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+    if header is None:
+        raise ValueError("{} has no IHDR chunk".format(path))
+    width, height, depth, color_type, _, _, interlace = header
+    channels = PNG_CHANNELS.get(color_type)
+    if channels is None or interlace or depth not in (1, 2, 4, 8) or (depth < 8 and channels > 1):
+        raise ValueError("{}: unsupported PNG, color type {} with {} bits per sample, interlace {}".format(
+            path, color_type, depth, interlace))
+
+    stride = -(-width * channels * depth // 8)
+    image = unfilter(zlib.decompress(b"".join(compressed)), height, stride, max(channels * depth // 8, 1))
+    if depth < 8:  # unpack the small samples, scaled to 0-255 unless they are palette indices
+        samples = numpy.unpackbits(image, axis=1).reshape(height, -1, depth)[:, :width]
+        image = (samples * (1 << numpy.arange(depth - 1, -1, -1))).sum(axis=2).astype(numpy.uint8)
+        if color_type == 0:
+            image = image * (255 // ((1 << depth) - 1))
+    pixels = image.reshape(height, width, channels)
+    if color_type == 3:
+        if palette is None:
+            raise ValueError("{} has no PLTE chunk".format(path))
+        pixels = palette[pixels[:, :, 0]]
+        channels = pixels.shape[2]
+
+    color = pixels[:, :, :3 if channels >= 3 else 1]
+    walls = color.mean(axis=2) < threshold
+    if channels in (2, 4):  # the last channel is the alpha
+        walls &= pixels[:, :, -1] >= 128
+
+    grid_map = GridMap(height, width, connectivity)
+    grid_map.cells[:] = numpy.where(walls, WALL, FREE).astype(numpy.uint8).tobytes()
+    return grid_map
+
+
+def load(path, connectivity=4):
+    """
+    reads a map file or a PNG image, by the extension of its path
+    :param path: path of the file
+    :param connectivity: 4 or 8
+    :return: GridMap
+    """
+    if path.lower().endswith(".png"):
+        return load_image(path, connectivity)
+    return load_map(path, connectivity)
+
+
+def save(grid_map, path):
+    """
+    writes the walls of a grid to a PNG image or, for any other extension, a MovingAI .map file
+    :param grid_map: the GridMap
+    :param path: path of the file
+    :return: None
+    """
+    if path.lower().endswith(".png"):
+        save_image(grid_map, path)
+    else:
+        save_map(grid_map, path)
+
+
+def reachable(grid_map, start):
+    """
+    flood fills the cells that can be reached from a cell
+    :param grid_map: the GridMap
+    :param start: index of the first cell
+    :return: list of the reachable indices in breadth first order, start included
+    """
+    seen = bytearray(grid_map.size)
+    seen[start] = 1
+    order = [start]
+    neighbours = grid_map.neighbours
+    for current in order:
+        for neighbour in neighbours(current):
+            if not seen[neighbour]:
+                seen[neighbour] = 1
+                order.append(neighbour)
+
+    return order
+
+
+def random_queries(grid_map, count, seed=0, attempts=100):
+    """
+    picks start and goal pairs that are connected
+    every goal is drawn from the farther half of the cells reachable from its start so the queries are not trivial
+    :param grid_map: the GridMap
+    :param count: number of queries
+    :param seed: random seed
+    :param attempts: number of random starts tried per query before giving up
+    :return: list of ((row, col), (row, col)) pairs, shorter than count if the map has too few connected cells
+    """
+    rnd = random.Random(seed)
+    free = [i for i in range(grid_map.size) if grid_map.cells[i] != WALL]
+    queries = []
+    for _ in range(count):
+        for _ in range(attempts):
+            if not free:
+                return queries
+            start = rnd.choice(free)
+            order = reachable(grid_map, start)
+            if len(order) > 1:
+                goal = rnd.choice(order[len(order) // 2:])
+                queries.append((grid_map.pos(start), grid_map.pos(goal)))
+                break
+        else:
+            return queries
+
+    return queries
@@ -0,0 +1,191 @@
+"""
+Open list backends for the informed searches
+None of the engine is multithreaded so the backends avoid the locking done by queue.PriorityQueue
+Every backend exposes the same methods:
+    push(node, priority): adds a node, or lowers its priority if the backend supports decrease-key
+    pop(): removes and returns the (priority, node) pair with the lowest priority
+    len(): number of entries in the list, stale duplicates included
+Equal priorities are popped in insertion order by every backend
+"""
+from collections import deque
+from heapq import heappush, heappop
+
+from .stats import CountingOpenList, collecting_stats
+
+
+class BinaryHeap:
+    """
+    a plain binary heap built on heapq
+    pushing a node that is already in the heap adds a duplicate entry, the search has to skip the stale one
+    """
+    decrease_key = False
+
+    def __init__(self):
+        self.heap = []
+        self.count = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, node, priority):
+        self.count += 1
+        heappush(self.heap, (priority, self.count, node))
+
+    def pop(self):
+        priority, _, node = heappop(self.heap)
+        return priority, node
+
+
+class IndexedHeap:
+    """
+    a binary heap that keeps the position of every node so a node is never stored twice
+    pushing a node that is already in the heap changes its priority in place (decrease-key)
+    ------------------------------------
+    data fields
+    ------------------------------------
+    heap: list of [priority, count, node] entries
+    position: dictionary holding the heap position of every node in the heap
+    """
+    decrease_key = True
+
+    def __init__(self):
+        self.heap = []
+        self.position = {}
+        self.count = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, node):
+        return node in self.position
+
+    def push(self, node, priority):
+        self.count += 1
+        if node in self.position:
+            i = self.position[node]
+            entry = self.heap[i]
+            old_priority = entry[0]
+            entry[0] = priority
+            entry[1] = self.count
+            if priority < old_priority:
+                self.sift_up(i)
+            else:
+                self.sift_down(i)
+            return
+
+        self.heap.append([priority, self.count, node])
+        self.position[node] = len(self.heap) - 1
+        self.sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        del self.position[top[2]]
+        if heap:
+            heap[0] = last
+            self.position[last[2]] = 0
+            self.sift_down(0)
+
+        return top[0], top[2]
+
+    def sift_up(self, i):
+        heap = self.heap
+        position = self.position
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[i] = heap[parent]
+            position[heap[i][2]] = i
+            i = parent
+
+        heap[i] = entry
+        position[entry[2]] = i
+
+    def sift_down(self, i):
+        heap = self.heap
+        position = self.position
+        size = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[i] = heap[child]
+            position[heap[i][2]] = i
+            i = child
+
+        heap[i] = entry
+        position[entry[2]] = i
+
+
+class BucketQueue:
+    """
+    a bucket (Dial) queue for small non negative integer priorities like the unit cost grid scores
+    every priority owns a FIFO bucket and the cursor only walks forward while the priorities are monotone
+    pushing a node that is already in the queue adds a duplicate entry, the search has to skip the stale one
+    ------------------------------------
+    data fields
+    ------------------------------------
+    buckets: list of deques, buckets[p] holds the nodes of priority p
+    cursor: the lowest priority that can hold a node
+    size: number of nodes in all the buckets
+    """
+    decrease_key = False
+
+    def __init__(self):
+        self.buckets = []
+        self.cursor = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, node, priority):
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append(deque())
+        buckets[priority].append(node)
+        if priority < self.cursor:
+            self.cursor = priority
+        self.size += 1
+
+    def pop(self):
+        buckets = self.buckets
+        cursor = self.cursor
+        while not buckets[cursor]:
+            cursor += 1
+        self.cursor = cursor
+        self.size -= 1
+        return cursor, buckets[cursor].popleft()
+
+
+# every open list backend by its name
+OPEN_LISTS = {
+    "binary": BinaryHeap,
+    "indexed": IndexedHeap,
+    "bucket": BucketQueue,
+}
+
+
+def make_open_list(name="binary", integer_priorities=True):
+    """
+    creates an empty open list
+    :param name: a key of OPEN_LISTS
+    :param integer_priorities: False when the priorities can be fractional, like the costs of diagonal moves
+    :return: the open list object, wrapped in a CountingOpenList while a SearchStats collects in the current thread
+    """
+    if name not in OPEN_LISTS:
+        raise ValueError("unknown open list '{}', expected one of {}".format(name, ", ".join(OPEN_LISTS)))
+    if name == "bucket" and not integer_priorities:
+        raise ValueError("the bucket open list needs integer priorities, it cannot be used with diagonal moves")
+
+    queue = OPEN_LISTS[name]()
+    stats = collecting_stats()
+    return queue if stats is None else CountingOpenList(queue, stats)
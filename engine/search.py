@@ -0,0 +1,376 @@
+"""
+Headless implementations of the single direction search algorithms
+They run on a GridMap at full speed and report every state change through an optional on_update callback
+"""
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+from .grid import OPEN, CLOSED
+from .openlist import make_open_list
+
+# the SearchSpace of every GridMap, reused by its next search
+SEARCH_SPACES = weakref.WeakKeyDictionary()
+
+
+class SearchResult:
+    """
+    the outcome of a headless search
+    ------------------------------------
+    data fields
+    ------------------------------------
+    found: boolean True if a path exists
+    path: list of (row, col) positions from start to goal, empty if no path exists
+    cost: total move cost of the path, None if no path exists
+    expanded: number of nodes expanded by the search
+    max_open: peak size of the open list (queue, stack or heap, stale entries included) during the search
+    """
+
+    def __init__(self, found=False, path=None, cost=None, expanded=0, max_open=0):
+        self.found = found
+        self.path = path if path is not None else []
+        self.cost = cost
+        self.expanded = expanded
+        self.max_open = max_open
+
+    def __repr__(self):
+        return "SearchResult(found={}, cost={}, expanded={})".format(self.found, self.cost, self.expanded)
+
+
+def reconstruct_path(path_dict, start, end):
+    """
+    backtracks the parents from the goal to the start
+    :param path_dict: a list or dictionary that maps every opened node index to its parent index
+    :param start: start index
+    :param end: goal index
+    :return: list of indices from start to goal
+    """
+    path = [end]
+    while path[-1] != start:
+        path.append(path_dict[path[-1]])
+
+    return path[::-1]
+
+
+def make_result(grid_map, path, expanded, max_open=0):
+    """
+    wraps a path of indices in a SearchResult
+    :param grid_map: the GridMap that was searched
+    :param path: list of indices from start to goal or None if no path exists
+    :param expanded: number of expanded nodes
+    :param max_open: peak size of the open list
+    :return: SearchResult object
+    """
+    if path is None:
+        return SearchResult(False, expanded=expanded, max_open=max_open)
+
+    return SearchResult(True, [grid_map.pos(i) for i in path], grid_map.path_cost(path), expanded, max_open)
+
+
+class SearchSpace:
+    """
+    the per cell arrays of the searches of one GridMap, kept from search to search so they are allocated only once
+    the entries of a cell belong to the current search only if its stamp is the current generation, or the next
+    number for the cells a search marks as closed; reset() raises the generation past both so it invalidates the
+    visited, score and parent entries of every cell in O(1)
+    ------------------------------------
+    data fields
+    ------------------------------------
+    size: number of cells
+    generation: the stamp of the cells reached by the current search
+    stamps: list of the generation every cell was last reached in
+    scores: list of the g score, or distance, of every cell
+    parents: list of the parent index of every cell
+    ------------------------------------
+    methods
+    ------------------------------------
+    reset: starts a new search
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.generation = 0
+        self.stamps = [0] * size
+        self.scores = [0] * size
+        self.parents = [-1] * size
+
+    def reset(self):
+        self.generation += 2
+        return self.generation
+
+
+@contextmanager
+def search_space(grid_map):
+    """
+    lends the SearchSpace of a grid to one search, already reset
+    the space is taken out of the cache while it is in use, so a search running at the same time on the same grid
+    in another thread gets a new one
+    :param grid_map: the GridMap to search
+    :return: context manager yielding a SearchSpace
+    """
+    space = SEARCH_SPACES.pop(grid_map, None)
+    if space is None or space.size != grid_map.size:
+        space = SearchSpace(grid_map.size)
+    space.reset()
+    try:
+        yield space
+    finally:
+        SEARCH_SPACES[grid_map] = space
+
+
+def a_star(grid_map, start, end, on_update=None, open_list="binary", heuristic=None):
+    """
+    A* search with f(x) = g(x) + h(x) where g(x) is the path cost and h(x) the grid_map.heuristic() distance
+    the heuristic is consistent on the grid so a closed node is never reopened
+    it guarantees the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :param heuristic: optional consistent function h(index, goal index) replacing grid_map.heuristic,
+                      like the landmark heuristic of engine.landmarks
+    :return: SearchResult object
+    """
+    start = grid_map.index(start)
+    end = grid_map.index(end)
+    if heuristic is None:
+        heuristic = grid_map.heuristic
+    heap = make_open_list(open_list, grid_map.connectivity == 4)
+    heap.push(start, heuristic(start, end))
+    expanded = 0
+    max_open = 0
+
+    with search_space(grid_map) as space:
+        opened = space.generation   # the g score and parent of a cell are valid when its stamp is at least opened
+        closed = opened + 1
+        stamps = space.stamps
+        g_score = space.scores
+        path_dict = space.parents
+        stamps[start] = opened
+        g_score[start] = 0
+
+        while heap:
+            if len(heap) > max_open:
+                max_open = len(heap)
+            current = heap.pop()[1]
+            if stamps[current] == closed:
+                continue  # stale entry of a node that was already expanded through a cheaper path
+
+            if current == end:  # goal node found
+                return make_result(grid_map, reconstruct_path(path_dict, start, end), expanded, max_open)
+
+            stamps[current] = closed
+            expanded += 1
+            current_g_score = g_score[current]
+            for neighbour, cost in grid_map.edges(current):
+                temp_g_score = current_g_score + cost
+                if stamps[neighbour] < opened:
+                    stamps[neighbour] = opened  # first reached by this search
+                elif temp_g_score >= g_score[neighbour]:
+                    continue
+                path_dict[neighbour] = current
+                g_score[neighbour] = temp_g_score  # g(x)
+                heap.push(neighbour, temp_g_score + heuristic(neighbour, end))  # f(x) = g(x) + h(x)
+                if on_update:
+                    on_update(neighbour, OPEN)
+
+            if on_update:
+                on_update(current, CLOSED)
+
+    return make_result(grid_map, None, expanded, max_open)
+
+
+def dijkstra(grid_map, start, end, on_update=None, open_list="binary"):
+    """
+    dijkstra's algorithm implemented with a heap
+    it guarantees the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :return: SearchResult object
+    """
+    start = grid_map.index(start)
+    end = grid_map.index(end)
+    expanded = 0
+    max_open = 0
+    heap = make_open_list(open_list, grid_map.connectivity == 4)
+    heap.push(start, 0)
+
+    with search_space(grid_map) as space:
+        reached = space.generation  # the distance and parent of a cell are valid when its stamp is reached
+        stamps = space.stamps
+        distance = space.scores
+        path_dict = space.parents
+        stamps[start] = reached
+        distance[start] = 0
+
+        while heap:
+            if len(heap) > max_open:
+                max_open = len(heap)
+            dist, current = heap.pop()
+            if dist > distance[current]:
+                continue  # stale entry of a node that was already reached with a lower distance
+            if current == end:
+                return make_result(grid_map, reconstruct_path(path_dict, start, end), expanded, max_open)
+
+            expanded += 1
+            for neighbour, cost in grid_map.edges(current):
+                new_distance = dist + cost
+                if stamps[neighbour] != reached:
+                    stamps[neighbour] = reached  # first reached by this search
+                elif new_distance >= distance[neighbour]:
+                    continue
+                path_dict[neighbour] = current
+                distance[neighbour] = new_distance
+                heap.push(neighbour, new_distance)
+                if on_update:
+                    on_update(neighbour, OPEN)
+
+            if on_update:
+                on_update(current, CLOSED)
+
+    return make_result(grid_map, None, expanded, max_open)
+
+
+def breadth_first_search(grid_map, start, end, on_update=None):
+    """
+    BFS implemented with a queue
+    it guarantees the path with the fewest moves, which is the shortest path on a 4 connected grid
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :return: SearchResult object
+    """
+    start = grid_map.index(start)
+    end = grid_map.index(end)
+    queue = deque([start])
+    expanded = 0
+    max_open = 0
+
+    with search_space(grid_map) as space:
+        opened = space.generation   # the stamp of the nodes opened by this search
+        stamps = space.stamps
+        path_dict = space.parents
+        stamps[start] = opened
+
+        while queue:
+            if len(queue) > max_open:
+                max_open = len(queue)
+            current = queue.popleft()
+            if current == end:
+                return make_result(grid_map, reconstruct_path(path_dict, start, end), expanded, max_open)
+
+            expanded += 1
+            for neighbour in grid_map.neighbours(current):
+                if stamps[neighbour] == opened:
+                    # if neighbour is already opened, then no need to open it anymore
+                    continue
+                path_dict[neighbour] = current  # making current as parent of all neighbours
+                queue.append(neighbour)
+                stamps[neighbour] = opened
+                if on_update:
+                    on_update(neighbour, OPEN)
+
+            if on_update:
+                on_update(current, CLOSED)
+
+    return make_result(grid_map, None, expanded, max_open)
+
+
+def depth_first_search(grid_map, start, end, on_update=None):
+    """
+    DFS implemented with a stack
+    it does not guarantee the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :return: SearchResult object
+    """
+    start = grid_map.index(start)
+    end = grid_map.index(end)
+    stack = [start]
+    expanded = 0
+    max_open = 0
+
+    with search_space(grid_map) as space:
+        opened = space.generation   # the stamp of the nodes opened by this search
+        stamps = space.stamps
+        path_dict = space.parents
+        stamps[start] = opened
+
+        while stack:
+            if len(stack) > max_open:
+                max_open = len(stack)
+            current = stack.pop()
+            if current == end:
+                return make_result(grid_map, reconstruct_path(path_dict, start, end), expanded, max_open)
+
+            expanded += 1
+            for neighbour in grid_map.neighbours(current):
+                if stamps[neighbour] == opened:
+                    # if neighbour is already opened, then no need to open it anymore
+                    continue
+                path_dict[neighbour] = current  # making current as parent of all neighbours
+                stack.append(neighbour)
+                stamps[neighbour] = opened
+                if on_update:
+                    on_update(neighbour, OPEN)
+
+            if on_update:
+                on_update(current, CLOSED)
+
+    return make_result(grid_map, None, expanded, max_open)
+
+
+def greedy_best_first(grid_map, start, end, on_update=None, open_list="binary"):
+    """
+    greedy best first search with f(x) = h(x)
+    it does not guarantee the shortest path
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param on_update: optional function called as on_update(index, state) every time a node is opened or closed
+    :param open_list: name of the open list backend, a key of engine.openlist.OPEN_LISTS
+    :return: SearchResult object
+    """
+    start = grid_map.index(start)
+    end = grid_map.index(end)
+    heuristic = grid_map.heuristic
+    heap = make_open_list(open_list, grid_map.connectivity == 4)
+    heap.push(start, heuristic(start, end))
+    expanded = 0
+    max_open = 0
+
+    with search_space(grid_map) as space:
+        opened = space.generation   # the stamp of the nodes opened by this search
+        stamps = space.stamps
+        path_dict = space.parents
+        stamps[start] = opened
+
+        while heap:
+            if len(heap) > max_open:
+                max_open = len(heap)
+            current = heap.pop()[1]
+
+            if current == end:  # goal node found
+                return make_result(grid_map, reconstruct_path(path_dict, start, end), expanded, max_open)
+
+            expanded += 1
+            for neighbour in grid_map.neighbours(current):
+                if stamps[neighbour] == opened:
+                    continue
+                path_dict[neighbour] = current
+                heap.push(neighbour, heuristic(neighbour, end))  # f(x) = h(x)
+                stamps[neighbour] = opened
+                if on_update:
+                    on_update(neighbour, OPEN)
+
+            if on_update:
+                on_update(current, CLOSED)
+
+    return make_result(grid_map, None, expanded, max_open)
@@ -0,0 +1,159 @@
+"""
+Instrumentation of the searches
+While a SearchStats collects in a thread, every open list that thread creates is wrapped in a CountingOpenList that
+counts the pushes and pops; the other counters are read from the SearchTrace and the SearchResult once the search
+finished, so the searches themselves are not changed and cost nothing extra when no stats are collected
+The counters of a run are written out as one JSON object per line (JSON Lines)
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from .grid import OPEN, CLOSED
+
+_local = threading.local()  # the SearchStats collecting in each thread
+
+
+class SearchStats:
+    """
+    the counters of one search
+    ------------------------------------
+    data fields
+    ------------------------------------
+    algorithm: name of the algorithm
+    rows: number of rows of the grid
+    cols: number of columns of the grid
+    connectivity: 4 or 8
+    start: (row, col) of the starting node
+    goal: (row, col) of the goal node
+    found: boolean True if a path was found, None until the search finished
+    cost: cost of the path
+    expanded: number of expanded nodes
+    pushes: number of entries pushed on the open lists, the opened nodes for the searches without an open list
+    pops: number of entries popped from the open lists, the expanded nodes for the searches without an open list
+    stale_pops: pops that expanded nothing, the stale or pruned entries and the pop of the goal
+    max_open: peak size of the frontier
+    opened: number of OPEN events
+    closed: number of CLOSED events
+    open_lists: number of counted open lists
+    cached: boolean True if the search was not run but replayed from a PathCache
+    search_seconds: time spent searching
+    draw_seconds: time spent drawing the grid while the search was shown
+    delay_seconds: time spent waiting between the frames while the search was shown
+    ------------------------------------
+    methods
+    ------------------------------------
+    finish: reads the counters of a finished search
+    as_dict: the counters as a dictionary
+    lines: the counters as short lines of text, for an on screen display
+    """
+
+    def __init__(self, algorithm, grid_map, start, goal):
+        self.algorithm = algorithm
+        self.rows = grid_map.rows
+        self.cols = grid_map.cols
+        self.connectivity = grid_map.connectivity
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+        self.found = None
+        self.cost = None
+        self.expanded = 0
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.max_open = 0
+        self.opened = 0
+        self.closed = 0
+        self.open_lists = 0
+        self.cached = False
+        self.search_seconds = 0.0
+        self.draw_seconds = 0.0
+        self.delay_seconds = 0.0
+
+    def finish(self, result, trace):
+        """
+        :param result: SearchResult of the search
+        :param trace: the SearchTrace that recorded the search
+        :return: None
+        """
+        self.found = result.found
+        self.cost = result.cost
+        self.expanded = result.expanded
+        self.max_open = result.max_open
+        self.opened = trace.states.count(OPEN)
+        self.closed = trace.states.count(CLOSED)
+        if not self.open_lists:
+            self.pushes = self.opened
+            self.pops = self.expanded
+        self.stale_pops = max(self.pops - self.expanded, 0)
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def lines(self):
+        state = "searching" if self.found is None else "found" if self.found else "not found"
+        return ["{}  {}{}".format(self.algorithm, state, "  (cached)" if self.cached else ""),
+                "expanded {}  peak open {}".format(self.expanded, self.max_open),
+                "pushes {}  pops {}  stale {}".format(self.pushes, self.pops, self.stale_pops),
+                "search {:.1f} ms".format(self.search_seconds * 1000),
+                "draw {:.1f} ms  wait {:.1f} ms".format(self.draw_seconds * 1000, self.delay_seconds * 1000)]
+
+
+class CountingOpenList:
+    """
+    an open list that counts the pushes and pops of the open list it wraps into a SearchStats
+    """
+
+    def __init__(self, queue, stats):
+        self.queue = queue
+        self.stats = stats
+        stats.open_lists += 1
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __contains__(self, node):
+        return node in self.queue
+
+    def push(self, node, priority):
+        self.stats.pushes += 1
+        self.queue.push(node, priority)
+
+    def pop(self):
+        self.stats.pops += 1
+        return self.queue.pop()
+
+
+def collecting_stats():
+    """
+    :return: the SearchStats collecting in the current thread, None if there is none
+    """
+    return getattr(_local, "stats", None)
+
+
+@contextmanager
+def collect(stats):
+    """
+    counts the open list operations of the searches run in the current thread and their time into stats
+    :param stats: SearchStats
+    :return: context manager
+    """
+    _local.stats = stats
+    begin = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.search_seconds += time.perf_counter() - begin
+        _local.stats = None
+
+
+def write_json(stats, path):
+    """
+    appends the counters of a search to a JSON Lines file
+    :param stats: SearchStats
+    :param path: path of the file
+    :return: None
+    """
+    with open(path, "a") as file:
+        file.write(json.dumps(stats.as_dict()) + "\n")
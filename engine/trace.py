@@ -0,0 +1,103 @@
+"""
+Recording of the cell state changes of a search
+A SearchTrace is passed as the on_update callback of any algorithm, it stores every (index, state) event
+so the search can run at full speed while a viewer replays the events later at its own pace
+"""
+from array import array
+
+from .grid import PATH
+from .stats import collect
+
+
+class SearchCancelled(Exception):
+    """
+    raised inside a search by a cancelled SearchTrace to stop it early
+    """
+
+
+class SearchTrace:
+    """
+    a compact log of the state changes of one search
+    it can be filled by one thread while another one reads the events that are already recorded
+    ------------------------------------
+    data fields
+    ------------------------------------
+    indices: array of the flat cell index of every event
+    states: bytearray of the cell state of every event
+    result: the SearchResult, None until the search finished
+    finished: boolean True once the search and the path events are recorded
+    cancelled: boolean True if cancel() stopped the search
+    ------------------------------------
+    methods
+    ------------------------------------
+    __call__: records one event, it is meant to be used as the on_update callback of the algorithms
+    finish: records the path events and the result of the search
+    cancel: stops the search at its next event
+    """
+
+    def __init__(self):
+        self.indices = array("l")
+        self.states = bytearray()
+        self.result = None
+        self.finished = False
+        self.cancelled = False
+
+    def __len__(self):
+        return len(self.states)
+
+    def __bool__(self):
+        # the algorithms test 'if on_update:' so an empty trace must still be true
+        return True
+
+    def __call__(self, index, state):
+        if self.cancelled:
+            raise SearchCancelled()
+        self.indices.append(index)
+        self.states.append(state)
+
+    def finish(self, grid_map, result):
+        """
+        appends one PATH event for every cell of the path and stores the result
+        :param grid_map: the GridMap that was searched
+        :param result: SearchResult of the search
+        :return: None
+        """
+        for pos in result.path:
+            self.indices.append(grid_map.index(pos))
+            self.states.append(PATH)
+        self.result = result
+        self.finished = True
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def record(search, grid_map, start, end, trace=None, stats=None, **kwargs):
+    """
+    runs a search to completion while recording its events
+    a cancelled search leaves the trace unfinished and the stats without a result
+    :param search: an engine algorithm function
+    :param grid_map: the GridMap to search
+    :param start: (row, col) of the starting node
+    :param end: (row, col) of the goal node
+    :param trace: the SearchTrace to fill, a new one is created if it is None
+    :param stats: optional SearchStats counting the open list operations and the time of the search
+    :param kwargs: extra keyword arguments forwarded to the algorithm
+    :return: the SearchTrace
+    """
+    if trace is None:
+        trace = SearchTrace()
+
+    try:
+        if stats is None:
+            result = search(grid_map, start, end, on_update=trace, **kwargs)
+        else:
+            with collect(stats):
+                result = search(grid_map, start, end, on_update=trace, **kwargs)
+    except SearchCancelled:
+        return trace
+
+    if stats is not None:
+        stats.finish(result, trace)    # before the trace, a viewer reads the stats as soon as the trace finished
+    trace.finish(grid_map, result)
+    return trace
@@ -1,4 +1,12 @@
+from functools import lru_cache
+
 import pygame
+from engine import GridMap, FREE, WALL, OPEN, CLOSED, PATH, START, GOAL, maps, layout_hash, zobrist_key
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, only the ArrayRenderer needs it
+    numpy = None
 
 # initializing the constants
 CLOSED_COLOR = (174, 230, 230)
@@ -9,115 +17,243 @@ START_COLOR = (254, 152, 1)
 GOAL_COLOR = (204, 14, 116)
 PATH_COLOR = (10, 4, 60)
 WHITE = (255, 255, 255)
+HEAT_NEAR_COLOR = (253, 231, 37)  # the heatmap color of the cells next to the goal
+HEAT_FAR_COLOR = (33, 145, 140)  # the heatmap color of the cells farthest from the goal
+LINES_KEY = (0, 0, 0)  # transparent color of the pre-rendered grid lines
+FULL_REDRAW_FRACTION = 4  # the whole window is redrawn once more than 1/4 of the cells changed in one frame
+GRID_LINES_MIN_GAP = 4  # cells smaller than this many pixels are drawn without grid lines
+ARRAY_RENDERER_MIN_ROWS = 100  # grids with this many rows are drawn by the ArrayRenderer when numpy is installed
+
+# the color of every cell state, indexed by the state byte
+PALETTE = [None] * 7
+PALETTE[FREE] = BASE_COLOR
+PALETTE[WALL] = WALL_COLOR
+PALETTE[OPEN] = OPEN_COLOR
+PALETTE[CLOSED] = CLOSED_COLOR
+PALETTE[PATH] = PATH_COLOR
+PALETTE[START] = START_COLOR
+PALETTE[GOAL] = GOAL_COLOR
+
+# the state shown by a pixel that covers several cells is the one with the highest rank
+# so walls, the path, the start and the goal stay visible when a large grid is downsampled
+RANKS = [FREE, CLOSED, OPEN, WALL, PATH, START, GOAL]
+RANK_OF = [RANKS.index(state) for state in range(len(RANKS))]  # the rank of every state
+
+# maps the open, closed and path states to free and keeps the other states, see Grid.clear_search()
+SEARCH_CLEARED = bytes(FREE if state in (OPEN, CLOSED, PATH) else state for state in range(256))
+
+
+class Grid(GridMap):
+    """
+    the square grid shown in the pygame window
+    it stores one state byte per cell in the GridMap 'cells' and creates Node views only when they are asked for
+    'width' is the window width and 'gap' the pixel size of each cell
+    grid[row][col] returns the Node view of a cell and iterating over the grid yields its rows
+    'dirty' lists the index of every cell changed since the last frame of the Renderer
+    'full_redraw' asks the renderers to draw every cell in the next frame
+    'layout_hash' is the Zobrist hash of the walls, updated by set_state() with one xor when a wall is painted or erased
+    """
+
+    def __init__(self, rows, width, connectivity=4):
+        super().__init__(rows, connectivity=connectivity)
+        self.width = width
+        self.gap = width // rows
+        self.dirty = []
+        self.full_redraw = False
+        self.layout_hash = 0
+
+    def set_state(self, index, state):
+        """
+        changes the state of a cell and marks it to be redrawn
+        :param index: flat index of the cell
+        :param state: the new state byte
+        :return: None
+        """
+        if (self.cells[index] == WALL) != (state == WALL):
+            self.layout_hash ^= zobrist_key(index)
+        self.cells[index] = state
+        self.dirty.append(index)
+
+    def clear_search(self):
+        """
+        clears the open, closed and path cells of the last search, the walls, start and goal stay
+        :return: None
+        """
+        self.cells[:] = bytes(self.cells).translate(SEARCH_CLEARED)
+        self.full_redraw = True
+
+    def node(self, row, col):
+        return Node(self, row, col)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.rows:
+            raise IndexError("grid row out of range")
+        return GridRow(self, row)
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield GridRow(self, row)
+
+
+class GridRow:
+    """
+    a lazy row of Node views so that grid[row][col] keeps working on the flat grid
+    """
+    __slots__ = ("grid", "row")
+
+    def __init__(self, grid, row):
+        self.grid = grid
+        self.row = row
+
+    def __len__(self):
+        return self.grid.cols
+
+    def __getitem__(self, col):
+        if not 0 <= col < self.grid.cols:
+            raise IndexError("grid column out of range")
+        return Node(self.grid, self.row, col)
+
+    def __iter__(self):
+        for col in range(self.grid.cols):
+            yield Node(self.grid, self.row, col)
 
 
 class Node:
     """
-        This class is for each Node in the grid
+        This class is a thin view of one cell of the Grid, it holds no state of its own
         'row' and 'col' are the row and column number in the grid
-        'width' and 'total_rows' are the window width and total row count in the grid
+        'index' is the flat position of the cell in the grid's bytearray
+        'width' and 'total_rows' are the cell width and total row count in the grid
         'x' and 'y' are the (x,y) coordinates in the pygame window. It is calculated by row * width or col * width
-        'neighbours[]' hold all the four neighbours of each node
-        'color' holds the color of node
+        'neighbours' returns the non wall neighbours of the cell computed from the grid
+        'color' returns the color of the cell state
 
-        we will recognize each node as a wall, start, end, open, closed, path etc by the colors
-        so the get methods check the 'color' field and returns boolean
-        and the make methods set the 'color' field to the respective color
+        we will recognize each node as a wall, start, end, open, closed, path etc by the state byte of its cell
+        so the get methods check the cell and returns boolean
+        and the make methods set the cell to the respective state and mark it to be redrawn
+        two views of the same cell are equal
 
         draw() method draws a rectangle along the x, y coordinates with ('width' x 'width') dimension
         and fills with the 'color'
     """
+    __slots__ = ("grid", "row", "col", "index")
 
-    def __init__(self, row, col, width, total_rows):
-
+    def __init__(self, grid, row, col):
+        self.grid = grid
         self.row = row
         self.col = col
+        self.index = row * grid.cols + col
 
-        self.width = width
-        self.total_rows = total_rows
+    @property
+    def width(self):
+        return self.grid.gap
+
+    @property
+    def total_rows(self):
+        return self.grid.rows
+
+    @property
+    def x(self):
+        return self.row * self.grid.gap
+
+    @property
+    def y(self):
+        return self.col * self.grid.gap
 
-        self.x = row * width
-        self.y = col * width
+    @property
+    def color(self):
+        return PALETTE[self.grid.cells[self.index]]
 
-        self.neighbours = []
-        self.color = BASE_COLOR
+    @property
+    def neighbours(self):
+        cols = self.grid.cols
+        return [Node(self.grid, *divmod(i, cols)) for i in self.grid.neighbours(self.index)]
 
     def get_pos(self):
         return self.row, self.col
 
     def is_closed(self):
-        return self.color == CLOSED_COLOR
+        return self.grid.cells[self.index] == CLOSED
 
     def is_open(self):
-        return self.color == OPEN_COLOR
+        return self.grid.cells[self.index] == OPEN
 
     def is_start(self):
-        return self.color == START_COLOR
+        return self.grid.cells[self.index] == START
 
     def is_end(self):
-        return self.color == GOAL_COLOR
+        return self.grid.cells[self.index] == GOAL
 
     def is_wall(self):
-        return self.color == WALL_COLOR
+        return self.grid.cells[self.index] == WALL
 
     def reset(self):
-        self.color = BASE_COLOR
+        self.grid.set_state(self.index, FREE)
 
     def make_start(self):
-        self.color = START_COLOR
+        self.grid.set_state(self.index, START)
 
     def make_end(self):
-        self.color = GOAL_COLOR
+        self.grid.set_state(self.index, GOAL)
 
     def make_wall(self):
-        self.color = WALL_COLOR
+        self.grid.set_state(self.index, WALL)
 
     def make_open(self):
-        self.color = OPEN_COLOR
+        self.grid.set_state(self.index, OPEN)
 
     def make_closed(self):
-        self.color = CLOSED_COLOR
+        self.grid.set_state(self.index, CLOSED)
 
     def make_path(self):
-        self.color = PATH_COLOR
+        self.grid.set_state(self.index, PATH)
 
     def draw(self, win):
-        pygame.draw.rect(win, self.color, (self.x, self.y, self.width, self.width))
+        gap = self.grid.gap
+        pygame.draw.rect(win, self.color, (self.row * gap, self.col * gap, gap, gap))
 
-    def update_neighbour(self, grid):
+    def __eq__(self, other):
+        return isinstance(other, Node) and self.grid is other.grid and self.index == other.index
 
-        if self.row < self.total_rows - 1 and not grid[self.row + 1][self.col].is_wall():  # bottom
-            self.neighbours.append(grid[self.row + 1][self.col])
-
-        if self.row > 0 and not grid[self.row - 1][self.col].is_wall():  # top
-            self.neighbours.append(grid[self.row - 1][self.col])
-
-        if self.col < self.total_rows - 1 and not grid[self.row][self.col + 1].is_wall():  # right
-            self.neighbours.append(grid[self.row][self.col + 1])
-
-        if self.col > 0 and not grid[self.row][self.col - 1].is_wall():  # bottom
-            self.neighbours.append(grid[self.row][self.col - 1])
+    def __hash__(self):
+        return hash((id(self.grid), self.index))
 
     def __lt__(self, other):
         # less than method used to compare objects
         return False
 
 
-def make_grid(rows, width):
+def make_grid(rows, width, connectivity=4):
     """
-    makes a list representation of the grid
+    makes the grid shown in the window
     :param rows: number of rows we want in the grid of (row x row) dimension
     :param width: width of the pygame window
-    :return: a 2d (row x row) length list of Node objects
+    :param connectivity: 4 for up, down, left and right moves only, 8 to also allow diagonal moves
+    :return: a (row x row) Grid with one state byte per cell, grid[row][col] gives the Node view of a cell
     """
-    grid = []
-    gap = width // rows  # gives the dimension of each node square. 700 // 20 = 35 => each node = 35x35 px
-    for i in range(rows):
-        grid.append([])  # adding column list
-        for j in range(rows):
-            node = Node(i, j, gap, rows)
-            grid[i].append(node)
+    return Grid(rows, width, connectivity)
+
 
+def load_grid(path, width, connectivity=4):
+    """
+    opens a map file or a PNG image in the window, see engine.maps.load()
+    the grid is square so a rectangular map is padded with walls on the right or at the bottom
+    :param path: path of the file
+    :param width: width of the pygame window
+    :param connectivity: 4 for up, down, left and right moves only, 8 to also allow diagonal moves
+    :return: a Grid holding the walls of the map
+    """
+    grid_map = maps.load(path, connectivity)
+    rows = max(grid_map.rows, grid_map.cols, 1)
+    grid = Grid(rows, width, connectivity)
+    cols = grid_map.cols
+    grid.cells[:] = bytes([WALL]) * grid.size
+    for row in range(grid_map.rows):
+        grid.cells[row * rows:row * rows + cols] = grid_map.cells[row * cols:(row + 1) * cols]
+    grid.layout_hash = layout_hash(grid)
     return grid
 
 
@@ -131,44 +267,338 @@ def draw_grid_lines(win, rows, width):
     """
     gap = width // rows
     for i in range(rows):
-        # draws the top and bottom horizontal lines of each cell
-        pygame.draw.line(win, WHITE, (0, i * gap), (width, i * gap))
-        for j in range(rows):
-            # draws the left and right vertical lines of each cell
-            pygame.draw.line(win, WHITE, (j * gap, 0), (j * gap, width))
+        pygame.draw.line(win, WHITE, (0, i * gap), (width, i * gap))  # the top line of the cells in the i-th row
+        pygame.draw.line(win, WHITE, (i * gap, 0), (i * gap, width))  # the left line of the cells in the i-th column
+
+
+@lru_cache(maxsize=4)
+def make_grid_lines(rows, width):
+    """
+    pre-renders the grid lines on a surface that is blitted over the cells instead of drawing the lines every frame
+    :param rows: number of rows we want in the grid of (row x row) dimension
+    :param width: width of the pygame window
+    :return: a (width x width) pygame Surface where only the lines are opaque
+    """
+    lines = pygame.Surface((width, width))
+    lines.fill(LINES_KEY)
+    lines.set_colorkey(LINES_KEY)
+    draw_grid_lines(lines, rows, width)
+    return lines
 
 
 def draw(win, grid, rows, width):
     """
-    converts the list represented grid to pygame visuals
+    converts the grid to pygame visuals, the whole window is redrawn
     :param win: pygame window
-    :param grid: 2d list of (rows x rows) dimension
+    :param grid: the Grid of (rows x rows) dimension
     :param rows: number of rows we want in the grid of (row x row) dimension
     :param width: width of the pygame window
     :return: None
     """
     win.fill(BASE_COLOR)  # initiates the screen
 
-    for row in grid:  # draws the cells(nodes)
-        for node in row:
-            node.draw(win)
-
-    draw_grid_lines(win, rows, width)  # draws the grid lines
+    gap = width // rows
+    cells = grid.cells
+    if gap == 0:  # more rows than pixels, every pixel shows the highest ranked of the cells it covers
+        shown = {}
+        for index in range(grid.size):
+            state = cells[index]
+            if state != FREE:
+                row, col = divmod(index, grid.cols)
+                pixel = (cell_pixel(row, rows, width), cell_pixel(col, rows, width))
+                if RANK_OF[state] > RANK_OF[shown.get(pixel, FREE)]:
+                    shown[pixel] = state
+        for pixel, state in shown.items():
+            win.set_at(pixel, PALETTE[state])
+    else:
+        for index in range(grid.size):  # draws the cells(nodes), the fill already painted the free ones
+            state = cells[index]
+            if state != FREE:
+                row, col = divmod(index, grid.cols)
+                win.fill(PALETTE[state], (row * gap, col * gap, gap, gap))
+
+    if gap >= GRID_LINES_MIN_GAP:
+        win.blit(make_grid_lines(rows, width), (0, 0))  # draws the grid lines
+    grid.dirty.clear()
+    grid.full_redraw = False
     pygame.display.update()  # updates pygame window
 
 
+class Renderer:
+    """
+    draws a Grid in the pygame window frame after frame
+    only the cells listed in the grid's 'dirty' list are repainted and only their rectangles are sent to the screen
+    ------------------------------------
+    data fields
+    ------------------------------------
+    win: pygame window
+    width: width of the pygame window
+    grid: the Grid drawn by the last frame, any other grid is drawn in full
+    ------------------------------------
+    methods
+    ------------------------------------
+    draw: draws the cells changed since the last frame
+    redraw: draws the whole grid
+    """
+
+    def __init__(self, win, width):
+        self.win = win
+        self.width = width
+        self.grid = None
+
+    def redraw(self, grid):
+        """
+        draws the whole grid and updates the whole window
+        :param grid: the Grid to draw
+        :return: None
+        """
+        self.grid = grid
+        draw(self.win, grid, grid.rows, self.width)
+
+    def draw(self, grid):
+        """
+        repaints the cells changed since the last frame together with their part of the grid lines
+        a new grid, or a frame where a large part of the grid changed, is redrawn in full
+        :param grid: the Grid to draw
+        :return: None
+        """
+        dirty = grid.dirty
+        if grid is not self.grid or grid.full_redraw or len(dirty) > grid.size // FULL_REDRAW_FRACTION:
+            self.redraw(grid)
+            return
+        if not dirty:
+            return
+
+        win = self.win
+        cells = grid.cells
+        cols = grid.cols
+        gap = grid.gap
+        lines = make_grid_lines(grid.rows, self.width) if gap >= GRID_LINES_MIN_GAP else None
+        rects = []
+        for index in set(dirty):
+            row, col = divmod(index, cols)
+            if gap:
+                rect = pygame.Rect(row * gap, col * gap, gap, gap)
+                state = cells[index]
+            else:  # the pixel covering the cell shows the highest ranked of its cells
+                x = cell_pixel(row, grid.rows, self.width)
+                y = cell_pixel(col, grid.cols, self.width)
+                rect = pygame.Rect(x, y, 1, 1)
+                state = max((cells[r * cols + c] for r in pixel_cells(x, grid.rows, self.width)
+                             for c in pixel_cells(y, grid.cols, self.width)), key=RANK_OF.__getitem__)
+            win.fill(PALETTE[state], rect)
+            if lines is not None:
+                win.blit(lines, rect, rect)
+            rects.append(rect)
+
+        dirty.clear()
+        pygame.display.update(rects)
+
+
+class ArrayRenderer:
+    """
+    draws a Grid in the pygame window with a few numpy operations per frame instead of one rectangle per cell
+    the cell states are mapped through a color palette, scaled up to the cell size and copied with pygame.surfarray
+    a grid with more rows than the window has pixels is downsampled, each pixel shows the highest ranked state
+    of the cells it covers (see RANKS)
+    ------------------------------------
+    data fields
+    ------------------------------------
+    win: pygame window
+    width: width of the pygame window
+    grid: the Grid drawn by the last frame, any other grid is drawn even if none of its cells changed
+    palette: numpy (7, 3) array of the RGB color of every rank
+    ranks: numpy array of the rank of every state
+    ------------------------------------
+    methods
+    ------------------------------------
+    draw: draws the whole grid if any of its cells changed since the last frame
+    redraw: draws the whole grid
+    """
+
+    def __init__(self, win, width):
+        if numpy is None:
+            raise ImportError("ArrayRenderer requires numpy, install it with 'pip install numpy'")
+
+        self.win = win
+        self.width = width
+        self.grid = None
+        self.ranks = numpy.zeros(len(RANKS), dtype=numpy.uint8)
+        self.ranks[RANKS] = numpy.arange(len(RANKS))
+        self.palette = numpy.array([PALETTE[state] for state in RANKS], dtype=numpy.uint8)
+
+    def samples(self, cells):
+        """
+        splits the cells of one axis into one block per pixel
+        :param cells: number of cells along the axis, larger than the window width
+        :return: list of numpy index arrays, the j-th one holds the j-th cell of every block
+                 (or its last cell if the block is shorter) so the maximum over the arrays reduces every block
+        """
+        width = self.width
+        starts = numpy.arange(width) * cells // width
+        stops = numpy.append(starts[1:], cells)
+        longest = int((stops - starts).max())
+        return [numpy.minimum(starts + j, stops - 1) for j in range(longest)]
+
+    def pixels(self, grid):
+        """
+        converts the cells to pixel colors
+        :param grid: the Grid to draw
+        :return: numpy uint8 array of shape (x, y, 3) where x = rows * gap, or the window width if it is downsampled
+        """
+        ranks = self.ranks[grid.as_array()]
+        if grid.rows > self.width or grid.cols > self.width:
+            # downsample with a maximum over a few strided gathers, much faster than numpy.maximum.reduceat
+            row_samples = self.samples(grid.rows)
+            blocks = ranks[row_samples[0]]
+            for sample in row_samples[1:]:
+                numpy.maximum(blocks, ranks[sample], out=blocks)
+            col_samples = self.samples(grid.cols)
+            ranks = blocks[:, col_samples[0]]
+            for sample in col_samples[1:]:
+                numpy.maximum(ranks, blocks[:, sample], out=ranks)
+            return self.palette[ranks]
+
+        gap = grid.gap
+        return self.palette[ranks].repeat(gap, axis=0).repeat(gap, axis=1)
+
+    def redraw(self, grid):
+        """
+        draws the whole grid and updates the whole window
+        :param grid: the Grid to draw
+        :return: None
+        """
+        self.grid = grid
+        pixels = self.pixels(grid)
+        win = self.win
+        if pixels.shape[0] < self.width or pixels.shape[1] < self.width:
+            win.fill(BASE_COLOR)  # the margin left when the width is not a multiple of the rows
+        pygame.surfarray.blit_array(win.subsurface((0, 0, pixels.shape[0], pixels.shape[1])), pixels)
+        if grid.gap >= GRID_LINES_MIN_GAP:
+            win.blit(make_grid_lines(grid.rows, self.width), (0, 0))
+
+        grid.dirty.clear()
+        grid.full_redraw = False
+        pygame.display.update()
+
+    def draw(self, grid):
+        """
+        draws the grid if it is a new grid or if any of its cells changed since the last frame
+        :param grid: the Grid to draw
+        :return: None
+        """
+        if grid is not self.grid or grid.dirty or grid.full_redraw:
+            self.redraw(grid)
+
+
+def draw_heatmap(win, grid, field, width, path=None):
+    """
+    paints the distance of every free cell to the goal of a flow field, from HEAT_NEAR_COLOR next to the goal to
+    HEAT_FAR_COLOR for the farthest cells; the walls, the unreachable cells, the start and the goal keep their colors
+    the heatmap stays in the window until the renderer draws the grid in full again
+    :param win: pygame window
+    :param grid: the Grid the field was computed on
+    :param field: engine FlowField
+    :param width: width of the pygame window
+    :param path: optional list of (row, col) positions painted with the path color over the heatmap
+    :return: None
+    """
+    near = HEAT_NEAR_COLOR
+    far = HEAT_FAR_COLOR
+    gap = grid.gap
+    if numpy is None:
+        inf = float("inf")
+        limit = max((distance for distance in field.distances if distance < inf), default=0) or 1
+        cells = grid.cells
+        for index, distance in enumerate(field.distances):
+            row, col = divmod(index, grid.cols)
+            if cells[index] in (FREE, OPEN, CLOSED, PATH) and distance < inf:
+                ratio = distance / limit
+                color = tuple(round(a + (b - a) * ratio) for a, b in zip(near, far))
+            else:
+                color = PALETTE[cells[index]]
+            win.fill(color, cell_rect(row, col, grid.rows, width))
+        for row, col in path or ():
+            win.fill(PATH_COLOR, cell_rect(row, col, grid.rows, width))
+    else:
+        distances = field.as_array()
+        reachable = numpy.isfinite(distances) & (grid.as_array() != WALL)
+        limit = distances[reachable].max() if reachable.any() else 0
+        ratio = (numpy.where(reachable, distances, 0) / (limit or 1))[:, :, None]
+        pixels = (numpy.array(near) + (numpy.array(far) - numpy.array(near)) * ratio).round().astype(numpy.uint8)
+        states = grid.as_array()
+        kept = ~reachable | (states == START) | (states == GOAL)
+        pixels[kept] = numpy.array(PALETTE, dtype=numpy.uint8)[states[kept]]
+        for row, col in path or ():
+            pixels[row, col] = PATH_COLOR
+        if grid.rows > width:  # one cell per pixel, the nearest one
+            pixels = pixels[numpy.arange(width) * grid.rows // width][:, numpy.arange(width) * grid.cols // width]
+        else:
+            pixels = pixels.repeat(gap, axis=0).repeat(gap, axis=1)
+        pygame.surfarray.blit_array(win.subsurface((0, 0, pixels.shape[0], pixels.shape[1])), pixels)
+
+    if gap >= GRID_LINES_MIN_GAP:
+        win.blit(make_grid_lines(grid.rows, width), (0, 0))
+    pygame.display.update()
+
+
+def make_renderer(win, width, rows):
+    """
+    chooses the renderer of a grid size
+    small grids redraw only their changed cells, large grids are drawn with numpy when it is installed
+    :param win: pygame window
+    :param width: width of the pygame window
+    :param rows: number of rows we want in the grid of (row x row) dimension
+    :return: a Renderer or an ArrayRenderer
+    """
+    if numpy is not None and rows >= ARRAY_RENDERER_MIN_ROWS:
+        return ArrayRenderer(win, width)
+    return Renderer(win, width)
+
+
+def cell_pixel(cell, cells, width):
+    """
+    :param cell: row or column of a cell of a grid with more cells than pixels along that axis
+    :param cells: number of cells along the axis
+    :param width: width of the pygame window
+    :return: the pixel covering the cell, pixel p covers the cells p * cells // width to (p + 1) * cells // width - 1
+    """
+    return ((cell + 1) * width - 1) // cells
+
+
+def pixel_cells(pixel, cells, width):
+    """
+    :return: range of the cells covered by a pixel along one axis, see cell_pixel()
+    """
+    return range(pixel * cells // width, (pixel + 1) * cells // width)
+
+
+def cell_rect(row, col, rows, width):
+    """
+    :return: (x, y, w, h) rectangle of a cell in the window, the pixel covering it when there are more rows than pixels
+    """
+    gap = width // rows
+    if gap:
+        return row * gap, col * gap, gap, gap
+    return cell_pixel(row, rows, width), cell_pixel(col, rows, width), 1, 1
+
+
 def get_clicked_node(pos, rows, width):
     """
     converts the mouse clicked screen position (x, y) to (row, col) of the grid
     :param pos: (x, y) coordinates
     :param rows: number of rows we want in the grid of (row x row) dimension
     :param width: width of the pygame window
-    :return: (row, col) denoting the row and column index in the list representation of the grid
+    :return: (row, col) denoting the row and column index in the list representation of the grid,
+             None for a click outside the cells, in the margin left when the width is not a multiple of the rows
     """
-    gap = width // rows
     y, x = pos
-
-    row = y // gap
-    col = x // gap
-
+    if rows > width:  # every pixel covers several cells of the downsampled grid
+        row, col = y * rows // width, x * rows // width
+    else:
+        gap = width // rows
+        row, col = y // gap, x // gap
+
+    if not (0 <= row < rows and 0 <= col < rows):
+        return None
     return row, col
@@ -1,7 +1,10 @@
 import pygame
 import grid
 import algorithms
+import engine
 import sys
+import time
+import argparse
 from pygame.locals import *
 
 # initiating pygame
@@ -11,11 +14,23 @@ icon = pygame.image.load('assets/icon.ico')
 pygame.display.set_icon(icon)
 
 # initializing the constants
-FPS = 30  # the pygame FPS
+FPS = 60  # the pygame FPS
 ROW = 25  # number of rows and cols of the grid as it is a square grid
+# the grid sizes chosen with the arrow keys, the large ones are only drawn fast enough with numpy
+GRID_SIZES = (20, 25, 35) + ((100, 350, 700, 2000) if grid.numpy is not None else ())
 WIDTH = 700  # screen width of the grid
+PARSER = argparse.ArgumentParser(description="Visualize path finding algorithms on a grid")
+PARSER.add_argument("map", nargs="?", help="a MovingAI .map, a text map or a PNG image opened by the game grid")
+PARSER.add_argument("--stats", metavar="FILE", help="append the counters of every search to FILE as JSON lines")
+ARGS = PARSER.parse_args()
+MAP_FILE = ARGS.map  # given as 'python main.py arena.map'
+STATS_FILE = ARGS.stats  # given as 'python main.py --stats runs.jsonl'
+if STATS_FILE:
+    algorithms.STATS_HOOKS.append(lambda stats: engine.write_json(stats, STATS_FILE))
+EXPORT_FILE = "grid.map"  # the file the S key saves the walls to, a .png name saves an image
 WIN = pygame.display.set_mode((WIDTH, WIDTH))  # pygame windows
 FONT = pygame.font.SysFont('comicsans', 30)  # game font
+HUD_FONT = pygame.font.SysFont('consolas', 16)  # font of the search counters
 MAIN_CLOCK = pygame.time.Clock()  # main clock
 
 # menu colors
@@ -24,6 +39,8 @@ BUTTON_HOVER_COLOR = (254, 152, 1)
 MENU_BACK_COLOR = (174, 230, 230)
 INFO_COLOR = (204, 14, 116)
 INFO_MENU_BACK_COLOR = (253, 207, 223)
+HUD_COLOR = (255, 255, 255)
+HUD_BACK_COLOR = (10, 4, 60)
 
 class Button:
     """
@@ -80,6 +97,23 @@ def draw_text(text, local_font, color, surface, x, y):
     surface.blit(text_obj, text_rect)
 
 
+def draw_hud(win, stats):
+    """
+    draws the counters of a search in the top left corner of the window and updates that part of the window
+    :param win: the pygame window
+    :param stats: the SearchStats of the search, None before the first search
+    :return: None
+    """
+    lines = stats.lines() if stats is not None else ["press SPACE to count a search"]
+    texts = [HUD_FONT.render(line, True, HUD_COLOR) for line in lines]
+    height = HUD_FONT.get_linesize()
+    rect = pygame.Rect(0, 0, max(text.get_width() for text in texts) + 10, height * len(texts) + 10)
+    win.fill(HUD_BACK_COLOR, rect)
+    for i, text in enumerate(texts):
+        win.blit(text, (5, 5 + i * height))
+    pygame.display.update(rect)
+
+
 def info_menu(win):
     """
     function to render the info page containing instructions to run the app
@@ -96,17 +130,23 @@ def info_menu(win):
         draw_text('Press SPACE to start the algorithm', FONT, BUTTON_COLOR, WIN, 50, 170)
         draw_text('Press ARROW UP or LEFT to decrease grid size', FONT, BUTTON_COLOR, WIN, 50, 200)
         draw_text('Press ARROW DOWN or RIGHT to increase grid size', FONT, BUTTON_COLOR, WIN, 50, 230)
-        draw_text('Press R to reset the grid', FONT, BUTTON_COLOR, WIN, 50, 260)
+        draw_text('Press R to clear the search, C to clear the grid', FONT, BUTTON_COLOR, WIN, 50, 260)
         draw_text('Press ESC to return back to main menu', FONT, BUTTON_COLOR, WIN, 50, 290)
+        draw_text('Press D to allow or forbid diagonal moves', FONT, BUTTON_COLOR, WIN, 50, 320)
+        draw_text('While searching: P pause, N step, F finish, + and - speed', FONT, BUTTON_COLOR, WIN, 50, 350)
 
-        draw_text('The golden node is START', FONT, grid.START_COLOR, WIN, 50, 380)
-        draw_text('The red node is GOAL', FONT, grid.GOAL_COLOR, WIN, 50, 410)
-        draw_text('The gray nodes are WALL', FONT, grid.WALL_COLOR, WIN, 50, 440)
-        draw_text('The navy blue nodes are path', FONT, grid.PATH_COLOR, WIN, 50, 470)
-        draw_text('The light cyan nodes are closed', FONT, grid.CLOSED_COLOR, WIN, 50, 500)
-        draw_text('The deep cyan nodes are open', FONT, grid.OPEN_COLOR, WIN, 50, 530)
+        draw_text('Press H to show the distances to GOAL as a heatmap', FONT, BUTTON_COLOR, WIN, 50, 380)
+        draw_text('Press I to show the search counters', FONT, BUTTON_COLOR, WIN, 50, 410)
 
-        draw_text('This application is created by Trinanjan Nandi', FONT, INFO_COLOR, WIN, 200, 600)
+        draw_text('The golden node is START', FONT, grid.START_COLOR, WIN, 50, 440)
+        draw_text('The red node is GOAL', FONT, grid.GOAL_COLOR, WIN, 50, 470)
+        draw_text('The gray nodes are WALL', FONT, grid.WALL_COLOR, WIN, 50, 500)
+        draw_text('The navy blue nodes are path', FONT, grid.PATH_COLOR, WIN, 50, 530)
+        draw_text('The light cyan nodes are closed', FONT, grid.CLOSED_COLOR, WIN, 50, 560)
+        draw_text('The deep cyan nodes are open', FONT, grid.OPEN_COLOR, WIN, 50, 590)
+        draw_text('D* Lite: edit walls or move START, then SPACE to replan', FONT, BUTTON_COLOR, WIN, 50, 620)
+
+        draw_text('This application is created by Trinanjan Nandi', FONT, INFO_COLOR, WIN, 200, 660)
         for event in pygame.event.get():
             if event.type == QUIT:
                 pygame.quit()
@@ -134,13 +174,18 @@ def main_menu():
         button_info = Button(600, 30, 50, 50, "Info")
         button_info.color = INFO_COLOR
         button_dfs = Button(50, 100, 250, 50, "DFS")
-        button_bfs = Button(50, 200, 250, 50, "BFS")
-        button_astar = Button(50, 300, 250, 50, "A* Search")
-        button_greedy = Button(50, 400, 250, 50, "Best First")
+        button_bfs = Button(50, 170, 250, 50, "BFS")
+        button_astar = Button(50, 240, 250, 50, "A* Search")
+        button_greedy = Button(50, 310, 250, 50, "Best First")
         button_bidirectional = Button(400, 100, 250, 50, "Bidirectional")
-        button_astar_bi = Button(400, 200, 250, 50, "Bidirectional A*")
-        button_greedy_bi = Button(400, 300, 250, 50, "Bidirectional Greedy")
-        button_dijkstra = Button(400, 400, 250, 50, "Dijkstra")
+        button_astar_bi = Button(400, 170, 250, 50, "Bidirectional A*")
+        button_greedy_bi = Button(400, 240, 250, 50, "Bidirectional Greedy")
+        button_dijkstra = Button(400, 310, 250, 50, "Dijkstra")
+        button_jps = Button(50, 380, 250, 50, "JPS")
+        button_jps_plus = Button(400, 380, 250, 50, "JPS+")
+        button_d_star_lite = Button(50, 450, 250, 50, "D* Lite")
+        button_hpa_star = Button(400, 450, 250, 50, "HPA*")
+        button_ara_star = Button(50, 520, 250, 50, "ARA*")
 
         # all the button object's collision checking
         if button_info.rectangle.collidepoint((mx, my)):
@@ -182,6 +227,26 @@ def main_menu():
             button_dijkstra.color = BUTTON_HOVER_COLOR
             if click:
                 message = game(WIN, WIDTH, algorithm=button_dijkstra.text)
+        if button_jps.rectangle.collidepoint((mx, my)):
+            button_jps.color = BUTTON_HOVER_COLOR
+            if click:
+                message = game(WIN, WIDTH, algorithm=button_jps.text)
+        if button_jps_plus.rectangle.collidepoint((mx, my)):
+            button_jps_plus.color = BUTTON_HOVER_COLOR
+            if click:
+                message = game(WIN, WIDTH, algorithm=button_jps_plus.text)
+        if button_d_star_lite.rectangle.collidepoint((mx, my)):
+            button_d_star_lite.color = BUTTON_HOVER_COLOR
+            if click:
+                message = game(WIN, WIDTH, algorithm=button_d_star_lite.text)
+        if button_hpa_star.rectangle.collidepoint((mx, my)):
+            button_hpa_star.color = BUTTON_HOVER_COLOR
+            if click:
+                message = game(WIN, WIDTH, algorithm=button_hpa_star.text)
+        if button_ara_star.rectangle.collidepoint((mx, my)):
+            button_ara_star.color = BUTTON_HOVER_COLOR
+            if click:
+                message = game(WIN, WIDTH, algorithm=button_ara_star.text)
 
         # drawing all the buttons on the window
         button_info.draw_button()
@@ -193,6 +258,11 @@ def main_menu():
         button_astar_bi.draw_button()
         button_greedy_bi.draw_button()
         button_dijkstra.draw_button()
+        button_jps.draw_button()
+        button_jps_plus.draw_button()
+        button_d_star_lite.draw_button()
+        button_hpa_star.draw_button()
+        button_ara_star.draw_button()
 
         if message is not None:     # path not found
             text = "Search Result : " + message
@@ -226,24 +296,69 @@ def game(win, width, algorithm):
     """
     clock = pygame.time.Clock()
     rows = ROW
-    main_grid = grid.make_grid(rows, width)     # the main grid in a list of list of Node objects format
+    connectivity = 4    # 4 for up, down, left and right moves, 8 when diagonal moves are allowed
+    main_grid = grid.make_grid(rows, width, connectivity)   # the main grid, main_grid[row][col] gives a Node view
+    if MAP_FILE:
+        main_grid = grid.load_grid(MAP_FILE, width, connectivity)
+        rows = main_grid.rows
+    renderer = grid.make_renderer(win, width, rows)    # draws the changed cells every frame
+    components = engine.Components(main_grid)  # the connected free cells, updated as walls are painted or erased
 
     start = None  # holds the start node
     end = None  # holds the end node
 
     algo_started = False    # checks if the algorithm has started
+    player = None   # the Animator replaying the running or finished search
+    cache_key = None    # the key of the running search in algorithms.PATH_CACHE, None once it is cached
+    planner = None  # the planner of an incremental algorithm, kept between searches to replan after edits
+    heatmap = False  # checks if the distance heatmap of the goal covers the grid
+    hud = False  # checks if the search counters are shown
+    stats = None    # the SearchStats of the last search, only collected while the HUD is shown or hooks are set
+    timing = False  # checks if the frames of the search being replayed are timed into stats
     run = True  # represents if the game loop is running or not
     while run:
-        clock.tick(FPS)
-        grid.draw(win, main_grid, rows, width)
+        if timing:
+            begin = time.perf_counter()
+            clock.tick(FPS)
+            stats.delay_seconds += time.perf_counter() - begin
+        else:
+            clock.tick(FPS)
+        if player is not None:
+            player.update()
+            if cache_key is not None and player.trace.finished:
+                algorithms.PATH_CACHE.put(cache_key, player.trace)
+                cache_key = None
+            if timing and player.done:
+                timing = False
+                algorithms.report(stats)
+            if player.done and not player.trace.result.found:   # path is not found
+                renderer.draw(main_grid)
+                print("Not found")
+                pygame.time.delay(1000)
+                return "Path Not Found"
+
+        if timing:
+            begin = time.perf_counter()
+            renderer.draw(main_grid)
+            stats.draw_seconds += time.perf_counter() - begin
+        else:
+            renderer.draw(main_grid)
+        if hud:
+            draw_hud(win, stats)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit(0)
-            if pygame.mouse.get_pressed(num_buttons=3)[0]:  # left click adds start, goal and wall respectively
+            if heatmap and (event.type == pygame.MOUSEBUTTONDOWN or
+                            event.type == pygame.KEYDOWN and event.key != pygame.K_h):
+                heatmap = False     # any edit or command brings the grid back
+                main_grid.full_redraw = True
+            editing = player is None or player.done   # the grid can't be edited while a search is playing back
+            # None when the mouse is in the margin the cells leave when the width is not a multiple of the rows
+            clicked = grid.get_clicked_node(pygame.mouse.get_pos(), rows, width) if editing else None
+            if clicked and pygame.mouse.get_pressed(num_buttons=3)[0]:  # left click adds start, goal and wall
                 # num_buttons = 3 for 3 button mouse
-                pos = pygame.mouse.get_pos()
-                row, col = grid.get_clicked_node(pos, rows, width)
+                row, col = clicked
                 node = main_grid[row][col]
                 if not start and node != end:
                     start = node
@@ -253,12 +368,13 @@ def game(win, width, algorithm):
                     end.make_end()
                 elif node != end and node != start:
                     node.make_wall()
+                components.update(main_grid, node.index)
 
-            elif pygame.mouse.get_pressed(num_buttons=3)[2]:  # right click removes any of start, goal or wall
-                pos = pygame.mouse.get_pos()
-                row, col = grid.get_clicked_node(pos, rows, width)
+            elif clicked and pygame.mouse.get_pressed(num_buttons=3)[2]:  # right click removes start, goal or wall
+                row, col = clicked
                 node = main_grid[row][col]
                 node.reset()
+                components.update(main_grid, node.index)
                 if node == start:
                     start = None
                 elif node == end:
@@ -267,76 +383,125 @@ def game(win, width, algorithm):
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE or event.key == pygame.K_BACKSPACE:
                     run = False
+                    if player is not None:
+                        player.trace.cancel()
                 if (event.key == pygame.K_LEFT or event.key == pygame.K_UP) and not algo_started:
                     # decrease the grid size
-                    if rows == 25:
-                        rows -= 5
-                    elif rows == 35:
-                        rows -= 10
-                    else:
+                    smaller = [size for size in GRID_SIZES if size < rows]
+                    if not smaller:
                         continue
+                    rows = smaller[-1]
                     start = None
                     end = None
-                    main_grid = grid.make_grid(rows, width)
+                    main_grid = grid.make_grid(rows, width, connectivity)
+                    renderer = grid.make_renderer(win, width, rows)
+                    components = engine.Components(main_grid)
+                    planner = None
 
                 if (event.key == pygame.K_RIGHT or event.key == pygame.K_DOWN) and not algo_started:
                     # increase the grid size
-                    if rows == 25:
-                        rows += 10
-                    elif rows == 20:
-                        rows += 5
-                    else:
+                    larger = [size for size in GRID_SIZES if size > rows]
+                    if not larger:
                         continue
-
+                    rows = larger[0]
                     start = None
                     end = None
-                    main_grid = grid.make_grid(rows, width)
-
-                if event.key == pygame.K_SPACE and start and end:
-                    # start algorithm
-                    algo_started = True
-                    for row in main_grid:
-                        for node in row:
-                            node.update_neighbour(main_grid)
-
-                    found = False   # holds the boolean return of the algorithm functions
-
-                    if algorithm == "A* Search":
-                        found = algorithms.a_star(lambda: grid.draw(win, main_grid, rows, width), main_grid, start, end)
-                    elif algorithm == "BFS":
-                        found = algorithms.breadth_first_search(lambda: grid.draw(win, main_grid, rows, width), start,
-                                                                end)
-                    elif algorithm == "DFS":
-                        found = algorithms.depth_first_search(lambda: grid.draw(win, main_grid, rows, width), start,
-                                                              end)
-                    elif algorithm == "Best First":
-                        found = algorithms.greedy_best_first(lambda: grid.draw(win, main_grid, rows, width),
-                                                             main_grid, start, end)
-
-                    elif algorithm == "Bidirectional":
-                        found = algorithms.bidirectional_search(lambda: grid.draw(win, main_grid, rows, width),
-                                                                main_grid, start, end)
-                    elif algorithm == "Bidirectional A*":
-                        found = algorithms.bidirectional_a_star_search(lambda: grid.draw(win, main_grid, rows, width),
-                                                                       main_grid, start, end)
-                    elif algorithm == "Bidirectional Greedy":
-                        found = algorithms.bidirectional_greedy_search(lambda: grid.draw(win, main_grid, rows, width),
-                                                                       main_grid, start, end)
-                    elif algorithm == "Dijkstra":
-                        found = algorithms.dijkstra(lambda: grid.draw(win, main_grid, rows, width),
-                                                    main_grid, start, end)
-
-                    if not found:   # path is not found
+                    main_grid = grid.make_grid(rows, width, connectivity)
+                    renderer = grid.make_renderer(win, width, rows)
+                    components = engine.Components(main_grid)
+                    planner = None
+
+                if event.key == pygame.K_d and not algo_started:
+                    # toggle diagonal moves, the walls stay as they are
+                    connectivity = 12 - connectivity
+                    main_grid.set_connectivity(connectivity)
+                    planner = None
+
+                if event.key == pygame.K_SPACE and start and end and (player is None or player.done):
+                    if not components.connected(start.get_pos(), end.get_pos()):
+                        # the start and goal are in different components, no search can find a path
                         print("Not found")
-                        message = "Path Not Found"
-                        pygame.time.delay(1000)
-                        return message
-
-                if event.key == pygame.K_r:  # reset the grid
+                        return "Path Not Found"
+                    # start algorithm, it runs in the background while the player replays its events
+                    algo_started = True
+                    main_grid.clear_search()
+                    search = algorithms.MENU_ALGORITHMS[algorithm]
+                    stats = None
+                    if hud or algorithms.STATS_HOOKS:
+                        stats = engine.SearchStats(algorithm, main_grid, start.get_pos(), end.get_pos())
+                    cache_key = None
+                    if algorithm in algorithms.INCREMENTAL_ALGORITHMS:
+                        # replan from the last search, a new goal needs a new planner
+                        if planner is None or planner.goal != end.index:
+                            planner = algorithms.INCREMENTAL_ALGORITHMS[algorithm](main_grid, start.get_pos(),
+                                                                                   end.get_pos())
+                        search = planner.search
+                    else:
+                        cache_key = engine.PathCache.key(algorithm, main_grid, main_grid.layout_hash,
+                                                         start.get_pos(), end.get_pos())
+                    trace = algorithms.PATH_CACHE.get(cache_key) if cache_key is not None else None
+                    if trace is not None:   # the same query already ran on the same walls, it is shown at once
+                        player = algorithms.replay(main_grid, trace)
+                        cache_key = None
+                        if stats is not None:
+                            stats.cached = True
+                            stats.finish(trace.result, trace)
+                    else:
+                        player = algorithms.start_search(search, main_grid, start, end, stats)
+                    timing = stats is not None
+
+                if event.key == pygame.K_s:
+                    # export the walls, the start and goal are not part of the map
+                    engine.maps.save(main_grid, EXPORT_FILE)
+                    print("Saved the walls to", EXPORT_FILE)
+
+                if event.key == pygame.K_h and end and (player is None or player.done):
+                    # one wavefront from the goal gives the distance of every cell, the start's path is read off it
+                    heatmap = not heatmap
+                    if heatmap:
+                        field = engine.flow_field(main_grid, end.get_pos())
+                        path = field.path(start.get_pos()) if start else None
+                        grid.draw_heatmap(win, main_grid, field, width, path[1:-1] if path else None)
+                    else:
+                        main_grid.full_redraw = True
+
+                if event.key == pygame.K_i:
+                    # show or hide the counters of the last search
+                    hud = not hud
+                    if not hud:
+                        main_grid.full_redraw = True
+
+                if player is not None:  # playback controls
+                    if event.key == pygame.K_p:
+                        player.toggle_pause()
+                    elif event.key == pygame.K_n:
+                        player.step()
+                    elif event.key == pygame.K_f:
+                        player.skip()
+                    elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                        player.faster()
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        player.slower()
+
+                if event.key == pygame.K_r:  # clear the search, the walls, start and goal stay
+                    if player is not None:
+                        player.trace.cancel()
+                        player = None
+                    timing = False
+                    algo_started = False
+                    main_grid.clear_search()
+
+                if event.key == pygame.K_c:  # clear the whole grid
+                    if player is not None:
+                        player.trace.cancel()
+                        player = None
+                    timing = False
+                    planner = None
                     algo_started = False
                     start = None
                     end = None
-                    main_grid = grid.make_grid(rows, width)
+                    main_grid = grid.make_grid(rows, width, connectivity)
+                    components = engine.Components(main_grid)
 
 
 main_menu()
@@ -0,0 +1,102 @@
+"""
+Checks of the playback of recorded searches: the Animator paints the events of a SearchTrace a few per frame and a
+cancelled SearchTrace stops its search at the next event
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import unittest
+
+import engine
+from engine import maps
+from animator import Animator
+
+SIZE = 30
+
+
+class CancelAfter(engine.SearchTrace):
+    """
+    a SearchTrace cancelled by its own limit-th event, like R pressed while a search is shown
+    """
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+
+    def __call__(self, index, state):
+        super().__call__(index, state)
+        if len(self) >= self.limit:
+            self.cancel()
+
+
+def playback_grid(seed=0):
+    """
+    :return: a random GridMap with the start and goal cells set and the 'dirty' list the Animator fills
+    """
+    grid_map = maps.random_map(SIZE, 0.2, seed)
+    grid_map.cells[0] = engine.START
+    grid_map.cells[-1] = engine.GOAL
+    grid_map.dirty = []
+    return grid_map
+
+
+class Playback(unittest.TestCase):
+    """
+    replays recorded searches frame by frame
+    """
+
+    def test_frames(self):
+        grid_map = playback_grid()
+        trace = engine.record(engine.a_star, grid_map, (0, 0), (SIZE - 1, SIZE - 1))
+        self.assertTrue(trace.finished)
+        player = Animator(grid_map, trace, events_per_frame=3)
+        player.update()
+        self.assertEqual(player.position, 3)
+        player.toggle_pause()
+        player.update()
+        player.step()
+        self.assertEqual(player.position, 4)
+        player.toggle_pause()
+        player.faster()
+        player.update()
+        self.assertEqual(player.position, 10)
+        self.assertFalse(player.done)
+        player.skip()
+        self.assertTrue(player.done)
+
+        # the last event of every painted cell is shown, the walls, start and goal keep their state
+        expected = bytearray(maps.random_map(SIZE, 0.2, 0).cells)
+        expected[0] = engine.START
+        expected[-1] = engine.GOAL
+        for index, state in zip(trace.indices, trace.states):
+            if expected[index] not in (engine.WALL, engine.START, engine.GOAL):
+                expected[index] = state
+        self.assertEqual(grid_map.cells, expected)
+        self.assertEqual(set(grid_map.dirty), {index for index in trace.indices if index not in (0, grid_map.size - 1)})
+
+    def test_cancelled_search(self):
+        for limit in (1, 10, 100):
+            grid_map = playback_grid(limit)
+            stats = engine.SearchStats("bfs", grid_map, (0, 0), (SIZE - 1, SIZE - 1))
+            trace = engine.record(engine.breadth_first_search, grid_map, (0, 0), (SIZE - 1, SIZE - 1),
+                                  CancelAfter(limit), stats)
+            self.assertEqual(len(trace), limit)  # the event after the cancel raised SearchCancelled
+            self.assertFalse(trace.finished)
+            self.assertIsNone(trace.result)
+            self.assertIsNone(stats.found)
+            player = Animator(grid_map, trace)
+            player.skip()
+            self.assertEqual(player.position, limit)
+            self.assertFalse(player.done)
+            self.assertNotIn(engine.PATH, grid_map.cells)
+
+    def test_cancelled_before_start(self):
+        grid_map = playback_grid()
+        trace = engine.SearchTrace()
+        trace.cancel()
+        trace = engine.record(engine.dijkstra, grid_map, (0, 0), (SIZE - 1, SIZE - 1), trace)
+        self.assertEqual((len(trace), trace.finished), (0, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Checks of the benchmark harness: the result rows of a run, their files and the regressions flagged by compare
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import benchmark
+
+SIZES = [16]
+
+
+def small_run(connectivity=4, open_lists=None):
+    corpus = benchmark.make_corpus(SIZES, ["random", "maze"], [], seed=1, connectivity=connectivity)
+    return benchmark.run_benchmark(corpus, ["a_star", "dijkstra", "greedy"], queries=2, seed=1,
+                                   open_lists=open_lists)
+
+
+class BenchmarkRuns(unittest.TestCase):
+    """
+    runs the benchmark on a few small maps
+    """
+
+    def test_rows(self):
+        for connectivity in (4, 8):
+            rows = small_run(connectivity, ["binary", "bucket"])
+            self.assertTrue(rows)
+            for row in rows:
+                self.assertEqual(list(row), benchmark.FIELDS)
+                self.assertEqual(row["connectivity"], connectivity)
+                self.assertTrue(row["found"])  # the queries are drawn among the connected cells
+                if row["algorithm"] != "greedy":
+                    self.assertAlmostEqual(row["gap"], 0.0)
+            lists = {row["open_list"] for row in rows}
+            self.assertEqual(lists, {"binary", "bucket"} if connectivity == 4 else {"binary"})
+
+    def test_files(self):
+        rows = small_run()
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("results.json", "results.csv"):
+                path = os.path.join(directory, name)
+                benchmark.write_results(rows, path, {"seed": 1})
+                loaded = benchmark.read_results(path)
+                with self.subTest(file=name):
+                    self.assertEqual(len(loaded), len(rows))
+                    for row, expected in zip(loaded, rows):
+                        self.assertEqual({key: row[key] for key in benchmark.FIELDS}, expected)
+
+
+class BenchmarkCompare(unittest.TestCase):
+    """
+    compares a run with copies of it made slower, larger or worse
+    """
+
+    def setUp(self):
+        self.rows = small_run()
+
+    def changed(self, algorithm, **changes):
+        return [dict(row, **changes) if row["algorithm"] == algorithm else row for row in self.rows]
+
+    def flagged(self, rows, threshold=benchmark.REGRESSION_THRESHOLD):
+        return {key[4] for key, _, _, _, regression in benchmark.compare(self.rows, rows, threshold) if regression}
+
+    def test_same_run(self):
+        report = benchmark.compare(self.rows, self.rows)
+        self.assertEqual(len(report), len(benchmark.summarize(self.rows)))
+        for _, old, current, ratio, regression in report:
+            self.assertEqual((old, ratio, regression), (current, 1.0, False))
+
+    def test_regressions(self):
+        slower = [dict(row, time_ms=row["time_ms"] * 2) if row["algorithm"] == "a_star" else row for row in self.rows]
+        self.assertEqual(self.flagged(slower), {"a_star"})
+        self.assertEqual(self.flagged(slower, threshold=10.0), set())  # the time is within a large threshold
+        self.assertEqual(self.flagged(self.changed("dijkstra", expanded=10 ** 6)), {"dijkstra"})
+        self.assertEqual(self.flagged(self.changed("greedy", found=False)), {"greedy"})
+        self.assertEqual(self.flagged(self.changed("a_star", gap=0.5)), {"a_star"})
+
+    def test_command(self):
+        worse = self.changed("greedy", expanded=10 ** 6)
+        reports = []
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(benchmark, "print_comparison", reports.append):
+            base, new = os.path.join(directory, "base.json"), os.path.join(directory, "new.csv")
+            benchmark.write_results(self.rows, base)
+            benchmark.write_results(worse, new)
+            self.assertEqual(benchmark.main(["compare", base, base, "--threshold", "1000"]), 0)
+            self.assertEqual(benchmark.main(["compare", base, new, "--threshold", "1000"]), 1)
+
+        output = io.StringIO()
+        benchmark.print_comparison(reports[1], output)
+        flagged = [line.split()[2] for line in output.getvalue().splitlines() if line.endswith("REGRESSION")]
+        self.assertEqual(flagged, ["greedy"] * len({row["map"] for row in self.rows}))
+
+
+class BenchmarkMemory(unittest.TestCase):
+    """
+    traces the memory of a few searches and checks the budget flag
+    """
+
+    def run_memory(self, budget):
+        corpus = benchmark.make_corpus(SIZES, ["random"], [], seed=2)
+        return benchmark.run_memory(corpus, ["a_star", "ida_star"], queries=1, seed=2, budget=budget)
+
+    def test_rows(self):
+        rows = self.run_memory(None)
+        self.assertEqual(len(rows), 2 * len(benchmark.DENSITIES))
+        for row in rows:
+            self.assertEqual(list(row), benchmark.MEMORY_FIELDS)
+            self.assertFalse(row["over_budget"])
+            self.assertGreater(row["peak_kb"], 0)
+            self.assertGreaterEqual(row["peak_kb"], row["retained_kb"])
+            self.assertAlmostEqual(row["peak_per_cell"], row["peak_kb"] * 1024 / (row["rows"] * row["cols"]), delta=1)
+
+    def test_budget(self):
+        rows = self.run_memory(1e9)
+        self.assertFalse(any(row["over_budget"] for row in rows))
+        rows = self.run_memory(1e-3)
+        self.assertTrue(all(row["over_budget"] for row in rows))
+
+    def test_command(self):
+        printed = []
+        arguments = ["memory", "--sizes", "16", "--kinds", "open", "--algorithms", "bfs", "--queries", "1"]
+        with mock.patch.object(benchmark, "print_memory", printed.append), mock.patch("sys.stderr", io.StringIO()):
+            self.assertEqual(benchmark.main(arguments + ["--budget", "0"]), 0)  # 0 turns the check off
+            self.assertEqual(benchmark.main(arguments + ["--budget", "0.001"]), 1)
+
+        output = io.StringIO()
+        benchmark.print_memory(printed[1], output)
+        self.assertTrue(output.getvalue().splitlines()[1].endswith("OVER BUDGET"))
+
+if __name__ == "__main__":
+    unittest.main()
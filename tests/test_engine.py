@@ -0,0 +1,668 @@
+"""
+Randomized cross-checks of the engine algorithms against dijkstra's algorithm
+Every test builds small random maps, searches random pairs of free cells (connected or not) and compares the path
+costs with the ones of engine.dijkstra, which needs no heuristic nor any table cached per map
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import json
+import os
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+import zlib
+
+import engine
+from engine import maps
+
+SIZE = 16  # rows and cols of the random maps
+MAPS = 12  # random maps per test and connectivity
+QUERIES = 6  # random pairs of free cells per map
+DENSITIES = (0.15, 0.3)
+
+
+def random_grids(connectivity, seed=0):
+    """
+    :param connectivity: 4 or 8
+    :param seed: random seed
+    :return: generator of (GridMap, random.Random) pairs
+    """
+    rng = random.Random(seed)
+    for number in range(MAPS):
+        density = DENSITIES[number % len(DENSITIES)]
+        yield maps.random_map(SIZE, density, rng.randrange(1 << 30), connectivity), rng
+
+
+def free_pairs(grid_map, rng, count=QUERIES):
+    """
+    :return: list of random (start, goal) pairs of free cells, the goal may be unreachable from the start
+    """
+    free = [grid_map.pos(index) for index in range(grid_map.size) if grid_map.cells[index] != engine.WALL]
+    return [tuple(rng.sample(free, 2)) for _ in range(count)] if len(free) >= 2 else []
+
+
+def paeth(left, above, corner):
+    estimate = left + above - corner
+    distances = abs(estimate - left), abs(estimate - above), abs(estimate - corner)
+    return left if distances[0] <= min(distances[1:]) else above if distances[1] <= distances[2] else corner
+
+
+def filtered_scanlines(image, bpp, kinds):
+    """
+    applies the PNG scanline filters, the reference for the fast unfiltering of engine.maps
+    :param image: list of scanlines, bytes
+    :param bpp: number of bytes of a pixel
+    :param kinds: filter type of every scanline
+    :return: the image data, a filter type byte before every scanline
+    """
+    data = bytearray()
+    previous = bytes(len(image[0]))
+    for line, kind in zip(image, kinds):
+        data.append(kind)
+        for i, value in enumerate(line):
+            left = line[i - bpp] if i >= bpp else 0
+            corner = previous[i - bpp] if i >= bpp else 0
+            predictor = (0, left, previous[i], (left + previous[i]) // 2, paeth(left, previous[i], corner))[kind]
+            data.append((value - predictor) & 255)
+        previous = line
+    return bytes(data)
+
+
+class HeadlessEngine(unittest.TestCase):
+    """
+    runs the engine without the pygame front end
+    """
+
+    def test_no_pygame(self):
+        code = ("import sys, engine\n"
+                "engine.search('a_star', engine.GridMap(4), (0, 0), (3, 3))\n"
+                "print(list(sys.modules))")
+        modules = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                 cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+        self.assertNotIn("'pygame'", modules)
+        self.assertNotIn("'grid'", modules)
+
+    def test_search_by_name(self):
+        grid_map = engine.GridMap.from_strings(["..#", "..#", "..."])
+        for algorithm in engine.ALGORITHMS:
+            with self.subTest(algorithm=algorithm):
+                result = engine.search(algorithm, grid_map, (0, 0), (0, 1))
+                self.assertEqual(result.path, [(0, 0), (0, 1)])
+        with self.assertRaises(ValueError):
+            engine.search("teleport", grid_map, (0, 0), (2, 2))
+
+
+class CrossCheck(unittest.TestCase):
+    """
+    compares the results of the optimal algorithms with the ones of dijkstra's algorithm
+    """
+
+    def assert_same_cost(self, result, expected, grid_map):
+        self.assertEqual(result.found, expected.found)
+        if expected.found:
+            self.assertAlmostEqual(result.cost, expected.cost)
+            self.assertAlmostEqual(grid_map.path_cost([grid_map.index(pos) for pos in result.path]), result.cost)
+
+    def check_optimal(self, search, connectivities=(4, 8), **kwargs):
+        for connectivity in connectivities:
+            for grid_map, rng in random_grids(connectivity):
+                for start, end in free_pairs(grid_map, rng):
+                    with self.subTest(connectivity=connectivity, start=start, end=end):
+                        expected = engine.dijkstra(grid_map, start, end)
+                        self.assert_same_cost(search(grid_map, start, end, **kwargs), expected, grid_map)
+
+    def test_a_star(self):
+        self.check_optimal(engine.a_star)
+
+    def test_breadth_first_search(self):
+        # the fewest moves are the cheapest path only when every move costs 1
+        self.check_optimal(engine.breadth_first_search, (4,))
+
+    def test_complete_searches(self):
+        # depth first and greedy best first search find a path whenever one exists, not the shortest one
+        for connectivity in (4, 8):
+            for grid_map, rng in random_grids(connectivity, seed=24):
+                for start, end in free_pairs(grid_map, rng):
+                    expected = engine.dijkstra(grid_map, start, end)
+                    for search in (engine.depth_first_search, engine.greedy_best_first):
+                        with self.subTest(connectivity=connectivity, search=search.__name__, start=start, end=end):
+                            result = search(grid_map, start, end)
+                            self.assertEqual(result.found, expected.found)
+                            if expected.found:
+                                path = [grid_map.index(pos) for pos in result.path]
+                                self.assertEqual((result.path[0], result.path[-1]), (start, end))
+                                self.assertTrue(all(b in grid_map.neighbours(a) for a, b in zip(path, path[1:])))
+                                self.assertAlmostEqual(grid_map.path_cost(path), result.cost)
+                                self.assertGreaterEqual(result.cost, expected.cost - 1e-9)
+
+    def test_jump_point_search(self):
+        self.check_optimal(engine.jump_point_search)
+
+    def test_jump_point_search_plus(self):
+        self.check_optimal(engine.jump_point_search_plus)
+
+    def test_nba_star(self):
+        self.check_optimal(engine.nba_star_search)
+
+    def test_ida_star(self):
+        self.check_optimal(engine.ida_star)
+
+    def test_ida_star_table_limit(self):
+        # a small table only slows IDA* down, a path longer than the limit raises
+        self.check_optimal(engine.ida_star, (4,), table_limit=SIZE * SIZE // 2)
+        corridor = engine.GridMap.from_strings(["." * 30])
+        with self.assertRaises(engine.MemoryLimitError):
+            engine.ida_star(corridor, (0, 0), (0, 29), table_limit=20)
+        self.assertAlmostEqual(engine.ida_star(corridor, (0, 0), (0, 29), table_limit=30).cost, 29)
+
+    def test_fringe_search(self):
+        self.check_optimal(engine.fringe_search)
+
+    def test_ara_star(self):
+        # without a deadline ARA* keeps improving its path until the weight reaches 1
+        self.check_optimal(engine.ara_star)
+
+    def test_ara_star_first_path(self):
+        # the first path of a weighted search costs at most weight times the optimal one
+        for grid_map, rng in random_grids(8):
+            for start, end in free_pairs(grid_map, rng):
+                expected = engine.dijkstra(grid_map, start, end)
+                first = []
+                engine.ara_star(grid_map, start, end, weight=2.5, on_solution=first.append)
+                self.assertEqual(bool(first), expected.found)
+                if first:
+                    self.assertLessEqual(first[0].cost, 2.5 * expected.cost + 1e-9)
+
+    def test_ara_star_open_lists(self):
+        grid_map = maps.random_map(SIZE, 0.2, 0, 4)
+        with self.assertRaisesRegex(ValueError, "real-valued"):
+            engine.ara_star(grid_map, (0, 0), (SIZE - 1, SIZE - 1), open_list="bucket")
+        self.check_optimal(engine.ara_star, (4,), open_list="indexed")
+
+    def test_alt(self):
+        self.check_optimal(engine.alt_a_star)
+
+    def test_flow_field(self):
+        self.check_optimal(engine.flow_field_search)
+
+    def test_hpa_star(self):
+        # HPA* is not optimal but finds a path whenever one exists
+        for connectivity in (4, 8):
+            for grid_map, rng in random_grids(connectivity):
+                for start, end in free_pairs(grid_map, rng):
+                    expected = engine.dijkstra(grid_map, start, end)
+                    result = engine.hpa_star(grid_map, start, end)
+                    self.assertEqual(result.found, expected.found)
+                    if expected.found:
+                        self.assertGreaterEqual(result.cost, expected.cost - 1e-9)
+
+
+class Neighbours(unittest.TestCase):
+    """
+    compares the moves generated from the offset tables with the moves listed cell by cell
+    """
+
+    def listed_moves(self, grid_map, index):
+        """
+        :return: (orthogonal neighbours in bottom, top, right, left order, set of (diagonal neighbour, cost))
+        """
+        row, col = grid_map.pos(index)
+
+        def free(d_row, d_col):
+            return (0 <= row + d_row < grid_map.rows and 0 <= col + d_col < grid_map.cols and
+                    not grid_map.is_wall((row + d_row, col + d_col)))
+
+        orthogonal = [grid_map.index((row + d_row, col + d_col)) for d_row, d_col in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                      if free(d_row, d_col)]
+        diagonal = set()
+        if grid_map.connectivity == 8:  # no corner cutting, both cells beside the move must be free
+            diagonal = {(grid_map.index((row + d_row, col + d_col)), engine.grid.SQRT2)
+                        for d_row in (-1, 1) for d_col in (-1, 1)
+                        if free(d_row, d_col) and free(d_row, 0) and free(0, d_col)}
+        return orthogonal, diagonal
+
+    def test_moves(self):
+        rng = random.Random(22)
+        for connectivity in (4, 8):
+            for rows, cols in ((1, 1), (1, 7), (7, 1), (2, 2), (7, 11), (11, 7), (SIZE, SIZE)):
+                grid_map = engine.GridMap(rows, cols, connectivity)
+                grid_map.cells[:] = bytes(rng.choice((engine.FREE, engine.FREE, engine.WALL)) for _ in
+                                          range(grid_map.size))
+                for index in range(grid_map.size):
+                    with self.subTest(connectivity=connectivity, rows=rows, cols=cols, pos=grid_map.pos(index)):
+                        orthogonal, diagonal = self.listed_moves(grid_map, index)
+                        neighbours = grid_map.neighbours(index)
+                        edges = grid_map.edges(index)
+                        self.assertEqual(neighbours, [neighbour for neighbour, _ in edges])
+                        self.assertEqual(edges[:len(orthogonal)], [(neighbour, 1) for neighbour in orthogonal])
+                        self.assertEqual(set(edges[len(orthogonal):]), diagonal)
+                        self.assertEqual(len(edges), len(orthogonal) + len(diagonal))
+
+    def test_heuristic_is_admissible(self):
+        for connectivity in (4, 8):
+            for grid_map, rng in random_grids(connectivity, seed=23):
+                for start, end in free_pairs(grid_map, rng):
+                    expected = engine.dijkstra(grid_map, start, end)
+                    if expected.found:
+                        estimate = grid_map.heuristic(grid_map.index(start), grid_map.index(end))
+                        self.assertLessEqual(estimate, expected.cost + 1e-9)
+
+    def test_connectivity(self):
+        grid_map = engine.GridMap.from_strings(["...", "...", "..."])
+        self.assertEqual(len(grid_map.neighbours(4)), 4)
+        grid_map.set_connectivity(8)
+        self.assertEqual(len(grid_map.neighbours(4)), 8)
+        with self.assertRaises(ValueError):
+            grid_map.set_connectivity(6)
+
+
+class BidirectionalMeeting(unittest.TestCase):
+    """
+    checks the paths joined where the two frontiers of the bidirectional searches meet
+    """
+
+    def assert_valid_path(self, result, grid_map, start, end):
+        path = [grid_map.index(pos) for pos in result.path]
+        self.assertEqual((path[0], path[-1]), (grid_map.index(start), grid_map.index(end)))
+        for cell, following in zip(path, path[1:]):
+            self.assertIn(following, grid_map.neighbours(cell))
+        self.assertAlmostEqual(grid_map.path_cost(path), result.cost)
+
+    def test_blind(self):
+        # the frontiers take turns node by node and stop at the first touch: the joined path has as few moves as the
+        # one of BFS on a 4 connected grid, where every path between two cells has the same parity, and at most one
+        # move more on an 8 connected grid
+        for connectivity in (4, 8):
+            for grid_map, rng in random_grids(connectivity, seed=13):
+                for start, end in free_pairs(grid_map, rng):
+                    with self.subTest(connectivity=connectivity, start=start, end=end):
+                        expected = engine.breadth_first_search(grid_map, start, end)
+                        result = engine.bidirectional_search(grid_map, start, end)
+                        self.assertEqual(result.found, expected.found)
+                        if expected.found:
+                            self.assert_valid_path(result, grid_map, start, end)
+                            self.assertIn(len(result.path) - len(expected.path), (0,) if connectivity == 4 else (0, 1))
+
+    def test_informed(self):
+        # bidirectional A* and greedy stop at the first meeting, the path is valid but may be longer than the shortest
+        for connectivity in (4, 8):
+            for grid_map, rng in random_grids(connectivity, seed=14):
+                for start, end in free_pairs(grid_map, rng):
+                    expected = engine.dijkstra(grid_map, start, end)
+                    for search in (engine.bidirectional_a_star_search, engine.bidirectional_greedy_search):
+                        with self.subTest(connectivity=connectivity, search=search.__name__, start=start, end=end):
+                            result = search(grid_map, start, end)
+                            self.assertEqual(result.found, expected.found)
+                            if expected.found:
+                                self.assert_valid_path(result, grid_map, start, end)
+                                self.assertGreaterEqual(result.cost, expected.cost - 1e-9)
+
+
+class OpenLists(unittest.TestCase):
+    """
+    pushes and pops random entries through every open list backend and compares the order of the pops
+    """
+
+    def test_pop_order(self):
+        rng = random.Random(10)
+        for _ in range(50):
+            queues = {name: backend() for name, backend in engine.OPEN_LISTS.items()}
+            popped = {name: [] for name in queues}
+            queued = []
+            expected = []
+            for node in range(rng.randint(1, 60)):
+                priority = rng.randrange(20)  # ties are popped in insertion order
+                queued.append((priority, node))
+                for queue in queues.values():
+                    queue.push(node, priority)
+                if rng.random() < 0.3:
+                    for name, queue in queues.items():
+                        popped[name].append(queue.pop())
+                    expected.append(min(queued))
+                    queued.remove(expected[-1])
+            expected += sorted(queued)
+            for name, queue in queues.items():
+                with self.subTest(backend=name):
+                    self.assertEqual(len(queue), len(queued))
+                    popped[name] += [queue.pop() for _ in queued]
+                    self.assertEqual(popped[name], expected)
+
+    def test_decrease_key(self):
+        rng = random.Random(11)
+        for _ in range(50):
+            queue = engine.IndexedHeap()
+            latest = {}  # node: (priority, push number) of its last push, the only entry the heap keeps
+            for number in range(rng.randint(1, 80)):
+                node = rng.randrange(15)
+                priority = rng.randrange(30)
+                queue.push(node, priority)
+                latest[node] = (priority, number)
+                self.assertEqual(len(queue), len(latest))
+                self.assertIn(node, queue)
+            expected = [(priority, node) for node, (priority, _) in sorted(latest.items(), key=lambda item: item[1])]
+            self.assertEqual([queue.pop() for _ in range(len(latest))], expected)
+            self.assertEqual(len(queue), 0)
+
+    def test_searches(self):
+        for connectivity in (4, 8):
+            for name in engine.OPEN_LISTS:
+                if name == "bucket" and connectivity == 8:
+                    continue
+                for grid_map, rng in random_grids(connectivity, seed=12):
+                    for start, end in free_pairs(grid_map, rng, 3):
+                        with self.subTest(connectivity=connectivity, backend=name, start=start, end=end):
+                            expected = engine.dijkstra(grid_map, start, end).cost
+                            self.assertAlmostEqual(engine.a_star(grid_map, start, end, open_list=name).cost, expected)
+                            self.assertAlmostEqual(engine.dijkstra(grid_map, start, end, open_list=name).cost, expected)
+
+
+class DStarLiteReplanning(unittest.TestCase):
+    """
+    replans one planner after wall edits, start moves and connectivity changes
+    """
+
+    def test_edits_and_moves(self):
+        for connectivity in (4, 8):
+            for grid_map, rng in random_grids(connectivity, seed=1):
+                pairs = free_pairs(grid_map, rng, 1)
+                if not pairs:
+                    continue
+                start, end = pairs[0]
+                planner = engine.DStarLite(grid_map, start, end)
+                for _ in range(8):
+                    for _ in range(rng.randint(1, 6)):  # paint or erase a few walls, never on the goal
+                        index = rng.randrange(grid_map.size)
+                        if index != grid_map.index(end):
+                            grid_map.cells[index] = engine.FREE if grid_map.cells[index] == engine.WALL else engine.WALL
+                    start = grid_map.pos(rng.randrange(grid_map.size))
+                    if grid_map.is_wall(start) or start == end:
+                        continue
+                    with self.subTest(connectivity=connectivity, start=start, end=end):
+                        expected = engine.dijkstra(grid_map, start, end)
+                        result = planner.search(grid_map, start, end)
+                        self.assertEqual(result.found, expected.found)
+                        if expected.found:
+                            self.assertAlmostEqual(result.cost, expected.cost)
+
+    def test_connectivity_change(self):
+        for grid_map, rng in random_grids(4, seed=2):
+            for start, end in free_pairs(grid_map, rng, 2):
+                grid_map.set_connectivity(4)
+                planner = engine.DStarLite(grid_map, start, end)
+                planner.search(grid_map, start, end)
+                grid_map.set_connectivity(8)
+                result = planner.search(grid_map, start, end)
+                expected = engine.dijkstra(grid_map, start, end)
+                self.assertEqual(result.found, expected.found)
+                if expected.found:
+                    self.assertAlmostEqual(result.cost, expected.cost)
+
+    def test_cancelled_search(self):
+        for connectivity in (4, 8):
+            for grid_map, rng in random_grids(connectivity, seed=7):
+                for start, end in free_pairs(grid_map, rng, 2):
+                    planner = engine.DStarLite(grid_map, start, end)
+                    planner.search(grid_map, start, end)
+                    for _ in range(rng.randint(1, 6)):
+                        index = rng.randrange(grid_map.size)
+                        if index not in (grid_map.index(start), grid_map.index(end)):
+                            grid_map.cells[index] = engine.FREE if grid_map.cells[index] == engine.WALL else engine.WALL
+                    events = []
+                    limit = rng.randint(1, 40)
+
+                    def cancel(index, state):
+                        events.append(index)
+                        if len(events) >= limit:
+                            raise engine.SearchCancelled()
+
+                    try:  # cancelled after a few updates, like R pressed while the search is shown
+                        planner.search(grid_map, start, end, cancel)
+                    except engine.SearchCancelled:
+                        pass
+                    with self.subTest(connectivity=connectivity, start=start, end=end, limit=limit):
+                        expected = engine.dijkstra(grid_map, start, end)
+                        result = planner.search(grid_map, start, end)
+                        self.assertEqual(result.found, expected.found)
+                        if expected.found:
+                            self.assertAlmostEqual(result.cost, expected.cost)
+
+
+class ComponentsUnderEdits(unittest.TestCase):
+    """
+    keeps a Components index up to date through single wall edits and compares it with a full search
+    """
+
+    def test_single_edits(self):
+        for grid_map, rng in random_grids(4, seed=3):
+            found = engine.Components(grid_map)
+            for _ in range(40):
+                index = rng.randrange(grid_map.size)
+                grid_map.cells[index] = engine.FREE if grid_map.cells[index] == engine.WALL else engine.WALL
+                found.update(grid_map, index)
+                for start, end in free_pairs(grid_map, rng, 3):
+                    expected = engine.breadth_first_search(grid_map, start, end).found
+                    self.assertEqual(found.connected(start, end), expected)
+
+    def test_reachable_after_sync(self):
+        for grid_map, rng in random_grids(8, seed=4):
+            engine.reachable(grid_map, (0, 0), (0, 0))
+            for _ in range(15):  # several edits picked up at once by the next call
+                grid_map.cells[rng.randrange(grid_map.size)] = rng.choice((engine.FREE, engine.WALL))
+            for start, end in free_pairs(grid_map, rng):
+                self.assertEqual(engine.reachable(grid_map, start, end), engine.dijkstra(grid_map, start, end).found)
+
+
+class PathCacheKeys(unittest.TestCase):
+    """
+    checks that the Zobrist hash updated one wall at a time matches the hash of the whole layout
+    """
+
+    def test_incremental_hash(self):
+        for grid_map, rng in random_grids(4, seed=5):
+            layout = engine.layout_hash(grid_map)
+            for _ in range(50):
+                index = rng.randrange(grid_map.size)
+                grid_map.cells[index] = engine.FREE if grid_map.cells[index] == engine.WALL else engine.WALL
+                layout ^= engine.zobrist_key(index)
+                self.assertEqual(layout, engine.layout_hash(grid_map))
+            grid_map.cells[:] = bytes(grid_map.size)
+            self.assertEqual(engine.layout_hash(grid_map), 0)
+
+    def test_cached_trace_matches_layout(self):
+        cache = engine.PathCache()
+        for grid_map, rng in random_grids(4, seed=6):
+            for start, end in free_pairs(grid_map, rng, 2):
+                key = cache.key("a_star", grid_map, engine.layout_hash(grid_map), start, end)
+                trace = cache.get(key)
+                if trace is None:
+                    trace = engine.record(engine.a_star, grid_map, start, end)
+                    cache.put(key, trace)
+                self.assertEqual(trace.result.cost, engine.dijkstra(grid_map, start, end).cost)
+
+    def test_least_recently_used(self):
+        cache = engine.PathCache(max_entries=2)
+        grid_map = engine.GridMap.from_strings(["....", "....", "...."])
+        traces = [engine.record(engine.breadth_first_search, grid_map, (0, 0), (2, col)) for col in range(3)]
+        keys = [cache.key("bfs", grid_map, 0, (0, 0), (2, col)) for col in range(3)]
+        cache.put(keys[0], traces[0])
+        cache.put(keys[1], traces[1])
+        cache.get(keys[0])
+        cache.put(keys[2], traces[2])
+        self.assertIs(cache.get(keys[0]), traces[0])
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.events, len(traces[0]) + len(traces[2]))
+
+
+class BatchQueries(unittest.TestCase):
+    """
+    runs batches of queries on a process pool and compares them with the same queries run one after the other
+    """
+
+    def test_pool_matches_serial(self):
+        for connectivity in (4, 8):
+            grid_map, rng = next(random_grids(connectivity, seed=20))
+            queries = free_pairs(grid_map, rng, 40)
+            for algorithm, kwargs in (("a_star", {"open_list": "indexed"}), ("jps", {}), ("bfs", {})):
+                with self.subTest(connectivity=connectivity, algorithm=algorithm):
+                    serial = engine.batch_search(algorithm, grid_map, queries, processes=1, **kwargs)
+                    pooled = engine.batch_search(algorithm, grid_map, queries, processes=2, **kwargs)
+                    self.assertEqual([(result.found, result.cost, result.path, result.expanded) for result in pooled],
+                                     [(result.found, result.cost, result.path, result.expanded) for result in serial])
+                    for (start, end), result in zip(queries, pooled):
+                        self.assertEqual(result.found, engine.dijkstra(grid_map, start, end).found)
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            engine.batch_search("teleport", maps.open_map(4), [((0, 0), (3, 3))])
+
+
+class SearchCounters(unittest.TestCase):
+    """
+    collects the counters of recorded searches and checks them against the trace and a search run without stats
+    """
+
+    def test_counts(self):
+        for connectivity in (4, 8):
+            for grid_map, rng in random_grids(connectivity, seed=21):
+                for start, end in free_pairs(grid_map, rng, 2):
+                    for algorithm in ("a_star", "dijkstra", "bfs", "nba_star", "ara_star", "jps"):
+                        with self.subTest(connectivity=connectivity, algorithm=algorithm, start=start, end=end):
+                            search = engine.ALGORITHMS[algorithm]
+                            stats = engine.SearchStats(algorithm, grid_map, start, end)
+                            trace = engine.record(search, grid_map, start, end, stats=stats)
+                            plain = search(grid_map, start, end)  # counting changes nothing in the search
+                            self.assertEqual((stats.found, stats.expanded, trace.result.path),
+                                             (plain.found, plain.expanded, plain.path))
+                            self.assertAlmostEqual(stats.cost, plain.cost)
+                            self.assertEqual(stats.opened, trace.states.count(engine.OPEN))
+                            self.assertEqual(stats.closed, trace.states.count(engine.CLOSED))
+                            self.assertEqual(stats.stale_pops, stats.pops - stats.expanded)
+                            if algorithm == "bfs":  # a FIFO, not an open list: the opened and expanded nodes
+                                self.assertEqual(stats.open_lists, 0)
+                                self.assertEqual((stats.pushes, stats.pops), (stats.opened, stats.expanded))
+                            else:
+                                self.assertGreater(stats.open_lists, 0)
+                                self.assertGreaterEqual(stats.stale_pops, 0)
+                                self.assertGreaterEqual(stats.pushes, stats.pops)
+
+    def test_no_collection_outside_record(self):
+        grid_map = maps.open_map(8)
+        stats = engine.SearchStats("a_star", grid_map, (0, 0), (7, 7))
+        engine.record(engine.a_star, grid_map, (0, 0), (7, 7), stats=stats)
+        pushes = stats.pushes
+        engine.a_star(grid_map, (0, 0), (7, 7))
+        self.assertEqual(stats.pushes, pushes)
+        self.assertIsNone(engine.stats.collecting_stats())
+
+    def test_json_lines(self):
+        grid_map = maps.open_map(8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.jsonl")
+            for algorithm in ("a_star", "bfs"):
+                stats = engine.SearchStats(algorithm, grid_map, (0, 0), (7, 7))
+                engine.record(engine.ALGORITHMS[algorithm], grid_map, (0, 0), (7, 7), stats=stats)
+                engine.write_json(stats, path)
+            with open(path) as file:
+                lines = [json.loads(line) for line in file]
+        self.assertEqual([line["algorithm"] for line in lines], ["a_star", "bfs"])
+        self.assertEqual([line["cost"] for line in lines], [14, 14])
+        self.assertEqual(set(lines[0]), set(vars(stats)))
+
+
+class MapFiles(unittest.TestCase):
+    """
+    writes maps and scenarios to files and reads them back
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def random_layouts(self, seed):
+        rng = random.Random(seed)
+        for _ in range(6):
+            grid_map = engine.GridMap(rng.randint(1, 20), rng.randint(1, 20))
+            grid_map.cells[:] = bytes(rng.choice((engine.FREE, engine.WALL)) for _ in range(grid_map.size))
+            yield grid_map
+
+    def test_map_round_trip(self):
+        for grid_map in self.random_layouts(17):
+            maps.save(grid_map, self.path("layout.map"))
+            loaded = maps.load(self.path("layout.map"), 8)
+            self.assertEqual((loaded.rows, loaded.cols, loaded.connectivity), (grid_map.rows, grid_map.cols, 8))
+            self.assertEqual(loaded.cells, grid_map.cells)
+
+    def test_movingai_and_text_maps(self):
+        with open(self.path("movingai.map"), "wb") as file:
+            file.write(b"type octile\r\nheight 2\r\nwidth 4\r\nmap\r\n.GST\r\n@W.O\r\n")
+        self.assertEqual(maps.load(self.path("movingai.map")).cells, bytes([0, 0, 0, 1, 1, 1, 0, 1]))
+        with open(self.path("text.txt"), "wb") as file:
+            file.write(b"..#\r\n#..\r\n\r\n")
+        self.assertEqual(maps.load(self.path("text.txt")).cells, bytes([0, 0, 1, 1, 0, 0]))
+        with open(self.path("short.map"), "wb") as file:
+            file.write(b"type octile\nheight 3\nwidth 4\nmap\n....\n....\n")
+        with self.assertRaises(ValueError):
+            maps.load(self.path("short.map"))
+
+    def test_scenario_round_trip(self):
+        grid_map = maps.random_map(SIZE, 0.2, 18)
+        queries = maps.random_queries(grid_map, 10, seed=18)
+        scenarios = [(start, end, engine.dijkstra(grid_map, start, end).cost) for start, end in queries]
+        maps.save_scenario(self.path("random.scen"), "random.map", grid_map, scenarios)
+        loaded = maps.load_scenario(self.path("random.scen"))
+        self.assertEqual([(start, end) for start, end, _ in loaded], queries)
+        for (_, _, length), (_, _, expected) in zip(loaded, scenarios):
+            self.assertAlmostEqual(length, expected)
+
+    @unittest.skipIf(maps.numpy is None, "the PNG images are decoded with numpy")
+    def test_image_round_trip(self):
+        for grid_map in self.random_layouts(19):
+            maps.save(grid_map, self.path("layout.png"))
+            loaded = maps.load(self.path("layout.png"))
+            self.assertEqual((loaded.rows, loaded.cols), (grid_map.rows, grid_map.cols))
+            self.assertEqual(loaded.cells, grid_map.cells)
+
+
+@unittest.skipIf(maps.numpy is None, "the PNG images are decoded with numpy")
+class PngFilters(unittest.TestCase):
+    """
+    decodes images written with every PNG scanline filter and compares them with the pixels that were filtered
+    """
+
+    def test_unfilter(self):
+        rng = random.Random(8)
+        for _ in range(60):
+            bpp = rng.choice((1, 2, 3, 4))
+            height = rng.randint(1, 12)
+            width = rng.randint(1, 12)
+            image = [bytes(rng.randrange(256) for _ in range(width * bpp)) for _ in range(height)]
+            for kinds in ([rng.randrange(5) for _ in range(height)], [3] * height, [4] * height, [2] * height):
+                with self.subTest(bpp=bpp, height=height, width=width, kinds=kinds):
+                    unfiltered = maps.unfilter(filtered_scanlines(image, bpp, kinds), height, width * bpp, bpp)
+                    self.assertEqual(unfiltered.tobytes(), b"".join(image))
+
+    def test_load_image(self):
+        rng = random.Random(9)
+        grid_map = maps.random_map(SIZE, 0.3, 9)
+        rows = [bytes(grid_map.cells[row * SIZE:(row + 1) * SIZE]).translate(maps.IMAGE_PIXELS) for row in range(SIZE)]
+        rgb = [bytes(value for value in line for _ in range(3)) for line in rows]  # gray RGB pixels
+        data = filtered_scanlines(rgb, 3, [rng.randrange(5) for _ in rgb])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "filtered.png")
+            with open(path, "wb") as file:
+                file.write(maps.PNG_SIGNATURE)
+                file.write(maps.png_chunk(b"IHDR", struct.pack(">IIBBBBB", SIZE, SIZE, 8, 2, 0, 0, 0)))
+                file.write(maps.png_chunk(b"IDAT", zlib.compress(data)))
+                file.write(maps.png_chunk(b"IEND", b""))
+            self.assertEqual(maps.load(path).cells, grid_map.cells)
+
+
+if __name__ == "__main__":
+    unittest.main()
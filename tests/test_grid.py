@@ -0,0 +1,194 @@
+"""
+Checks of the pygame grid: the Node views over the cell bytes of a Grid and the bookkeeping of its edits
+They are skipped when pygame is not installed, the engine tests do not need it
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import os
+import random
+import tempfile
+import unittest
+
+import engine
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # the renderers draw in a window that is never shown
+try:
+    import grid
+except ImportError:  # the pygame front end is optional for the engine tests
+    grid = None
+
+ROWS = 12
+WIDTH = 700
+
+
+@unittest.skipIf(grid is None, "grid.py needs pygame")
+class NodeViews(unittest.TestCase):
+    """
+    a Node holds no state of its own, it reads and writes the state byte of its cell in the Grid
+    """
+
+    def test_views_share_the_cell(self):
+        main_grid = grid.make_grid(ROWS, 600)
+        node = main_grid[3][7]
+        self.assertEqual((node.row, node.col, node.index, node.get_pos()), (3, 7, 3 * ROWS + 7, (3, 7)))
+        self.assertEqual(node, main_grid.node(3, 7))
+        self.assertEqual(hash(node), hash(main_grid[3][7]))
+        self.assertNotEqual(node, main_grid[7][3])
+        self.assertNotEqual(node, grid.make_grid(ROWS, 600)[3][7])  # same cell of another grid
+        node.make_wall()
+        self.assertTrue(main_grid[3][7].is_wall())
+        self.assertEqual(main_grid.cells[node.index], engine.WALL)
+        self.assertEqual(main_grid[3][7].color, grid.WALL_COLOR)
+        self.assertEqual((node.x, node.y, node.width), (3 * 50, 7 * 50, 50))
+
+    def test_states(self):
+        main_grid = grid.make_grid(ROWS, 600)
+        node = main_grid[5][5]
+        checks = {node.make_start: node.is_start, node.make_end: node.is_end, node.make_wall: node.is_wall,
+                  node.make_open: node.is_open, node.make_closed: node.is_closed}
+        for make, check in checks.items():
+            make()
+            self.assertEqual([other() for other in checks.values()], [other is check for other in checks.values()])
+        node.reset()
+        self.assertEqual(main_grid.cells[node.index], engine.FREE)
+        self.assertEqual(main_grid.dirty, [node.index] * (len(checks) + 1))
+
+    def test_rows_and_indexing(self):
+        main_grid = grid.make_grid(ROWS, 600)
+        self.assertEqual(len(main_grid), ROWS)
+        self.assertEqual([node.index for row in main_grid for node in row], list(range(ROWS * ROWS)))
+        for row, col in ((ROWS, 0), (-1, 0), (0, ROWS), (0, -1)):
+            with self.assertRaises(IndexError):
+                main_grid[row][col]
+
+    def test_neighbours(self):
+        for connectivity in (4, 8):
+            main_grid = grid.make_grid(ROWS, 600, connectivity)
+            rng = random.Random(connectivity)
+            for _ in range(30):
+                main_grid[rng.randrange(ROWS)][rng.randrange(ROWS)].make_wall()
+            for row in main_grid:
+                for node in row:
+                    expected = sorted(main_grid.neighbours(node.index))
+                    self.assertEqual(sorted(neighbour.index for neighbour in node.neighbours), expected)
+
+    def test_layout_hash(self):
+        main_grid = grid.make_grid(ROWS, 600)
+        rng = random.Random(15)
+        for _ in range(200):
+            node = main_grid[rng.randrange(ROWS)][rng.randrange(ROWS)]
+            rng.choice((node.make_wall, node.reset, node.make_open, node.make_start))()
+            self.assertEqual(main_grid.layout_hash, engine.layout_hash(main_grid))
+
+    def test_clear_search(self):
+        main_grid = grid.make_grid(ROWS, 600)
+        rng = random.Random(16)
+        states = [rng.choice((engine.FREE, engine.WALL, engine.OPEN, engine.CLOSED, engine.PATH)) for _ in
+                  range(main_grid.size)]
+        main_grid.cells[:] = bytes(states)
+        main_grid[0][0].make_start()
+        main_grid[1][1].make_end()
+        main_grid.clear_search()
+        self.assertTrue(main_grid.full_redraw)
+        for index, state in enumerate(states):
+            expected = {0: engine.START, ROWS + 1: engine.GOAL}.get(index, state)
+            if expected in (engine.OPEN, engine.CLOSED, engine.PATH):
+                expected = engine.FREE
+            self.assertEqual(main_grid.cells[index], expected)
+
+
+@unittest.skipIf(grid is None, "grid.py needs pygame")
+class WindowPositions(unittest.TestCase):
+    """
+    converts the mouse positions to cells and loads rectangular maps in the square grid
+    """
+
+    def test_clicked_node(self):
+        width = 700
+        for rows in (20, 35, 100, 512, 700, 1024, 2000):
+            gap = width // rows
+            # the cells leave a margin when the width is not a multiple of the rows
+            drawn = rows * gap if gap else width
+            for x in range(0, width, 7):
+                for y in (0, drawn - 1, drawn, width - 1):
+                    clicked = grid.get_clicked_node((x, y), rows, width)
+                    if x < drawn and y < drawn:
+                        row, col = clicked
+                        self.assertTrue(0 <= row < rows and 0 <= col < rows)
+                        if gap:
+                            self.assertEqual((row, col), (x // gap, y // gap))
+                    else:
+                        self.assertIsNone(clicked)
+
+    def test_load_grid_padding(self):
+        grid_map = engine.GridMap.from_strings(["..#..", "#...."])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "wide.map")
+            engine.maps.save(grid_map, path)
+            main_grid = grid.load_grid(path, 600)
+        self.assertEqual(main_grid.rows, 5)
+        for row in range(5):
+            for col in range(5):
+                expected = grid_map.cells[row * 5 + col] if row < 2 else engine.WALL
+                self.assertEqual(main_grid.cells[row * 5 + col], expected)
+        self.assertEqual(main_grid.layout_hash, engine.layout_hash(main_grid))
+
+
+
+@unittest.skipIf(grid is None, "grid.py needs pygame")
+class Renderers(unittest.TestCase):
+    """
+    draws random grids with the renderers and compares the pixels of the window
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        grid.pygame.display.init()
+        cls.win = grid.pygame.display.set_mode((WIDTH, WIDTH))
+
+    @classmethod
+    def tearDownClass(cls):
+        grid.pygame.display.quit()
+
+    def random_grid(self, rows, seed):
+        rng = random.Random(seed)
+        main_grid = grid.make_grid(rows, WIDTH)
+        states = (engine.WALL, engine.OPEN, engine.CLOSED, engine.PATH, engine.START, engine.GOAL)
+        for index in rng.sample(range(main_grid.size), main_grid.size // 5):
+            main_grid.cells[index] = rng.choice(states)
+        return main_grid, rng
+
+    def pixels(self):
+        return grid.pygame.image.tostring(self.win, "RGB")
+
+    def test_dirty_cells(self):
+        # repainting the changed cells gives the same window as drawing the whole grid
+        for rows in (20, 35, 100, 512, 1024):
+            main_grid, rng = self.random_grid(rows, rows)
+            renderer = grid.Renderer(self.win, WIDTH)
+            renderer.draw(main_grid)
+            for _ in range(3):
+                for _ in range(rng.randint(1, 40)):
+                    main_grid.set_state(rng.randrange(main_grid.size), rng.choice((engine.FREE, engine.WALL,
+                                                                                  engine.OPEN, engine.PATH)))
+                renderer.draw(main_grid)
+                self.assertEqual(main_grid.dirty, [])
+                drawn = self.pixels()
+                grid.draw(self.win, main_grid, rows, WIDTH)
+                with self.subTest(rows=rows):
+                    self.assertEqual(drawn, self.pixels())
+
+    @unittest.skipIf(grid is None or grid.numpy is None, "the ArrayRenderer needs numpy")
+    def test_array_renderer(self):
+        for rows in (20, 100, 512, 700, 1024):
+            main_grid, _ = self.random_grid(rows, rows)
+            grid.draw(self.win, main_grid, rows, WIDTH)
+            expected = self.pixels()
+            grid.ArrayRenderer(self.win, WIDTH).draw(main_grid)
+            with self.subTest(rows=rows):
+                self.assertEqual(self.pixels(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()